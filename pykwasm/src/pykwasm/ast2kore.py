@@ -0,0 +1,166 @@
+"""
+This library provides a translation from the Wasm binary format directly to Kore.
+
+The result is the same pattern that `kast_to_kore` produces for the output of `wasm2kast`,
+but the Kast of the whole module is never built.
+Lists, blocks and function bodies are emitted as Kore right away,
+only small terms such as single instructions go through `kast_to_kore`, and each distinct one only once.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pyk.kast.inner import KApply, KLabel, KSort
+from pyk.konvert import kast_to_kore, munge
+from pyk.kore.syntax import DV, App, SortApp, String
+from pyk.prelude.bytes import BYTES
+from wasm.opcodes import BinaryOpcode
+
+from pykwasm import kwasm_ast as a
+from pykwasm import wasm2kast as w
+from pykwasm.prune import FuncStub, prune_funcs
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import Any, Final, TypeAlias
+
+    from pyk.kast import KInner
+    from pyk.kast.outer import KDefinition
+    from pyk.kore.syntax import Pattern
+    from wasm.datatypes import DataSegment, Function, Module
+    from wasm.instructions import BaseInstruction
+
+    # A converted term together with its sort, or a term still to be converted
+    SortedPattern: TypeAlias = tuple[Pattern, KSort]
+    Arg: TypeAlias = KInner | SortedPattern
+
+
+MODULE_SORT: Final = KSort('ModuleDecl')
+
+
+class KoreEmitter:
+    """Converts py-wasm modules to Kore for a kompiled definition.
+
+    An emitter can be reused for any number of modules, the Kore of small terms is shared between them.
+    """
+
+    MAX_TERMS: Final = 100_000
+
+    definition: KDefinition
+    _sorts: dict[str, tuple[KSort, tuple[KSort, ...]]]
+    _terms: dict[tuple[KInner, KSort], Pattern]
+
+    def __init__(self, definition: KDefinition):
+        self.definition = definition
+        self._sorts = {}
+        self._terms = {}
+
+    def module(self, wasm_ast: Module, filename: str | None = None, prune: bool = False) -> Pattern:
+        a.clear_interned()
+        # The blocks of each module are numbered from 0, by a counter of its own
+        block_ids = w.BlockIds()
+        fs = prune_funcs(wasm_ast) if prune else wasm_ast.funcs
+        types = self._defns([w.typ(x) for x in wasm_ast.types])
+        funcs = self._defns([self._func(x, block_ids) for x in fs])
+        # The other definitions are converted by `wasm2kast`, which continues the numbering of blocks
+        module = self._app(
+            a.MODULE,
+            [
+                types,
+                funcs,
+                self._defns([w.table(x) for x in wasm_ast.tables]),
+                self._defns([w.memory(x) for x in wasm_ast.mems]),
+                self._defns([w.glob(x, block_ids) for x in wasm_ast.globals]),
+                self._defns([w.elem(x, block_ids) for x in wasm_ast.elem]),
+                self._defns([self._data(x, block_ids) for x in wasm_ast.data]),
+                self._defns(w.start(wasm_ast.start)),
+                self._defns([w.imp(x) for x in wasm_ast.imports]),
+                self._defns([w.export(x) for x in wasm_ast.exports]),
+                a.module_metadata(filename=filename),
+            ],
+        )
+        return self._arg(module, MODULE_SORT)
+
+    def _func(self, f: Function | FuncStub, block_ids: w.BlockIds) -> Arg:
+        if isinstance(f, FuncStub):
+            return w.func(f)
+        body = self._instrs(f.body, block_ids)
+        return self._app(a.FUNC, [a.KInt(f.type_idx), w.vec_type(f.locals), body, a.EMPTY_FUNC_METADATA])
+
+    def _data(self, d: DataSegment, block_ids: w.BlockIds) -> SortedPattern:
+        # The segment becomes a domain value as is, rather than a token that `kast_to_kore` would have to unescape
+        init = DV(SortApp('Sort' + BYTES.name), String(d.init.decode('latin-1')))
+        return self._app(a.DATA, [a.KInt(d.memory_idx), w.instrs(d.offset, block_ids), (init, BYTES)])
+
+    def _instrs(self, iis: Iterable[BaseInstruction], block_ids: w.BlockIds) -> Arg:
+        # As in `wasm2kast.instrs`, `END` and `ELSE` are dropped, py-wasm has already terminated the blocks.
+        skip = (BinaryOpcode.END, BinaryOpcode.ELSE)
+        return self._list(a.INSTRS, a.EMPTY_STMTS, [self._instr(i, block_ids) for i in iis if i.opcode not in skip])
+
+    def _instr(self, i: Any, block_ids: w.BlockIds) -> Arg:
+        # Block ids are assigned in the same (pre-)order as in `wasm2kast.instr`.
+        if i.opcode == BinaryOpcode.BLOCK:
+            block_id = block_ids.new_id()
+            iis = self._instrs(i.instructions, block_ids)
+            return self._app('aBlock', [w.vec_type(i.result_type), iis, a.KInt(block_id)])
+        if i.opcode == BinaryOpcode.IF:
+            block_id = block_ids.new_id()
+            thens = self._instrs(i.instructions, block_ids)
+            els = self._instrs(i.else_instructions, block_ids)
+            res = w.vec_type(i.result_type)
+            return self._app('aIf', [res, thens, els, a.KInt(block_id)])
+        if i.opcode == BinaryOpcode.LOOP:
+            block_id = block_ids.new_id()
+            iis = self._instrs(i.instructions, block_ids)
+            return self._app('aLoop', [w.vec_type(i.result_type), iis, a.KInt(block_id)])
+        return w.instr(i)
+
+    def _defns(self, items: list[Arg]) -> Arg:
+        return self._list(a.DEFNS, a.EMPTY_STMTS, items)
+
+    def _list(self, klabel: str, empty_klabel: str, items: list[Arg]) -> Arg:
+        """Emit a cons list without building the intermediate Kast, see `kwasm_ast.KNamedList`."""
+        if not items:
+            # Left to `kast_to_kore`, so that the empty list is injected into the sort of the context
+            return KApply(empty_klabel)
+        sort, (item_sort, tail_sort) = self._label_sorts(klabel)
+        symbol = 'Lbl' + munge(klabel)
+        tail = self._arg(KApply(empty_klabel), tail_sort)
+        for item in reversed(items):
+            tail = self._inject(App(symbol, (), (self._arg(item, item_sort), tail)), sort, tail_sort)
+        return tail, tail_sort
+
+    def _app(self, klabel: str, args: list[Arg]) -> SortedPattern:
+        sort, arg_sorts = self._label_sorts(klabel)
+        patterns = tuple(self._arg(arg, arg_sort) for arg, arg_sort in zip(args, arg_sorts, strict=True))
+        return App('Lbl' + munge(klabel), (), patterns), sort
+
+    def _arg(self, arg: Arg, sort: KSort) -> Pattern:
+        """Return the Kore of `arg` injected into `sort`."""
+        if isinstance(arg, tuple):
+            pattern, actual_sort = arg
+            return self._inject(pattern, actual_sort, sort)
+        return self._term(arg, sort)
+
+    def _term(self, term: KInner, sort: KSort) -> Pattern:
+        key = (term, sort)
+        pattern = self._terms.get(key)
+        if pattern is None:
+            if len(self._terms) >= self.MAX_TERMS:
+                self._terms.clear()
+            pattern = kast_to_kore(self.definition, term, sort)
+            self._terms[key] = pattern
+        return pattern
+
+    def _inject(self, pattern: Pattern, actual_sort: KSort, sort: KSort) -> Pattern:
+        if actual_sort == sort:
+            return pattern
+        return App('inj', (SortApp('Sort' + actual_sort.name), SortApp('Sort' + sort.name)), (pattern,))
+
+    def _label_sorts(self, klabel: str) -> tuple[KSort, tuple[KSort, ...]]:
+        sorts = self._sorts.get(klabel)
+        if sorts is None:
+            sorts = self.definition.resolve_sorts(KLabel(klabel))
+            self._sorts[klabel] = sorts
+        return sorts
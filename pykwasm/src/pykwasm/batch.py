@@ -0,0 +1,170 @@
+"""
+This library runs many programs on the `llvm` definition, over a pool of worker processes.
+
+`kwasm run` takes one Python process per program, which imports pyk and resolves the definition before it runs `krun`.
+Here each worker process does that once, and then takes programs from a queue shared by the workers: a worker that is
+done with a program takes the next one, so a few slow programs do not hold back the others. Programs are queued largest
+first, so that the slow ones do not start last.
+
+Results are yielded as the programs finish, each with the time it took:
+
+    for res in run_many(find_programs(['tests/simple/*.wast']), workers=8):
+        print(res.program, res.returncode, res.seconds)
+
+With a module cache, programs are parsed once and then run from their cached Kore, see `pykwasm.program`.
+
+With `expected`, the output of each program is compared to it, as by the `tests/%.run` rules of the Makefile, i.e.
+ignoring whitespace, or as JSON with `cells`.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from subprocess import CompletedProcess
+from typing import TYPE_CHECKING, NamedTuple
+
+from pyk.kdist import kdist
+from pyk.ktool.krun import KRunOutput, _krun
+
+from .program import preprocessed, run_program_cached
+from .results import extract_cells
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from typing import Any
+
+    from .cache import ModuleCache
+
+
+class ProgramResult(NamedTuple):
+    program: Path
+    returncode: int
+    stdout: str
+    stderr: str
+    seconds: float
+    passed: bool | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        res = {
+            'program': str(self.program),
+            'returncode': self.returncode,
+            'stdout': self.stdout,
+            'stderr': self.stderr,
+            'seconds': self.seconds,
+        }
+        if self.passed is not None:
+            res['passed'] = self.passed
+        return res
+
+
+def find_programs(patterns: Iterable[str]) -> list[Path]:
+    """Return the programs matched by each of `patterns`, a path or a glob, in order and without duplicates."""
+    res: dict[Path, None] = {}
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern, recursive=True))
+        if not paths:
+            raise ValueError(f'No program matches: {pattern}')
+        res.update((Path(path), None) for path in paths)
+    return list(res)
+
+
+def run_program(
+    program: Path,
+    definition_dir: Path,
+    cells: Iterable[str] | None = None,
+    cache: ModuleCache | None = None,
+) -> CompletedProcess:
+    """Run `program` with `krun`, and output the final configuration, or the given `cells` of it as JSON.
+
+    With a `cache`, the program is run without `krun`, on its Kore from the cache, see `pykwasm.program`.
+    """
+    cells = list(cells) if cells else None
+    if cache is not None:
+        return run_program_cached(program, definition_dir, cache, cells)
+
+    # The requested cells are taken from the Kore output, so the final configuration is never pretty-printed
+    output = KRunOutput.KORE if cells else None
+    with preprocessed(program) as input_file:
+        proc_res = _krun(definition_dir=definition_dir, input_file=input_file, output=output, check=False)
+
+    if cells and proc_res.returncode == 0:
+        stdout = json.dumps(extract_cells(proc_res.stdout, cells)) + '\n'
+        proc_res = CompletedProcess(proc_res.args, proc_res.returncode, stdout, proc_res.stderr)
+
+    return proc_res
+
+
+def run_many(
+    programs: Iterable[Path],
+    *,
+    definition_dir: Path | None = None,
+    workers: int | None = None,
+    cells: Iterable[str] | None = None,
+    expected: str | None = None,
+    cache: ModuleCache | None = None,
+) -> Iterator[ProgramResult]:
+    """Run `programs` over `workers` processes, one per CPU by default, and yield their results as they finish."""
+    if definition_dir is None:
+        definition_dir = kdist.get('wasm-semantics.llvm')
+    cells = list(cells) if cells else None
+    programs = sorted(programs, key=lambda program: program.stat().st_size, reverse=True)
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(definition_dir, cells, expected, cache)
+    )
+    try:
+        # One task per program, so that the workers share the queue of programs rather than fixed chunks of it
+        futures = [executor.submit(_run_worker, program) for program in programs]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+class _Worker(NamedTuple):
+    definition_dir: Path
+    cells: list[str] | None
+    expected: str | None
+    cache: ModuleCache | None
+
+
+_WORKER: _Worker | None = None
+
+
+def _init_worker(
+    definition_dir: Path, cells: list[str] | None, expected: str | None, cache: ModuleCache | None
+) -> None:
+    global _WORKER
+    _WORKER = _Worker(definition_dir, cells, expected, cache)
+
+
+def _run_worker(program: Path) -> ProgramResult:
+    assert _WORKER is not None
+    start = time.perf_counter()
+    try:
+        proc_res = run_program(program, _WORKER.definition_dir, _WORKER.cells, _WORKER.cache)
+    except Exception as err:
+        # A program that cannot be run is reported like a failed one, so that the other programs are still run
+        proc_res = CompletedProcess([], 1, '', f'{type(err).__name__}: {err}\n')
+    seconds = time.perf_counter() - start
+
+    passed = None
+    if _WORKER.expected is not None:
+        passed = proc_res.returncode == 0 and _same_output(
+            proc_res.stdout, _WORKER.expected, as_json=bool(_WORKER.cells)
+        )
+
+    return ProgramResult(program, proc_res.returncode, proc_res.stdout, proc_res.stderr, seconds, passed)
+
+
+def _same_output(actual: str, expected: str, *, as_json: bool) -> bool:
+    if not as_json:
+        return actual.split() == expected.split()
+    try:
+        return json.loads(actual) == json.loads(expected)
+    except ValueError:
+        return False
@@ -0,0 +1,761 @@
+"""
+This module provides benchmarks for the performance-critical parts of the Wasm to Kore pipeline.
+
+Each benchmark runs a few variants of the same task on synthetic input, and reports the best wall-clock time over a
+number of repetitions for each of them. The benchmarks of the parts of the conversion do not need a kompiled
+definition. Those of the whole pipeline, `startup`, `convert`, `simple`, `memory`, `binary-parsing`, `erc20` and
+`engine`, run real modules or programs on a kompiled definition, all offline.
+
+With `--history`, the results are appended to a file along with the current commit, and each result more than
+`--threshold` slower than the latest result of the same variant from another commit is reported as a regression.
+
+usage: kwasm-bench <benchmark> [--size N] [--repeat R] [--wasm FILE...] [--definition DIR] [--runtime DIR]
+                   [--history FILE]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from io import StringIO
+from pathlib import Path
+from random import Random
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING, NamedTuple
+
+from pyk.cli.utils import dir_path, file_path
+from pyk.konvert import munge
+from pyk.kore.syntax import DV, App, SortApp, String
+from pyk.prelude.bytes import bytesToken, pretty_bytes_str
+
+from . import kwasm_ast as a
+from .kore_binary import binary_to_pattern, pattern_to_binary
+from .kore_writer import pattern_write, write_pattern
+from .traversal import equal, kore_text
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from typing import IO, Any, Final
+
+    from pyk.kast import KInner
+    from pyk.kore.syntax import Pattern
+
+
+class Options(NamedTuple):
+    size: int
+    repeat: int
+    wasm_files: tuple[Path, ...] = ()
+    definition_dir: Path | None = None
+    runtime_dir: Path | None = None
+
+
+class Measurement(NamedTuple):
+    benchmark: str
+    variant: str
+    size: int
+    seconds: float
+    memory: int | None = None
+
+
+def measure(
+    benchmark: str,
+    variant: str,
+    size: int,
+    func: Callable[[], object],
+    repeat: int,
+    *,
+    memory: bool = False,
+) -> Measurement:
+    """Return the best wall-clock time of `repeat` calls to `func`.
+
+    With `memory`, the number of bytes allocated for the result of `func` and still alive after the call is reported too.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    retained = None
+    if memory:
+        tracemalloc.start()
+        try:
+            results = [func()]
+            retained, _ = tracemalloc.get_traced_memory()
+            results.clear()
+        finally:
+            tracemalloc.stop()
+
+    return Measurement(benchmark, variant, size, best, retained)
+
+
+##################
+# Synthetic data #
+##################
+
+
+def _symbol(klabel: str) -> str:
+    return 'Lbl' + munge(klabel)
+
+
+def synthetic_instrs_kore(size: int) -> Pattern:
+    """Return Kore shaped like an instruction list of `size` instructions, as produced for a large function body."""
+    int_sort = SortApp('SortInt')
+    i32 = App(_symbol('i32'))
+
+    def inj(sort: str, pattern: Pattern) -> Pattern:
+        return App('inj', (SortApp(sort), SortApp('SortInstr')), (pattern,))
+
+    def instr(i: int) -> Pattern:
+        k = i % 4
+        if k == 0:
+            return inj('SortPlainInstr', App(_symbol('aIConst'), (), (i32, DV(int_sort, String(str(i))))))
+        if k == 1:
+            return inj('SortPlainInstr', App(_symbol('aLocal.get'), (), (DV(int_sort, String(str(i % 8))),)))
+        if k == 2:
+            return inj('SortPlainInstr', App(_symbol('aIBinOp'), (), (i32, App(_symbol('intAdd')))))
+        return inj('SortPlainInstr', App(_symbol('aDrop')))
+
+    cons = _symbol(a.INSTRS)
+    tail: Pattern = App('inj', (SortApp('SortEmptyStmts'), SortApp('SortInstrs')), (App(_symbol(a.EMPTY_STMTS)),))
+    for i in reversed(range(size)):
+        tail = App(cons, (), (instr(i), tail))
+    return tail
+
+
+def synthetic_instr_calls(size: int) -> list[tuple[Callable[..., KInner], tuple[int, ...]]]:
+    """Return `size` calls to instruction constructors, with the repetitiveness of compiled code."""
+    ctors: list[tuple[Callable[..., KInner], Callable[[int], tuple[int, ...]]]] = [
+        (a.I32_CONST, lambda i: (i % 1024,)),
+        (a.GET_LOCAL, lambda i: (i % 16,)),
+        (a.SET_LOCAL, lambda i: (i % 16,)),
+        (a.I32_LOAD, lambda i: (4 * (i % 32),)),
+        (a.I32_STORE, lambda i: (4 * (i % 32),)),
+        (a.I64_CONST, lambda i: (i % 64,)),
+        (a.CALL, lambda i: (i % 256,)),
+        (a.BR_IF, lambda i: (i % 4,)),
+    ]
+    return [(ctor, args(i)) for i in range(size) for ctor, args in (ctors[i % len(ctors)],)]
+
+
+##############
+# Benchmarks #
+##############
+
+
+def bench_writer(options: Options) -> list[Measurement]:
+    """Serialize the Kore of a large instruction list with the original and the buffered writer, and as binary Kore."""
+    size, repeat = options.size, options.repeat
+    pattern = synthetic_instrs_kore(size)
+
+    expected = StringIO()
+    pattern_write(pattern, expected, pretty=False)
+    actual = StringIO()
+    write_pattern(pattern, actual)
+    assert actual.getvalue() == expected.getvalue()
+    assert equal(binary_to_pattern(pattern_to_binary(pattern)), pattern)
+
+    with open(os.devnull, 'w') as devnull:
+        return [
+            measure('writer', 'pattern_write', size, lambda: pattern_write(pattern, devnull, pretty=False), repeat),
+            measure('writer', 'KoreWriter', size, lambda: write_pattern(pattern, devnull), repeat),
+            measure('writer', 'binary', size, lambda: pattern_to_binary(pattern), repeat),
+        ]
+
+
+def bench_interning(options: Options) -> list[Measurement]:
+    """Build the Kast of instructions with and without interning.
+
+    With `--wasm`, the whole modules are converted by `wasm2kast`, otherwise a synthetic instruction stream is used.
+    """
+    build: Callable[[], object]
+    if options.wasm_files:
+        from .wasm2kast import ast2kast
+
+        wasm_asts = _parse_wasm_files(options.wasm_files)
+        size = sum(len(func.body) for wasm_ast in wasm_asts for func in wasm_ast.funcs)
+
+        def build() -> object:
+            return [ast2kast(wasm_ast) for wasm_ast in wasm_asts]
+
+    else:
+        size = options.size
+        calls = synthetic_instr_calls(size)
+
+        def build() -> object:
+            return [ctor(*args) for ctor, args in calls]
+
+    def measure_build(variant: str, max_interned: int) -> Measurement:
+        def build_fresh() -> object:
+            a.reset_interned(max_interned)
+            return build()
+
+        return measure('interning', variant, size, build_fresh, options.repeat, memory=True)
+
+    try:
+        return [measure_build('no interning', 0), measure_build('interning', a.DEFAULT_MAX_INTERNED)]
+    finally:
+        a.reset_interned()
+
+
+def bench_dispatch(options: Options) -> list[Measurement]:
+    """Convert the instructions of the `--wasm` modules with a linear scan of the opcodes and with `wasm2kast.instr`.
+
+    The linear scan calls the same handlers in the order of the former chain of comparisons, and falls back to `eval`
+    for operations without arguments, so the difference is the cost of dispatch.
+    """
+    from wasm.opcodes import BinaryOpcode
+
+    from . import wasm2kast as w
+
+    if not options.wasm_files:
+        raise ValueError('The dispatch benchmark needs modules, pass them with --wasm')
+
+    wasm_asts = _parse_wasm_files(options.wasm_files)
+    iis = [i for wasm_ast in wasm_asts for func in wasm_ast.funcs for i in _flat_instrs(func.body)]
+    iis = [i for i in iis if i.opcode not in (BinaryOpcode.BLOCK, BinaryOpcode.IF, BinaryOpcode.LOOP)]
+    handlers = list(w._INSTR_HANDLERS.items())
+    type_handlers = list(w._INSTR_TYPE_HANDLERS.items())
+
+    def linear_instr(i: Any) -> KInner:
+        for opcode, handler in handlers:
+            if i.opcode == opcode:
+                return handler(i)
+        for cls, handler in type_handlers:
+            if isinstance(i, cls):
+                return handler(i)
+        return eval('a.' + i.opcode.name)
+
+    size = len(iis)
+    try:
+        a.reset_interned(0)
+        assert [linear_instr(i) for i in iis] == [w.instr(i) for i in iis]
+        return [
+            measure('dispatch', 'linear', size, lambda: [linear_instr(i) for i in iis], options.repeat),
+            measure('dispatch', 'table', size, lambda: [w.instr(i) for i in iis], options.repeat),
+        ]
+    finally:
+        a.reset_interned()
+
+
+def bench_pruning(options: Options) -> list[Measurement]:
+    """Convert the `--wasm` modules to Kast with and without pruning unreachable functions."""
+    from .prune import FuncStub, prune_funcs
+    from .wasm2kast import ast2kast
+
+    if not options.wasm_files:
+        raise ValueError('The pruning benchmark needs modules, pass them with --wasm')
+
+    wasm_asts = _parse_wasm_files(options.wasm_files)
+    num_funcs = sum(len(wasm_ast.funcs) for wasm_ast in wasm_asts)
+    num_live = sum(1 for wasm_ast in wasm_asts for f in prune_funcs(wasm_ast) if not isinstance(f, FuncStub))
+    return [
+        measure('pruning', 'all', num_funcs, lambda: [ast2kast(m) for m in wasm_asts], options.repeat),
+        measure(
+            'pruning',
+            f'pruned ({num_live} live)',
+            num_funcs,
+            lambda: [ast2kast(m, prune=True) for m in wasm_asts],
+            options.repeat,
+        ),
+    ]
+
+
+def bench_bytes(options: Options) -> list[Measurement]:
+    """Encode data segments of growing size as Kast tokens, and write them as Kore.
+
+    The Kore variants compare unescaping the token, as `kast_to_kore` does, with the domain value built by the emitter.
+    """
+    rand = Random(0)
+    with open(os.devnull, 'w') as devnull:
+        return [
+            measurement
+            for size in (options.size // 16, options.size // 4, options.size)
+            for measurement in _bench_bytes(rand.randbytes(size), options.repeat, devnull)
+        ]
+
+
+def _bench_bytes(data: bytes, repeat: int, output: IO[str]) -> list[Measurement]:
+    assert a.KBytes(data) == bytesToken(data)
+
+    def kore_from_token() -> None:
+        write_pattern(DV(SortApp('SortBytes'), String(pretty_bytes_str(bytesToken(data)))), output)
+
+    def kore_direct() -> None:
+        write_pattern(DV(SortApp('SortBytes'), String(data.decode('latin-1'))), output)
+
+    size = len(data)
+    return [
+        measure('bytes', 'bytesToken', size, lambda: bytesToken(data), repeat),
+        measure('bytes', 'KBytes', size, lambda: a.KBytes(data), repeat),
+        measure('bytes', 'Kore from token', size, kore_from_token, repeat),
+        measure('bytes', 'Kore direct', size, kore_direct, repeat),
+    ]
+
+
+def bench_results(options: Options) -> list[Measurement]:
+    """Get the `<gas>` and `<output>` cells from the Kore text of a final configuration.
+
+    The configuration holds `--size` bytes of memory and `--size / 10` function definitions. It is either parsed as a
+    whole, or scanned for the cells by `extract_cells`. The size is the length of the text.
+    """
+    from pyk.kore.parser import KoreParser
+
+    from .results import extract_cells
+
+    def cell(name: str, *args: Pattern) -> App:
+        return App(_symbol(f'<{name}>'), (), args)
+
+    rand = Random(0)
+    func = cell('funcDef', *(DV(SortApp('SortInt'), String(str(i))) for i in range(5)))
+    config = cell(
+        'generatedTop',
+        cell('mdata', DV(SortApp('SortBytes'), String(rand.randbytes(options.size).decode('latin-1')))),
+        cell('funcs', *([func] * (options.size // 10))),
+        cell('gas', DV(SortApp('SortInt'), String('100000'))),
+        cell('output', DV(SortApp('SortBytes'), String('\x00\x01'))),
+    )
+    kore = kore_text(config)
+    size = len(kore)
+    return [
+        measure('results', 'parse', size, lambda: KoreParser(kore).pattern(), options.repeat),
+        measure('results', 'extract_cells', size, lambda: extract_cells(kore, ['gas', 'output']), options.repeat),
+    ]
+
+
+def bench_preprocess(options: Options) -> list[Measurement]:
+    """Preprocess a text program of `--size` lines of float constants, or the `--wasm` programs, as `kwasm run` does.
+
+    The whole text is preprocessed in memory, or streamed from the file to `/dev/null` a chunk at a time. The size is
+    the length of the text.
+    """
+    from .scripts.preprocessor import preprocess, preprocess_stream
+
+    if options.wasm_files:
+        text = ''.join(wasm_file.read_text() for wasm_file in options.wasm_files)
+    else:
+        rand = Random(0)
+        consts = ('0x1.8p+3', '-nan:0x200000', 'inf', '1_000.5', '0x1p-149', '-0')
+        text = ''.join(
+            f'(assert_return (invoke "f" (f32.const {rand.choice(consts)})) (f64.const {rand.choice(consts)}))\n'
+            for _ in range(options.size)
+        )
+
+    with TemporaryDirectory() as tmp_dir, open(os.devnull, 'w') as devnull:
+        program = Path(tmp_dir) / 'program.wast'
+        program.write_text(text)
+
+        def stream() -> None:
+            with program.open() as input:
+                preprocess_stream(input, devnull)
+
+        size = len(text)
+        return [
+            measure(
+                'preprocess', 'in memory', size, lambda: preprocess(program.read_text()), options.repeat, memory=True
+            ),
+            measure('preprocess', 'streamed', size, stream, options.repeat, memory=True),
+        ]
+
+
+def bench_startup(options: Options) -> list[Measurement]:
+    """Start the interpreter of `--definition` on the initial configuration of each `--wasm` module, as text and binary.
+
+    The interpreter stops before the first step, so the time is that of serializing, parsing and loading the input.
+    The size is the total size of the textual Kore of the configurations, in bytes.
+    """
+    from pyk.ktool.krun import KRun
+
+    from .ast2kore import KoreEmitter
+    from .config_template import ConfigTemplate
+    from .interpreter import run_interpreter
+
+    if options.definition_dir is None or not options.wasm_files:
+        raise ValueError('The startup benchmark needs a definition and modules, pass them with --definition and --wasm')
+    definition_dir = options.definition_dir
+
+    runner = KRun(definition_dir)
+    template = ConfigTemplate(runner)
+    emitter = KoreEmitter(runner.definition)
+    configs = [template.instantiate(emitter.module(wasm_ast), {}) for wasm_ast in _parse_wasm_files(options.wasm_files)]
+    size = sum(len(kore_text(config).encode()) for config in configs)
+
+    def start(binary: bool) -> None:
+        for config in configs:
+            run_interpreter(definition_dir, config, depth=0, binary=binary).check_returncode()
+
+    return [
+        measure('startup', 'text', size, lambda: start(False), options.repeat),
+        measure('startup', 'binary', size, lambda: start(True), options.repeat),
+    ]
+
+
+def bench_convert(options: Options) -> list[Measurement]:
+    """Convert the `--wasm` modules to Kast, the Kast to Kore with the `--definition`, and write the Kore.
+
+    The size is the number of instructions of the modules.
+    """
+    from pyk.ktool.krun import KRun
+
+    from .config_template import MODULE_SORT
+    from .profiling import count_instrs
+    from .wasm2kast import ast2kast
+
+    if options.definition_dir is None or not options.wasm_files:
+        raise ValueError('The convert benchmark needs a definition and modules, pass them with --definition and --wasm')
+
+    runner = KRun(options.definition_dir)
+    wasm_asts = _parse_wasm_files(options.wasm_files)
+    size = sum(count_instrs(func.body) for wasm_ast in wasm_asts for func in wasm_ast.funcs)
+    modules = [ast2kast(wasm_ast) for wasm_ast in wasm_asts]
+    patterns = [runner.kast_to_kore(module, MODULE_SORT) for module in modules]
+
+    def write_all(output: IO[str]) -> None:
+        for pattern in patterns:
+            pattern_write(pattern, output, pretty=False)
+
+    with open(os.devnull, 'w') as devnull:
+        return [
+            measure('convert', 'wasm2kast', size, lambda: [ast2kast(m) for m in wasm_asts], options.repeat),
+            measure(
+                'convert',
+                'kast_to_kore',
+                size,
+                lambda: [runner.kast_to_kore(module, MODULE_SORT) for module in modules],
+                options.repeat,
+            ),
+            measure('convert', 'pattern_write', size, lambda: write_all(devnull), options.repeat),
+        ]
+
+
+def bench_simple(options: Options) -> list[Measurement]:
+    """Run the `--wasm` programs as `kwasm run` does, e.g. `tests/simple/*.wast`.
+
+    The definition is `wasm-semantics.llvm` unless `--definition` is given. The size is the number of programs.
+    """
+    from pyk.kdist import kdist
+    from pyk.ktool.krun import _krun
+
+    from .scripts.preprocessor import preprocess
+
+    if not options.wasm_files:
+        raise ValueError('The simple benchmark needs programs, pass them with --wasm')
+    definition_dir = options.definition_dir or kdist.get('wasm-semantics.llvm')
+
+    with TemporaryDirectory() as tmp_dir:
+        input_files = [Path(tmp_dir) / f'{i}.wast' for i in range(len(options.wasm_files))]
+        for program, input_file in zip(options.wasm_files, input_files, strict=True):
+            input_file.write_text(preprocess(program.read_text()))
+
+        def run_all() -> None:
+            for input_file in input_files:
+                _krun(definition_dir=definition_dir, input_file=input_file)
+
+        return [measure('simple', 'kwasm run', len(input_files), run_all, options.repeat)]
+
+
+MEMORY_TARGETS: Final = ('llvm', 'llvm-paged')
+
+
+def bench_memory(options: Options) -> list[Measurement]:
+    """Run the load/store-heavy `--wasm` programs, e.g. `tests/benchmarks/memory-*.wast`, with each representation of
+    linear memory: a list of chunks, `wasm-semantics.llvm`, and a map of pages, `wasm-semantics.llvm-paged`.
+
+    The programs are parsed beforehand, and the interpreter runs their initial configurations. The size is the number of
+    rewrite steps of all the programs on the definition, so the time per item is the time per step.
+    """
+    from pyk.kdist import kdist
+
+    from .interpreter import count_steps, run_interpreter
+    from .program import program_config, program_kore
+
+    if not options.wasm_files:
+        raise ValueError('The memory benchmark needs programs, pass them with --wasm')
+
+    res = []
+    for target in MEMORY_TARGETS:
+        definition_dir = kdist.get(f'wasm-semantics.{target}')
+        configs = []
+        for program in options.wasm_files:
+            proc_res = program_kore(program, definition_dir)
+            if proc_res.returncode != 0:
+                raise ValueError(f'Parsing {program} failed: {proc_res.stderr}')
+            configs.append(program_config(proc_res.stdout))
+
+        steps = 0
+        for config in configs:
+            proc_res = run_interpreter(definition_dir, config)
+            if proc_res.returncode != 0:
+                raise ValueError(f'Run on {target} failed: {proc_res.stderr}')
+            steps += count_steps(definition_dir, config, proc_res.stdout)
+
+        def run_all(definition_dir: Path = definition_dir, configs: list[str] = configs) -> None:
+            for config in configs:
+                run_interpreter(definition_dir, config)
+
+        res.append(measure('memory', target, steps, run_all, options.repeat))
+    return res
+
+
+def bench_binary_parsing(options: Options) -> list[Measurement]:
+    """Parse the `--wasm` modules with the `wasm-semantics.binary-parser-test` definition, as `test-binary-parsing`.
+
+    Text modules, e.g. `tests/binary-parsing/*.wast`, are compiled first. The size is the number of modules.
+    """
+    from pyk.kdist import kdist
+    from pyk.ktool.krun import _krun
+
+    from .loader import module_bytes
+
+    if not options.wasm_files:
+        raise ValueError('The binary-parsing benchmark needs modules, pass them with --wasm')
+    definition_dir = options.definition_dir or kdist.get('wasm-semantics.binary-parser-test')
+
+    with TemporaryDirectory() as tmp_dir:
+        input_files = [Path(tmp_dir) / f'{i}.kore' for i in range(len(options.wasm_files))]
+        for wasm_file, input_file in zip(options.wasm_files, input_files, strict=True):
+            data = module_bytes(wasm_file)
+            input_file.write_text(kore_text(DV(SortApp('SortBytes'), String(data.decode('latin-1')))))
+
+        def parse_all() -> None:
+            for input_file in input_files:
+                _krun(definition_dir=definition_dir, input_file=input_file, parser='cat')
+
+        return [measure('binary-parsing', 'krun', len(input_files), parse_all, options.repeat)]
+
+
+ERC20_INIT_ARGS: Final = ('-gas:Int=100000', '-entry:WasmString=init', '-create:Bool=true')
+
+
+def bench_erc20(options: Options) -> list[Measurement]:
+    """Deploy the `--wasm` ERC20 modules on the ULM Wasm `--definition` with `wasm-server` jobs.
+
+    The jobs run without and with a warm conversion cache. The size is the number of modules.
+    """
+    from .cache import ModuleCache
+    from .wasm_server import WasmServer
+
+    if options.definition_dir is None or not options.wasm_files:
+        raise ValueError('The erc20 benchmark needs a definition and modules, pass them with --definition and --wasm')
+
+    def deploy_all(server: WasmServer) -> None:
+        for wasm_file in options.wasm_files:
+            result = server.run(wasm_file, ERC20_INIT_ARGS)
+            if result.returncode != 0:
+                raise ValueError(f'Deploying {wasm_file} failed: {result.stderr}')
+
+    with TemporaryDirectory() as cache_dir:
+        server = WasmServer(options.definition_dir)
+        cached_server = WasmServer(options.definition_dir, ModuleCache(Path(cache_dir)))
+        deploy_all(cached_server)
+        size = len(options.wasm_files)
+        return [
+            measure('erc20', 'init', size, lambda: deploy_all(server), options.repeat),
+            measure('erc20', 'init (cached)', size, lambda: deploy_all(cached_server), options.repeat),
+        ]
+
+
+def bench_engine(options: Options) -> list[Measurement]:
+    """Run the initial configuration of each `--wasm` module on `--definition`, in a subprocess and in-process.
+
+    The in-process engine loads the Python extension in `--runtime`, by default the kdist target
+    `wasm-semantics.llvm-runtime`. Loading it is measured once. Both engines get the same Kore text. The size is the
+    number of runs, so the time per item is the latency of a call. For a ULM Wasm definition, the runs deploy the
+    modules as the `erc20` benchmark does.
+    """
+    from pyk.kdist import kdist
+    from pyk.ktool.krun import KRun
+
+    from .config_template import ULM_KEYS, ConfigTemplate
+    from .engine import SubprocessEngine
+    from .run_wasm import build_config, load_module, parse_config_subst
+
+    if options.definition_dir is None or not options.wasm_files:
+        raise ValueError('The engine benchmark needs a definition and modules, pass them with --definition and --wasm')
+    runtime_dir = options.runtime_dir or kdist.get('wasm-semantics.llvm-runtime')
+
+    template = ConfigTemplate(KRun(options.definition_dir))
+    config_subst = parse_config_subst(list(ERC20_INIT_ARGS)) if ULM_KEYS.issubset(template.cell_labels) else {}
+    configs = [
+        kore_text(build_config(template, load_module(wasm_file), config_subst)) for wasm_file in options.wasm_files
+    ]
+
+    # Importing the engine builds the bindings of the backend, which is part of loading
+    start = time.perf_counter()
+    from .in_process import InProcessEngine
+
+    in_process = InProcessEngine(runtime_dir)
+    load = Measurement('engine', 'in-process (load)', 1, time.perf_counter() - start)
+
+    def run_all(engine: SubprocessEngine | InProcessEngine) -> None:
+        for config in configs:
+            proc_res = engine.run(config)
+            if proc_res.returncode != 0:
+                raise ValueError(f'Run failed: {proc_res.stderr}')
+
+    size = len(configs)
+    subprocess_engine = SubprocessEngine(options.definition_dir)
+    return [
+        measure('engine', 'subprocess', size, lambda: run_all(subprocess_engine), options.repeat),
+        measure('engine', 'in-process', size, lambda: run_all(in_process), options.repeat),
+        load,
+    ]
+
+
+def _parse_wasm_files(wasm_files: Iterable[Path]) -> list[Any]:
+    from .wasm2kast import parse_wasm_file
+
+    return [parse_wasm_file(wasm_file) for wasm_file in wasm_files]
+
+
+def _flat_instrs(iis: Iterable[Any]) -> Iterator[Any]:
+    """Yield the instructions in `iis` and in their nested blocks, without `END` and `ELSE`."""
+    from wasm.opcodes import BinaryOpcode
+
+    stack = [iter(iis)]
+    while stack:
+        i = next(stack[-1], None)
+        if i is None:
+            stack.pop()
+            continue
+        if i.opcode in (BinaryOpcode.END, BinaryOpcode.ELSE):
+            continue
+        yield i
+        if i.opcode in (BinaryOpcode.BLOCK, BinaryOpcode.IF, BinaryOpcode.LOOP):
+            stack.append(iter(i.instructions))
+        if i.opcode == BinaryOpcode.IF:
+            stack.append(iter(i.else_instructions))
+
+
+BENCHMARKS: Final[dict[str, Callable[[Options], list[Measurement]]]] = {
+    'writer': bench_writer,
+    'interning': bench_interning,
+    'dispatch': bench_dispatch,
+    'pruning': bench_pruning,
+    'bytes': bench_bytes,
+    'results': bench_results,
+    'preprocess': bench_preprocess,
+    'startup': bench_startup,
+    'convert': bench_convert,
+    'simple': bench_simple,
+    'memory': bench_memory,
+    'binary-parsing': bench_binary_parsing,
+    'erc20': bench_erc20,
+    'engine': bench_engine,
+}
+
+
+###########
+# History #
+###########
+
+
+def git_commit() -> str:
+    """Return the commit of the working directory, or `unknown` outside of a repository."""
+    proc_res = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=False)
+    return proc_res.stdout.strip() if proc_res.returncode == 0 else 'unknown'
+
+
+def read_history(history_file: Path) -> list[dict[str, Any]]:
+    if not history_file.exists():
+        return []
+    with open(history_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(history_file: Path, measurements: Iterable[Measurement], commit: str) -> None:
+    """Append `measurements` to `history_file`, one JSON object per line."""
+    timestamp = time.time()
+    with open(history_file, 'a') as f:
+        for m in measurements:
+            f.write(json.dumps({'commit': commit, 'timestamp': timestamp} | m._asdict()) + '\n')
+
+
+def regressions(
+    history: Iterable[dict[str, Any]], measurements: Iterable[Measurement], commit: str, threshold: float
+) -> list[tuple[Measurement, float]]:
+    """Return the measurements slower than the latest one of the same variant from another commit by more than
+    `threshold`, a fraction, along with the time of that latest one.
+    """
+    latest: dict[tuple[str, str, int], float] = {}
+    for entry in history:
+        if entry['commit'] != commit:
+            latest[entry['benchmark'], entry['variant'], entry['size']] = entry['seconds']
+
+    res = []
+    for m in measurements:
+        previous = latest.get((m.benchmark, m.variant, m.size))
+        if previous is not None and m.seconds > previous * (1 + threshold):
+            res.append((m, previous))
+    return res
+
+
+def main() -> None:
+    parser = ArgumentParser(description='Benchmark parts of the Wasm to Kore pipeline')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help='benchmark to run')
+    parser.add_argument('--size', type=int, default=100_000, help='size of the synthetic input')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs per variant, the best is reported')
+    parser.add_argument(
+        '--wasm',
+        dest='wasm_files',
+        type=file_path,
+        nargs='+',
+        default=(),
+        help='use real modules, where supported',
+    )
+    parser.add_argument('--definition', dest='definition_dir', type=dir_path, help='kompiled LLVM definition')
+    parser.add_argument('--runtime', dest='runtime_dir', type=dir_path, help='Python extension of the definition')
+    parser.add_argument(
+        '--history',
+        dest='history_file',
+        type=Path,
+        help='append the results to this file, and compare them to those of earlier commits',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='slowdown over the latest result from another commit reported as a regression, as a fraction',
+    )
+    args = parser.parse_args()
+
+    options = Options(
+        size=args.size,
+        repeat=args.repeat,
+        wasm_files=tuple(args.wasm_files),
+        definition_dir=args.definition_dir,
+        runtime_dir=args.runtime_dir,
+    )
+    measurements = BENCHMARKS[args.benchmark](options)
+    baselines: dict[int, float] = {}
+    for m in measurements:
+        # Speedups are relative to the first variant of the same size
+        baseline = baselines.setdefault(m.size, m.seconds)
+        per_item = 1e9 * m.seconds / m.size if m.size else 0.0
+        memory = '' if m.memory is None else f' {m.memory / 2**20:10.2f} MiB'
+        print(
+            f'{m.benchmark:<12} {m.variant:<24} size={m.size:<10} {m.seconds:10.4f}s {per_item:10.1f} ns/item'
+            f' {baseline / m.seconds:6.2f}x{memory}'
+        )
+
+    if args.history_file is not None:
+        commit = git_commit()
+        slower = regressions(read_history(args.history_file), measurements, commit, args.threshold)
+        append_history(args.history_file, measurements, commit)
+        for m, previous in slower:
+            print(
+                f'REGRESSION: {m.benchmark} {m.variant} size={m.size}: {previous:.4f}s -> {m.seconds:.4f}s'
+                f' ({m.seconds / previous - 1:+.0%})',
+                file=sys.stderr,
+            )
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+This library provides a persistent, content-addressed cache for converted Wasm modules.
+
+Entries are keyed by a hash of the module bytes, the pykwasm version and (for Kore) the kompiled definition,
+so a stale entry is never returned after an upgrade or a rebuild of the semantics.
+The cache is bounded in size, the least recently used entries are evicted first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pyk.kast.inner import KApply, KSequence, KToken, KVariable
+
+if TYPE_CHECKING:
+    from typing import Any, Final
+
+    from pyk.kast import KInner
+
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+CACHE_DIR_ENV: Final = 'KWASM_CACHE_DIR'
+CACHE_SIZE_ENV: Final = 'KWASM_CACHE_SIZE'
+
+
+def pykwasm_version() -> str:
+    try:
+        return version('pykwasm')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def definition_version(definition_dir: Path) -> str:
+    """Return a string identifying a particular build of a kompiled definition."""
+    for name in ('timestamp', 'definition.kore'):
+        file = definition_dir / name
+        if file.is_file():
+            stat = file.stat()
+            return f'{definition_dir.resolve()}:{stat.st_size}:{stat.st_mtime_ns}'
+    return str(definition_dir.resolve())
+
+
+class ModuleCache:
+    """On-disk cache of module conversion results with size-bounded LRU eviction.
+
+    Each entry is a single zlib-compressed file.
+    Recency is tracked through the modification time of the entry, which is refreshed on every hit.
+    """
+
+    DEFAULT_MAX_SIZE: Final = 1 << 30
+
+    cache_dir: Path
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, cache_dir: Path, *, max_size: int = DEFAULT_MAX_SIZE):
+        if max_size <= 0:
+            raise ValueError(f'Expected positive cache size, got: {max_size}')
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def from_env() -> ModuleCache | None:
+        """Return the cache configured through `KWASM_CACHE_DIR` and `KWASM_CACHE_SIZE`, or `None` if disabled."""
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+        max_size = int(os.environ.get(CACHE_SIZE_ENV, ModuleCache.DEFAULT_MAX_SIZE))
+        return ModuleCache(Path(cache_dir), max_size=max_size)
+
+    @staticmethod
+    def key(data: bytes, *parts: str) -> str:
+        """Return the cache key for `data` under the current pykwasm version and the additional `parts`."""
+        h = hashlib.sha256()
+        for part in (pykwasm_version(),) + parts:
+            h.update(part.encode())
+            h.update(b'\0')
+        h.update(data)
+        return h.hexdigest()
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.cache_dir / kind / key[:2] / key
+
+    def get(self, kind: str, key: str) -> bytes | None:
+        path = self._path(kind, key)
+        try:
+            data = zlib.decompress(path.read_bytes())
+        except (FileNotFoundError, zlib.error):
+            self.misses += 1
+            _LOGGER.debug(f'Cache miss: {kind}/{key}')
+            return None
+        os.utime(path)
+        self.hits += 1
+        _LOGGER.debug(f'Cache hit: {kind}/{key}')
+        return data
+
+    def put(self, kind: str, key: str, data: bytes) -> None:
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp_path.write_bytes(zlib.compress(data))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def get_kast(self, key: str) -> KInner | None:
+        data = self.get('kast', key)
+        if data is None:
+            return None
+        return kast_from_bytes(data)
+
+    def put_kast(self, key: str, term: KInner) -> None:
+        self.put('kast', key, kast_to_bytes(term))
+
+    def get_kore(self, key: str) -> str | None:
+        data = self.get('kore', key)
+        if data is None:
+            return None
+        return data.decode()
+
+    def put_kore(self, key: str, text: str) -> None:
+        self.put('kore', key, text.encode())
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = Path(root) / name
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits into `max_size`."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_size:
+            return
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            _LOGGER.debug(f'Evicted cache entry: {path}')
+            if total <= self.max_size:
+                break
+
+    def stats(self) -> dict[str, int]:
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size': sum(size for _, size, _ in entries),
+        }
+
+
+# The KAST encoding is a post-order listing of the nodes, where every string is replaced by an index into a string table.
+# It is built and read without recursion, hence it works for the deeply nested terms produced for large modules.
+
+_KTOKEN: Final = 0
+_KAPPLY: Final = 1
+_KSEQUENCE: Final = 2
+_KVARIABLE: Final = 3
+
+
+def kast_to_bytes(term: KInner) -> bytes:
+    strings: dict[str, int] = {}
+    code: list[int] = []
+
+    def string(s: str) -> int:
+        idx = strings.get(s)
+        if idx is None:
+            idx = len(strings)
+            strings[s] = idx
+        return idx
+
+    stack: list[tuple[KInner, bool]] = [(term, False)]
+    while stack:
+        term, expanded = stack.pop()
+        if type(term) is KToken:
+            code += (_KTOKEN, string(term.token), string(term.sort.name))
+        elif type(term) is KVariable:
+            code += (_KVARIABLE, string(term.name), -1 if term.sort is None else string(term.sort.name))
+        elif type(term) is KApply:
+            if expanded:
+                code += (_KAPPLY, string(term.label.name), term.arity)
+            else:
+                if term.label.params:
+                    raise ValueError(f'Parametric labels are not supported: {term.label}')
+                stack.append((term, True))
+                stack.extend((arg, False) for arg in reversed(term.args))
+        elif type(term) is KSequence:
+            if expanded:
+                code += (_KSEQUENCE, term.arity)
+            else:
+                stack.append((term, True))
+                stack.extend((item, False) for item in reversed(term.items))
+        else:
+            raise ValueError(f'Unsupported term: {term}')
+
+    dct: dict[str, Any] = {'strings': list(strings), 'code': code}
+    return json.dumps(dct, separators=(',', ':')).encode()
+
+
+def kast_from_bytes(data: bytes) -> KInner:
+    dct = json.loads(data)
+    strings: list[str] = dct['strings']
+    code: list[int] = dct['code']
+
+    stack: list[KInner] = []
+    i = 0
+    while i < len(code):
+        tag = code[i]
+        if tag == _KTOKEN:
+            stack.append(KToken(strings[code[i + 1]], strings[code[i + 2]]))
+            i += 3
+        elif tag == _KVARIABLE:
+            sort_idx = code[i + 2]
+            stack.append(KVariable(strings[code[i + 1]], None if sort_idx < 0 else strings[sort_idx]))
+            i += 3
+        elif tag == _KAPPLY:
+            arity = code[i + 2]
+            args = stack[len(stack) - arity :]
+            del stack[len(stack) - arity :]
+            stack.append(KApply(strings[code[i + 1]], args))
+            i += 3
+        elif tag == _KSEQUENCE:
+            arity = code[i + 1]
+            items = stack[len(stack) - arity :]
+            del stack[len(stack) - arity :]
+            stack.append(KSequence(items))
+            i += 2
+        else:
+            raise ValueError(f'Invalid KAST encoding, unknown tag: {tag}')
+
+    if len(stack) != 1:
+        raise ValueError(f'Invalid KAST encoding, expected a single term, found: {len(stack)}')
+    return stack[0]
@@ -0,0 +1,121 @@
+"""
+This library provides a reusable, Kore-encoded initial configuration.
+
+The static part of the configuration is converted to Kore once.
+A module and the cell substitutions are then spliced in at the Kore level,
+so the cost of building a configuration does not depend on the size of the module.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pyk.kast.inner import KApply, KLabel, KSequence, KSort, KVariable, Subst
+from pyk.kast.manip import cell_label_to_var_name, split_config_from
+from pyk.kore.syntax import App, SortApp
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from typing import Final
+
+    from pyk.kast import KInner
+    from pyk.kore.syntax import Pattern
+    from pyk.ktool.krun import KRun
+
+
+TOP_SORT: Final = KSort('GeneratedTopCell')
+MODULE_SORT: Final = KSort('ModuleDecl')
+ULM_KEYS: Final = frozenset({'GAS_CELL', 'ENTRY_CELL', 'CREATE_CELL'})
+
+K_CELL: Final = 'K_CELL'
+K_CELL_LABEL: Final = '<k>'
+
+
+class ConfigTemplate:
+    """The initial configuration of a definition, with `<k>` and any leaf cell replaceable at the Kore level."""
+
+    runner: KRun
+    cell_labels: dict[str, str]
+    _template: Pattern
+    _k_symbol: str
+    _cells: dict[tuple[str, KInner], App]
+
+    def __init__(self, runner: KRun):
+        self.runner = runner
+        self._cells = {}
+        config_kast = runner.definition.init_config(TOP_SORT)
+        symbolic_config, init_subst = split_config_from(config_kast)
+        self.cell_labels = _cell_labels(symbolic_config)
+
+        # Cells without a substitution keep their default, configuration variables are kept as variables
+        init_subst[K_CELL] = KSequence()
+        self._template = runner.kast_to_kore(Subst(init_subst)(symbolic_config), TOP_SORT)
+        self._k_symbol = self._convert_cell(K_CELL, KSequence()).symbol
+
+    @property
+    def cell_vars(self) -> frozenset[str]:
+        return frozenset(self.cell_labels)
+
+    def instantiate(
+        self, module: Pattern, config_subst: Mapping[str, KInner], module_sort: KSort = MODULE_SORT
+    ) -> Pattern:
+        """Return the configuration with `module` in `<k>` and the cells named in `config_subst` replaced.
+
+        The module must already be converted to Kore, with sort `module_sort`.
+        The keys of `config_subst` are cell variable names as generated by `split_config_from`, e.g. `GAS_CELL`.
+        """
+        if ULM_KEYS.issubset(self.cell_labels) and not ULM_KEYS.issubset(config_subst):
+            raise ValueError(
+                f'ULM Wasm detected but required substition keys for these cells are missing: {ULM_KEYS - config_subst.keys()}'
+            )
+        if K_CELL in config_subst:
+            raise ValueError("substitution may not contain a 'k' key")
+
+        k_item = App('inj', [SortApp('Sort' + module_sort.name), SortApp('SortKItem')], [module])
+        k_cell = App(self._k_symbol, (), [App('kseq', (), [k_item, App('dotk')])])
+
+        cells = {self._k_symbol: k_cell}
+        for key, value in config_subst.items():
+            cell = self.cell(key, value)
+            cells[cell.symbol] = cell
+
+        return _replace_apps(self._template, cells)
+
+    def cell(self, key: str, value: KInner) -> App:
+        """Return the Kore of cell `key` holding `value`, converting each distinct cell only once."""
+        cell = self._cells.get((key, value))
+        if cell is None:
+            cell = self._convert_cell(key, value)
+            self._cells[key, value] = cell
+        return cell
+
+    def _convert_cell(self, key: str, value: KInner) -> App:
+        if key not in self.cell_labels:
+            raise ValueError(f'Unknown configuration cell: {key}')
+        label = self.cell_labels[key]
+        cell_sort, _ = self.runner.definition.resolve_sorts(KLabel(label))
+        cell = self.runner.kast_to_kore(KApply(label, [value]), cell_sort)
+        assert type(cell) is App
+        return cell
+
+
+def _cell_labels(symbolic_config: KInner) -> dict[str, str]:
+    res: dict[str, str] = {}
+    stack = [symbolic_config]
+    while stack:
+        term = stack.pop()
+        if type(term) is KApply:
+            if term.is_cell and term.arity == 1 and type(term.args[0]) is KVariable:
+                res[cell_label_to_var_name(term.label.name)] = term.label.name
+            stack.extend(term.args)
+    assert res.get(K_CELL) == K_CELL_LABEL
+    return res
+
+
+def _replace_apps(pattern: Pattern, apps: Mapping[str, App]) -> Pattern:
+    """Replace each application of a symbol in `apps` by its value, without descending into the replacements."""
+    if type(pattern) is App:
+        if pattern.symbol in apps:
+            return apps[pattern.symbol]
+        return pattern.let(args=[_replace_apps(arg, apps) for arg in pattern.args])
+    return pattern
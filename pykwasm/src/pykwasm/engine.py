@@ -0,0 +1,43 @@
+"""
+This library provides the execution engines that run a Kore configuration on a kompiled LLVM definition.
+
+`SubprocessEngine` starts the `interpreter` binary of the definition for each run, see `pykwasm.interpreter`.
+`InProcessEngine` loads the definition as a Python extension, built by `llvm-kompile ... python`, e.g. the kdist target
+`wasm-semantics.llvm-runtime`, and runs configurations in the Python process: there is no process startup, and the
+input is handed to the backend as a term rather than through a pipe or a file. It is defined in `pykwasm.in_process`,
+which needs the LLVM backend to be imported.
+
+Both return the final configuration as Kore text in a `CompletedProcess`, so that they can be used interchangeably.
+
+    engine = InProcessEngine(kdist.get('wasm-semantics.llvm-runtime'))
+    proc_res = engine.run(config_kore)
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .interpreter import run_interpreter
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from subprocess import CompletedProcess
+    from typing import Final
+
+    from pyk.kore.syntax import Pattern
+
+
+class SubprocessEngine:
+    """Runs configurations with the `interpreter` binary of an LLVM definition."""
+
+    NAME: Final = 'subprocess'
+
+    definition_dir: Path
+    binary: bool
+
+    def __init__(self, definition_dir: Path, *, binary: bool = False):
+        self.definition_dir = definition_dir
+        self.binary = binary
+
+    def run(self, pattern: Pattern | str, *, depth: int | None = None) -> CompletedProcess:
+        return run_interpreter(self.definition_dir, pattern, depth=depth, binary=self.binary)
@@ -0,0 +1,69 @@
+"""
+This library runs Kore configurations with an LLVM definition loaded into the Python process, see `pykwasm.engine`.
+
+Importing it builds and loads the Kore AST bindings of the LLVM backend for this process, which takes a few seconds and
+needs `llvm-kompile`, so it is only imported when a configuration is to be run in process.
+"""
+
+from __future__ import annotations
+
+import logging
+from subprocess import CompletedProcess
+from typing import TYPE_CHECKING
+
+# Builds and loads the `_kllvm` bindings, which the runtime, the parser and the conversion depend on
+import pyk.kllvm.load  # noqa: F401
+from pyk.kllvm.compiler import RUNTIME_MODULE_FILE_NAME, RUNTIME_MODULE_NAME
+from pyk.kllvm.convert import pattern_to_llvm
+from pyk.kllvm.importer import import_from_file, rtld_local
+from pyk.kllvm.parser import parse_pattern
+from pyk.kllvm.runtime import Runtime
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from types import ModuleType
+    from typing import Final
+
+    from pyk.kllvm.runtime import Term
+    from pyk.kore.syntax import Pattern
+
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+
+class InProcessEngine:
+    """Runs configurations with an LLVM definition loaded into the Python process.
+
+    `runtime_dir` holds the Python extension of the definition. An engine is meant to be created once and reused.
+    A configuration given as a pattern is converted to a term of the backend directly, Kore text is parsed by the
+    backend. A run that fails in the backend is reported with return code 1 and the error on `stderr`.
+    """
+
+    NAME: Final = 'in-process'
+
+    runtime_dir: Path
+    _module: ModuleType
+    _runtime: Runtime
+
+    def __init__(self, runtime_dir: Path):
+        self.runtime_dir = runtime_dir
+        with rtld_local():
+            self._module = import_from_file(RUNTIME_MODULE_NAME, runtime_dir / RUNTIME_MODULE_FILE_NAME)
+        self._runtime = Runtime(self._module)
+
+    def run(self, pattern: Pattern | str, *, depth: int | None = None) -> CompletedProcess:
+        args = ['in-process', str(self.runtime_dir), str(depth if depth is not None else -1)]
+        term: Term | None = None
+        try:
+            llvm_pattern = parse_pattern(pattern) if isinstance(pattern, str) else pattern_to_llvm(pattern)
+            term = self._runtime.term(llvm_pattern)
+            term.step(depth=depth)
+            stdout = str(term) + '\n'
+        except Exception as err:
+            _LOGGER.debug(f'In-process run failed: {err}')
+            return CompletedProcess(args, 1, '', f'{type(err).__name__}: {err}\n')
+        finally:
+            # The terms of a run are allocated by the garbage collector of the backend, which only frees them on request
+            term = None
+            self._module.free_all_gc_memory()
+        return CompletedProcess(args, 0, stdout, '')
@@ -0,0 +1,137 @@
+"""
+This library runs the interpreter of a kompiled LLVM definition on a Kore pattern, without materializing its text.
+
+The interpreter is started first, then the pattern is serialized straight into its standard input.
+Startup of the interpreter overlaps with serialization, and neither a temporary file
+nor a string holding the whole input is needed, however large the module.
+
+Alternatively, the pattern is passed in the binary Kore format of the LLVM backend, which is smaller and faster for
+the interpreter to parse. The interpreter checks the header of its input file before reading it, so the binary input
+goes through a temporary file rather than a pipe.
+"""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+from contextlib import suppress
+from subprocess import DEVNULL, PIPE, CompletedProcess
+from tempfile import NamedTemporaryFile
+from threading import Thread
+from typing import TYPE_CHECKING
+
+from pyk.cli.utils import check_file_path
+
+from .kore_binary import write_binary_pattern
+from .kore_writer import write_pattern
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import IO, Final
+
+    from pyk.kore.syntax import Pattern
+
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+
+def run_interpreter(
+    definition_dir: Path,
+    pattern: Pattern | str,
+    *,
+    depth: int | None = None,
+    tee: IO[str] | None = None,
+    binary: bool = False,
+) -> CompletedProcess:
+    """Run the `interpreter` binary of an LLVM definition on `pattern`, and return its output.
+
+    The pattern may also be given as Kore text, which is passed on as is.
+    If `tee` is given, the Kore input of the interpreter is also written to it as text, e.g. for debugging.
+    If `binary` is set, the input is passed in the binary Kore format.
+    """
+    interpreter_file = definition_dir / 'interpreter'
+    check_file_path(interpreter_file)
+    if binary:
+        if isinstance(pattern, str):
+            raise ValueError('Binary Kore input needs a pattern, not text')
+        if tee is not None:
+            write_pattern(pattern, tee)
+        with NamedTemporaryFile(suffix='.kore') as input_file:
+            write_binary_pattern(pattern, input_file)
+            input_file.flush()
+            args = [str(interpreter_file), input_file.name, str(depth if depth is not None else -1), '/dev/stdout']
+            _LOGGER.info(f'Running: {" ".join(args)}')
+            return subprocess.run(args, stdin=DEVNULL, capture_output=True, text=True)
+
+    args = [str(interpreter_file), '/dev/stdin', str(depth if depth is not None else -1), '/dev/stdout']
+    _LOGGER.info(f'Running: {" ".join(args)}')
+
+    with subprocess.Popen(args, stdin=PIPE, stdout=PIPE, stderr=PIPE, text=True) as proc:
+        assert proc.stdin is not None and proc.stdout is not None and proc.stderr is not None
+        stdout = PipeReader(proc.stdout)
+        stderr = PipeReader(proc.stderr)
+
+        try:
+            output = proc.stdin if tee is None else _Tee(proc.stdin, tee)
+            if isinstance(pattern, str):
+                output.write(pattern)
+            else:
+                write_pattern(pattern, output)
+            proc.stdin.close()
+        except BrokenPipeError:
+            # The interpreter exited before reading all of its input, its return code and stderr tell why
+            _LOGGER.debug('Interpreter closed its input early')
+            with suppress(BrokenPipeError):
+                proc.stdin.close()
+
+        returncode = proc.wait()
+        return CompletedProcess(args, returncode, stdout.result(), stderr.result())
+
+
+def count_steps(definition_dir: Path, pattern: Pattern | str, final: str) -> int:
+    """Return the number of rewrite steps from `pattern` to the configuration `final`, the output of a full run.
+
+    The steps are found by bisection on the depth of the run, which runs the interpreter a logarithmic number of times.
+    """
+    # Find the least depth at which the run is already stuck
+    low, high = 0, 1
+    while run_interpreter(definition_dir, pattern, depth=high).stdout != final:
+        low, high = high, 2 * high
+    while high - low > 1:
+        mid = (low + high) // 2
+        if run_interpreter(definition_dir, pattern, depth=mid).stdout == final:
+            high = mid
+        else:
+            low = mid
+    return high
+
+
+class PipeReader(Thread):
+    """Drains a pipe in the background, so that a process, e.g. the interpreter, never blocks on a full output pipe."""
+
+    _pipe: IO[str]
+    _text: str
+
+    def __init__(self, pipe: IO[str]):
+        super().__init__(daemon=True)
+        self._pipe = pipe
+        self._text = ''
+        self.start()
+
+    def run(self) -> None:
+        self._text = self._pipe.read()
+
+    def result(self) -> str:
+        self.join()
+        return self._text
+
+
+class _Tee:
+    _outputs: tuple[IO[str], ...]
+
+    def __init__(self, *outputs: IO[str]):
+        self._outputs = outputs
+
+    def write(self, s: str) -> None:
+        for output in self._outputs:
+            output.write(s)
@@ -9,15 +9,23 @@ from pyk.kdist.api import Target
 from pyk.ktool.kompile import PykBackend, kompile
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Mapping
+    from collections.abc import Callable, Iterable, Mapping
     from typing import Any, Final
 
 
 class SourceTarget(Target):
     SRC_DIR: Final = Path(__file__).parent
 
+    _replace: Mapping[str, str]
+
+    def __init__(self, replace: Mapping[str, str] | None = None):
+        """`replace` maps files of the semantics to the files that take their place, e.g. another memory backend."""
+        self._replace = replace or {}
+
     def build(self, output_dir: Path, deps: dict[str, Path], args: dict[str, Any], verbose: bool) -> None:
         shutil.copytree(self.SRC_DIR / 'wasm-semantics', output_dir / 'wasm-semantics')
+        for file, replacement in self._replace.items():
+            shutil.copyfile(output_dir / 'wasm-semantics' / replacement, output_dir / 'wasm-semantics' / file)
 
     def source(self) -> tuple[Path, ...]:
         return (self.SRC_DIR,)
@@ -25,14 +33,16 @@ class SourceTarget(Target):
 
 class KompileTarget(Target):
     _kompile_args: Callable[[Path], Mapping[str, Any]]
+    _source: str
 
-    def __init__(self, kompile_args: Callable[[Path], Mapping[str, Any]]):
+    def __init__(self, kompile_args: Callable[[Path], Mapping[str, Any]], *, source: str = 'source'):
         self._kompile_args = kompile_args
+        self._source = source
 
     def build(self, output_dir: Path, deps: dict[str, Path], args: dict[str, Any], verbose: bool) -> None:
         llvm_proof_hint_debugging = bool(args.get('llvm-proof-hint-debugging', ''))
         llvm_proof_hint_instrumentation = bool(args.get('llvm-proof-hint-instrumentation', ''))
-        kompile_args = self._kompile_args(deps['wasm-semantics.source'])
+        kompile_args = self._kompile_args(deps[f'wasm-semantics.{self._source}'])
         if kompile_args['backend'] == PykBackend.LLVM:
             kompile(
                 output_dir=output_dir,
@@ -52,10 +62,50 @@ class KompileTarget(Target):
         return {'k-version': k_version().text}
 
     def deps(self) -> tuple[str]:
-        return ('wasm-semantics.source',)
+        return (f'wasm-semantics.{self._source}',)
 
 
-def ulm_wasm_args(src_dir: Path, ulm_test: bool = False) -> dict[str, Any]:
+class RuntimeTarget(Target):
+    """The Python extension of a kompiled LLVM definition, for `pykwasm.in_process.InProcessEngine`.
+
+    `ccopts` are passed to the C++ compiler, they must link the libraries of the hooks of the definition.
+    """
+
+    _definition: str
+    _ccopts: tuple[str, ...]
+
+    def __init__(self, definition: str, *, ccopts: Iterable[str] = ()):
+        self._definition = definition
+        self._ccopts = tuple(ccopts)
+
+    def build(self, output_dir: Path, deps: dict[str, Path], args: dict[str, Any], verbose: bool) -> None:
+        # Imported here, as importing the LLVM backend is only needed for this target
+        from pyk.kllvm.compiler import compile_runtime
+
+        compile_runtime(deps[f'wasm-semantics.{self._definition}'], output_dir, ccopts=self._ccopts, verbose=verbose)
+
+    def context(self) -> dict[str, str]:
+        return {'k-version': k_version().text}
+
+    def deps(self) -> tuple[str]:
+        return (f'wasm-semantics.{self._definition}',)
+
+
+def llvm_args(src_dir: Path) -> dict[str, Any]:
+    return {
+        'backend': PykBackend.LLVM,
+        'main_file': src_dir / 'wasm-semantics/test.md',
+        'main_module': 'WASM-TEST',
+        'syntax_module': 'WASM-TEST-SYNTAX',
+        'md_selector': 'k',
+        'warnings_to_errors': True,
+        'gen_glr_bison_parser': True,
+        'opt_level': 3,
+        'ccopts': ['-g'],
+    }
+
+
+def ulm_wasm_ccopts(ulm_test: bool = False) -> list[str]:
     build_dir = Path(__file__).parent.parent.parent.parent.parent / 'build'
     ulm_lib_ccopts = []
     if not ulm_test:
@@ -66,10 +116,8 @@ def ulm_wasm_args(src_dir: Path, ulm_test: bool = False) -> dict[str, Any]:
             '-fPIC',
             str(build_dir / 'deps' / 'ulm' / 'kllvm' / 'lang' / 'ulm_language_entry.cpp'),
         ]
-    return {
-        'backend': PykBackend.LLVM,
-        'hook_namespaces': ['KRYPTO'] + ([] if ulm_test else ['ULM']),
-        'ccopts': [
+    return (
+        [
             '-g',
             '-std=c++20',
             '-lcrypto',
@@ -81,7 +129,16 @@ def ulm_wasm_args(src_dir: Path, ulm_test: bool = False) -> dict[str, Any]:
         + [
             '-I' + str(build_dir / 'deps' / 'ulm' / 'kllvm'),
             '-DULM_LANG_ID=wasm',
-        ],
+        ]
+    )
+
+
+def ulm_wasm_args(src_dir: Path, ulm_test: bool = False) -> dict[str, Any]:
+    build_dir = Path(__file__).parent.parent.parent.parent.parent / 'build'
+    return {
+        'backend': PykBackend.LLVM,
+        'hook_namespaces': ['KRYPTO'] + ([] if ulm_test else ['ULM']),
+        'ccopts': ulm_wasm_ccopts(ulm_test),
         'llvm_hidden_visibility': True,
         'llvm_kompile_type': 'main' if ulm_test else 'library',
         'llvm_kompile_output': 'interpreter' if ulm_test else 'libkwasm.so',
@@ -98,19 +155,11 @@ def ulm_wasm_args(src_dir: Path, ulm_test: bool = False) -> dict[str, Any]:
 
 __TARGETS__: Final = {
     'source': SourceTarget(),
-    'llvm': KompileTarget(
-        lambda src_dir: {
-            'backend': PykBackend.LLVM,
-            'main_file': src_dir / 'wasm-semantics/test.md',
-            'main_module': 'WASM-TEST',
-            'syntax_module': 'WASM-TEST-SYNTAX',
-            'md_selector': 'k',
-            'warnings_to_errors': True,
-            'gen_glr_bison_parser': True,
-            'opt_level': 3,
-            'ccopts': ['-g'],
-        },
-    ),
+    # Linear memory as a map of pages rather than a list of chunks, for the concrete backend
+    'source-paged': SourceTarget({'data/sparse-bytes.k': 'data/paged-bytes.k'}),
+    'llvm': KompileTarget(llvm_args),
+    'llvm-paged': KompileTarget(llvm_args, source='source-paged'),
+    'llvm-runtime': RuntimeTarget('llvm'),
     'kwasm-lemmas': KompileTarget(
         lambda src_dir: {
             'backend': PykBackend.HASKELL,
@@ -137,6 +186,15 @@ __TARGETS__: Final = {
     'ulm-wasm-test': KompileTarget(
         lambda src_dir: ulm_wasm_args(src_dir, ulm_test=True),
     ),
+    'ulm-wasm-test-runtime': RuntimeTarget('ulm-wasm-test', ccopts=ulm_wasm_ccopts(ulm_test=True)),
+    'ulm-wasm-paged': KompileTarget(
+        lambda src_dir: ulm_wasm_args(src_dir),
+        source='source-paged',
+    ),
+    'ulm-wasm-test-paged': KompileTarget(
+        lambda src_dir: ulm_wasm_args(src_dir, ulm_test=True),
+        source='source-paged',
+    ),
     'binary-parser-test': KompileTarget(
         lambda src_dir: {
             'backend': PykBackend.LLVM,
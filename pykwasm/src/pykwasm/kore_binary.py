@@ -0,0 +1,295 @@
+"""
+This library writes Kore patterns in the binary format of the K LLVM backend, and reads them back.
+
+The interpreter of an LLVM definition accepts a file in this format wherever it accepts textual Kore, and recognizes it
+by its header. The format is a program for a stack machine: the subterms of a term come first, in order, followed by
+its constructor, so it is written and read without recursion.
+
+Only the fragment of Kore used for configurations is supported: applications, domain values and string literals.
+Each string is written once, later occurrences refer back to it, which makes the output considerably smaller than text.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import TYPE_CHECKING
+
+from pyk.kore.syntax import DV, App, SortApp, SortVar, String
+
+if TYPE_CHECKING:
+    from typing import IO, Final
+
+    from pyk.kore.syntax import Pattern, Sort
+
+
+MAGIC: Final = b'\x7fKORE'
+VERSION: Final = (1, 2, 0)
+
+_HEADER: Final = MAGIC + struct.pack('<3h', *VERSION)
+_SIZE: Final = struct.Struct('<Q')
+
+_STRING: Final = 0x01
+_BACKREF: Final = 0x02
+_COMPOSITE_PATTERN: Final = 0x04
+_STRING_PATTERN: Final = 0x05
+_COMPOSITE_SORT: Final = 0x06
+_SORT_VARIABLE: Final = 0x07
+_SYMBOL: Final = 0x08
+
+
+def pattern_to_binary(pattern: Pattern) -> bytes:
+    """Return `pattern` in the binary Kore format, header included."""
+    body = BinaryKoreWriter().body(pattern)
+    return _HEADER + _SIZE.pack(len(body)) + body
+
+
+def write_binary_pattern(pattern: Pattern, output: IO[bytes]) -> None:
+    output.write(pattern_to_binary(pattern))
+
+
+# The encoding of a node that follows the encoding of its children: leading bytes, then strings to be interned, each
+# followed by bytes
+_Tail = tuple[bytes, tuple[tuple[str, bytes], ...]]
+
+
+class BinaryKoreWriter:
+    """Encodes patterns, reusing the encoding of the constructors of terms across calls."""
+
+    _tails: dict[tuple[str, tuple[Sort, ...], int], _Tail]
+    _dv_tails: dict[Sort, _Tail]
+
+    def __init__(self) -> None:
+        self._tails = {}
+        self._dv_tails = {}
+
+    def body(self, pattern: Pattern) -> bytes:
+        """Return the encoding of `pattern`, without the header."""
+        out = bytearray()
+        # Offset of the length of the first occurrence of each string in `out`
+        strings: dict[str, int] = {}
+
+        def emit_string(s: str) -> None:
+            offset = strings.get(s)
+            if offset is None:
+                data = _encode(s)
+                out.append(_STRING)
+                strings[s] = len(out)
+                out.extend(_varint(len(data)))
+                out.extend(data)
+            else:
+                out.append(_BACKREF)
+                out.extend(_backref(len(out) - offset))
+
+        stack: list[Pattern | _Tail] = [pattern]
+        while stack:
+            item = stack.pop()
+            if type(item) is tuple:
+                head, parts = item
+                out += head
+                for s, after in parts:
+                    # Most strings are back-references, inlined for speed
+                    offset = strings.get(s)
+                    if offset is None:
+                        emit_string(s)
+                    else:
+                        out.append(_BACKREF)
+                        out += _backref(len(out) - offset)
+                    out += after
+            elif type(item) is App:
+                args = item.args
+                stack.append(self._tail(item.symbol, item.sorts, len(args)))
+                stack.extend(reversed(args))
+            elif type(item) is DV:
+                out.append(_STRING_PATTERN)
+                emit_string(item.value.value)
+                stack.append(self._dv_tail(item.sort))
+            elif type(item) is String:
+                out.append(_STRING_PATTERN)
+                emit_string(item.value)
+            else:
+                raise ValueError(f'Unsupported pattern for binary Kore: {item}')
+        return bytes(out)
+
+    def _tail(self, symbol: str, sorts: tuple[Sort, ...], arity: int) -> _Tail:
+        """Return the encoding of the constructor of an application, which follows the encoding of its arguments."""
+        key = (symbol, sorts, arity)
+        tail = self._tails.get(key)
+        if tail is None:
+            tail = _tail((*_symbol(symbol, sorts), bytes([_COMPOSITE_PATTERN]) + _varint(arity)))
+            self._tails[key] = tail
+        return tail
+
+    def _dv_tail(self, sort: Sort) -> _Tail:
+        tail = self._dv_tails.get(sort)
+        if tail is None:
+            tail = _tail((*_symbol('\\dv', (sort,)), bytes([_COMPOSITE_PATTERN]) + _varint(1)))
+            self._dv_tails[sort] = tail
+        return tail
+
+
+def _symbol(name: str, sorts: tuple[Sort, ...]) -> tuple[bytes | str, ...]:
+    return (*(part for sort in sorts for part in _sort(sort)), bytes([_SYMBOL]) + _varint(len(sorts)), name)
+
+
+def _sort(sort: Sort) -> tuple[bytes | str, ...]:
+    # Sorts are shallow, recursion is fine here
+    if type(sort) is SortApp:
+        args = tuple(part for arg in sort.sorts for part in _sort(arg))
+        return (*args, bytes([_COMPOSITE_SORT]) + _varint(len(sort.sorts)), sort.name)
+    if type(sort) is SortVar:
+        return (bytes([_SORT_VARIABLE]), sort.name)
+    raise ValueError(f'Unsupported sort: {sort}')
+
+
+def _tail(parts: tuple[bytes | str, ...]) -> _Tail:
+    """Group `parts` into the leading bytes and each string with the bytes following it."""
+    head = b''
+    strings: list[tuple[str, bytes]] = []
+    for part in parts:
+        if isinstance(part, str):
+            strings.append((part, b''))
+        elif strings:
+            s, after = strings[-1]
+            strings[-1] = (s, after + part)
+        else:
+            head += part
+    return head, tuple(strings)
+
+
+def _encode(s: str) -> bytes:
+    """Return the bytes the LLVM backend reads for the string literal `s`.
+
+    The escape `\\xHH` of textual Kore stands for a single byte, other code points for their UTF-8 encoding.
+    """
+    try:
+        return s.encode('latin-1')
+    except UnicodeEncodeError:
+        return b''.join(bytes([ord(c)]) if ord(c) < 0x100 else c.encode('utf-8') for c in s)
+
+
+def _varint(n: int) -> bytes:
+    """Return `n` in 7-bit groups, least significant first, with the high bit set on all but the last byte."""
+    if n < 0x80:
+        return _SMALL_VARINTS[n]
+    res = bytearray()
+    while n >= 0x80:
+        res.append(n & 0x7F | 0x80)
+        n >>= 7
+    res.append(n)
+    return bytes(res)
+
+
+_SMALL_VARINTS: Final = [bytes([n]) for n in range(0x80)]
+
+
+def _backref(distance: int) -> bytes:
+    """Return the back-reference to a string whose length is `distance` bytes before the back-reference.
+
+    The reader counts the distance from the end of the back-reference, so the back-reference includes its own length.
+    """
+    if distance < 0x7F:
+        return _SMALL_VARINTS[distance + 1]
+    if distance < 0x3FFE:
+        n = distance + 2
+        return bytes((n & 0x7F | 0x80, n >> 7))
+    if distance < 0x1FFFFD:
+        n = distance + 3
+        return bytes((n & 0x7F | 0x80, n >> 7 & 0x7F | 0x80, n >> 14))
+    if distance < 0xFFFFFFC:
+        n = distance + 4
+        return bytes((n & 0x7F | 0x80, n >> 7 & 0x7F | 0x80, n >> 14 & 0x7F | 0x80, n >> 21))
+    length = 5
+    while distance + length >= 1 << (7 * length):
+        length += 1
+    return _varint(distance + length)
+
+
+##########
+# Reader #
+##########
+
+
+def binary_to_pattern(data: bytes) -> Pattern:
+    """Read a pattern written by `pattern_to_binary`.
+
+    String literals are decoded as Latin-1, so strings with code points beyond `U+00FF` do not round-trip.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError('Expected binary Kore header')
+    version = struct.unpack_from('<3h', data, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f'Unsupported binary Kore version: {version}')
+    pos = len(_HEADER)
+    (size,) = _SIZE.unpack_from(data, pos)
+    pos += _SIZE.size
+    end = pos + size
+    if end > len(data):
+        raise ValueError(f'Expected {size} bytes of binary Kore, got: {len(data) - pos}')
+
+    stack: list = []
+    while pos < end:
+        tag = data[pos]
+        pos += 1
+        if tag == _STRING_PATTERN:
+            value, pos = _read_string(data, pos)
+            stack.append(String(value))
+        elif tag == _COMPOSITE_SORT:
+            arity, pos = _read_varint(data, pos)
+            name, pos = _read_string(data, pos)
+            sorts = _pop(stack, arity)
+            stack.append(SortApp(name, sorts))
+        elif tag == _SORT_VARIABLE:
+            name, pos = _read_string(data, pos)
+            stack.append(SortVar(name))
+        elif tag == _SYMBOL:
+            arity, pos = _read_varint(data, pos)
+            name, pos = _read_string(data, pos)
+            stack.append((name, _pop(stack, arity)))
+        elif tag == _COMPOSITE_PATTERN:
+            arity, pos = _read_varint(data, pos)
+            name, sorts = stack.pop()
+            args = _pop(stack, arity)
+            if name == '\\dv':
+                (sort,) = sorts
+                (value,) = args
+                stack.append(DV(sort, value))
+            else:
+                stack.append(App(name, sorts, args))
+        else:
+            raise ValueError(f'Unsupported binary Kore tag at byte {pos - 1}: {tag:#04x}')
+
+    if len(stack) != 1:
+        raise ValueError(f'Expected a single pattern, got: {len(stack)}')
+    return stack[0]
+
+
+def _pop(stack: list, n: int) -> tuple:
+    if not n:
+        return ()
+    res = tuple(stack[-n:])
+    del stack[-n:]
+    return res
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    res = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        res |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return res, pos
+        shift += 7
+
+
+def _read_string(data: bytes, pos: int) -> tuple[str, int]:
+    tag = data[pos]
+    if tag == _STRING:
+        length, pos = _read_varint(data, pos + 1)
+        return data[pos : pos + length].decode('latin-1'), pos + length
+    if tag == _BACKREF:
+        distance, pos = _read_varint(data, pos + 1)
+        length, start = _read_varint(data, pos - distance)
+        return data[start : start + length].decode('latin-1'), pos
+    raise ValueError(f'Expected a string at byte {pos}, got: {tag:#04x}')
@@ -0,0 +1,79 @@
+"""
+This library finds and replaces applications of given symbols in Kore text, without parsing it.
+
+The output of the interpreter is the whole final configuration, e.g. all of linear memory and every function body.
+To get at a few cells, or to replace them, the text is scanned for the applications of their symbols. Only the
+parentheses and string literals of the text are looked at, so no term is built, and the scan is not limited by the
+depth of the configuration.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from typing import Final
+
+
+# The loop is unrolled, so that long literals, e.g. of memory, are matched a run of characters at a time
+STRING: Final = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+_TOKENS: Final = re.compile(STRING + r'|[()]')
+
+
+def find_apps(kore: str, symbols: Iterable[str]) -> dict[str, str]:
+    """Return the text of the first application of each of `symbols` in `kore`, for those that occur."""
+    symbols = set(symbols)
+    if not symbols:
+        return {}
+    res: dict[str, str] = {}
+    for symbol, start, end in _apps(kore, symbols):
+        if symbol not in res:
+            res[symbol] = kore[start:end]
+            if len(res) == len(symbols):
+                break
+    return res
+
+
+def replace_apps(kore: str, apps: Mapping[str, str]) -> str:
+    """Replace each application of a symbol of `apps` in `kore` by its value."""
+    if not apps:
+        return kore
+    res = []
+    pos = 0
+    for symbol, start, end in _apps(kore, apps):
+        res.append(kore[pos:start])
+        res.append(apps[symbol])
+        pos = end
+    res.append(kore[pos:])
+    return ''.join(res)
+
+
+def skip_args(kore: str, pos: int) -> int:
+    """Return the position after the closing parenthesis of the arguments starting at `pos`."""
+    depth = 1
+    while depth:
+        match = _TOKENS.search(kore, pos)
+        if match is None:
+            raise ValueError(f'Unbalanced parentheses in Kore text at: {pos}')
+        if match.group() == '(':
+            depth += 1
+        elif match.group() == ')':
+            depth -= 1
+        pos = match.end()
+    return pos
+
+
+def _apps(kore: str, symbols: Iterable[str]) -> Iterable[tuple[str, int, int]]:
+    """Yield the symbol, start and end of each outermost application of `symbols` in `kore`, from left to right."""
+    # String literals are matched too, so that their content is skipped
+    pattern = re.compile(STRING + '|' + '|'.join(re.escape(symbol) + r'\{\}\(' for symbol in symbols))
+    pos = 0
+    while match := pattern.search(kore, pos):
+        if match.group()[0] == '"':
+            pos = match.end()
+            continue
+        pos = skip_args(kore, match.end())
+        yield match.group()[:-3], match.start(), pos
@@ -0,0 +1,254 @@
+"""
+This library provides writers for Kore patterns that are too deep for the recursive writer of pyk.
+
+`KoreWriter` is the fast path: it renders the compact format without recursion, collects the output into large chunks,
+renders small subterms in one go and reuses the text of constants and symbol heads.
+`pattern_write` is the original writer, it is still used for pretty printing.
+"""
+
+from __future__ import annotations
+
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from pyk.dequote import enquote_string
+from pyk.kore.syntax import DV, App, Assoc, MLPattern, SortApp, String
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import IO, Any, Final
+
+    from _typeshed import SupportsWrite
+    from pyk.kore.syntax import Pattern, Sort
+
+
+DEFAULT_CHUNK_SIZE: Final = 1 << 14
+LARGE_LEAF_SIZE: Final = 1 << 16
+
+
+class KoreWriter:
+    """Writes Kore patterns to `output` in the same compact format as `pattern_write(..., pretty=False)`.
+
+    Output is only passed to `output` in chunks of `chunk_size` fragments,
+    so it can be a pipe to a process, e.g. the interpreter, without much system call overhead.
+    Call `flush` after the last pattern.
+    """
+
+    output: SupportsWrite[str]
+    chunk_size: int
+    _chunks: list[str]
+    _constants: dict[str, str]
+    _heads: dict[tuple[str, tuple[Sort, ...]], str]
+
+    def __init__(self, output: SupportsWrite[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size <= 0:
+            raise ValueError(f'Expected positive chunk size, got: {chunk_size}')
+        self.output = output
+        self.chunk_size = chunk_size
+        self._chunks = []
+        self._constants = {}
+        self._heads = {}
+
+    def write(self, pattern: Pattern) -> None:
+        chunks = self._chunks
+        stack: list[Pattern | str] = [pattern]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                chunks.append(item)
+            elif type(item) is App:
+                args = item.args
+                for arg in args:
+                    if type(arg) is not DV and (type(arg) is not App or arg.args):
+                        chunks.append(self._head(item.symbol, item.sorts))
+                        _push_args(stack, args)
+                        break
+                else:
+                    # Applications to constants and domain values are rendered in one go
+                    chunks.append(self._head(item.symbol, item.sorts) + ','.join(map(self._leaf, args)) + ')')
+            elif type(item) is DV:
+                text = self._leaf(item)
+                if len(text) < LARGE_LEAF_SIZE:
+                    chunks.append(text)
+                else:
+                    # Large values, e.g. data segments, are not copied into a chunk
+                    self.flush()
+                    self.output.write(text)
+            elif isinstance(item, Assoc):
+                chunks.append(item.kore_symbol() + '{}(')
+                stack.append(')')
+                stack.append(item.app)
+            elif isinstance(item, MLPattern):
+                chunks.append(self._head(item.symbol(), item.sorts))
+                _push_args(stack, item.ctor_patterns)
+            else:
+                chunks.append(_leaf_text(item))
+
+            if len(chunks) >= self.chunk_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if self._chunks:
+            self.output.write(''.join(self._chunks))
+            self._chunks.clear()
+
+    def _leaf(self, pattern: Pattern) -> str:
+        if type(pattern) is DV:
+            return self._head('\\dv', pattern.sorts) + _string_text(pattern.value) + ')'
+        assert type(pattern) is App and not pattern.args
+        if pattern.sorts:
+            return self._head(pattern.symbol, pattern.sorts) + ')'
+        # Constants such as `i32` or `.List{"listStmt"}` are rendered once per symbol
+        text = self._constants.get(pattern.symbol)
+        if text is None:
+            text = pattern.symbol + '{}()'
+            self._constants[pattern.symbol] = text
+        return text
+
+    def _head(self, symbol: str, sorts: tuple[Sort, ...]) -> str:
+        """Return the text up to and including the opening parenthesis of the arguments."""
+        if not sorts:
+            return symbol + '{}('
+        key = (symbol, sorts)
+        head = self._heads.get(key)
+        if head is None:
+            head = symbol + '{' + _sorts_text(sorts) + '}('
+            self._heads[key] = head
+        return head
+
+
+def write_pattern(pattern: Pattern, output: SupportsWrite[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    writer = KoreWriter(output, chunk_size=chunk_size)
+    writer.write(pattern)
+    writer.flush()
+
+
+def _push_args(stack: list[Pattern | str], args: tuple[Pattern, ...]) -> None:
+    stack.append(')')
+    for i in range(len(args) - 1, 0, -1):
+        stack.append(args[i])
+        stack.append(',')
+    if args:
+        stack.append(args[0])
+
+
+def _sorts_text(sorts: Iterable[Sort]) -> str:
+    return ','.join(
+        sort.name + '{' + _sorts_text(sort.sorts) + '}' if type(sort) is SortApp else sort.text for sort in sorts
+    )
+
+
+def _leaf_text(pattern: Pattern) -> str:
+    if type(pattern) is String:
+        return _string_text(pattern)
+    return pattern.text
+
+
+class _EnquoteTable(dict[int, str]):
+    """Translation table for `str.translate` that fills itself with the escapes of `pyk.dequote.enquoted`."""
+
+    def __missing__(self, code: int) -> str:
+        escaped = enquote_string(chr(code))
+        self[code] = escaped
+        return escaped
+
+
+_ENQUOTE_TABLE: Final = _EnquoteTable()
+
+
+def _string_text(string: String) -> str:
+    value = string.value
+    if not (value.isascii() and value.isprintable() and '"' not in value and '\\' not in value):
+        value = value.translate(_ENQUOTE_TABLE)
+    return '"' + value + '"'
+
+
+class DepthChange(Enum):
+    UP = 1
+    DOWN = -1
+    PRINT = 0
+
+
+def pattern_write(pat: Pattern, output: IO[str], pretty: bool = True) -> None:
+    """Serialize pattern to kore; used for monkey patch on Pattern object because default write function will blow the stack"""
+
+    _up: str | DepthChange = ''
+    _down: str | DepthChange = ''
+    _print: str | DepthChange = ''
+    if pretty:
+        _up, _down, _print = DepthChange.UP, DepthChange.DOWN, DepthChange.PRINT
+    not_first_term = False
+    print_spacer = False
+    depth = 0
+    stack: list[Any] = [pat]
+
+    # TODO: fix bug with workitems order
+
+    def push(*items: Any) -> None:
+        for item in reversed(items):
+            if isinstance(item, tuple):
+                if len(item) > 1:
+                    for subitem in reversed(item[1:]):
+                        stack.append(subitem)
+                        stack.append(',')
+                if len(item) > 0:
+                    stack.append(item[0])
+            elif isinstance(item, (str, DepthChange)):
+                stack.append(item)
+            else:
+                raise ValueError(f'Unexpected item type: {type(item)}')
+
+    while len(stack) > 0:
+        pat = stack.pop()
+        if isinstance(pat, str):
+            if print_spacer:
+                if not_first_term:
+                    output.write('\n' + depth * ' ')
+                not_first_term = True
+                print_spacer = False
+            output.write(pat)
+        elif isinstance(pat, App):
+            push(_print, pat.symbol, '{', pat.sorts, '}(', _up, pat.args, _down, ')')
+        elif isinstance(pat, Assoc):
+            push(_print, pat.kore_symbol(), '{}(', _up, pat.app, _down, ')')
+        elif isinstance(pat, MLPattern):
+            push(_print, pat.symbol(), '{', pat.sorts, '}(', pat.ctor_patterns, ')')
+        elif isinstance(pat, SortApp):
+            push(pat.name, '{', pat.sorts, '}')
+        elif isinstance(pat, DepthChange):
+            depth += pat.value
+            if pat == _print:
+                print_spacer = True
+        else:
+            pat.write(output)
+
+
+class PatternWriter:
+    def __init__(self, pat: Pattern, pretty: bool = False):
+        self.pat = pat
+        self.pretty = pretty
+
+    def write(self, output: IO[str]) -> None:
+        if self.pretty:
+            pattern_write(self.pat, output, self.pretty)
+        else:
+            write_pattern(self.pat, output)
+
+
+def debug(pat: Pattern) -> str:
+    if isinstance(pat, str):
+        return pat
+    elif isinstance(pat, tuple):
+        return ' '.join(debug(item) for item in pat)
+    elif isinstance(pat, App):
+        return pat.symbol
+    elif isinstance(pat, Assoc):
+        return pat.kore_symbol()
+    elif isinstance(pat, MLPattern):
+        return pat.symbol()
+    elif isinstance(pat, SortApp):
+        return pat.name
+    elif isinstance(pat, DepthChange):
+        return pat.name
+    else:
+        return repr(pat)
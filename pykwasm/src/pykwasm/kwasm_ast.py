@@ -10,16 +10,23 @@ It is a mirror of the abstract syntax in the K semantics.
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from collections.abc import Sequence
+from functools import wraps
+from typing import TYPE_CHECKING, ParamSpec, TypeVar
 
+from pyk.dequote import enquote_bytes
 from pyk.kast.inner import KApply, KToken
-from pyk.prelude.bytes import bytesToken
+from pyk.prelude.bytes import BYTES
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable
+    from typing import Any, Final
 
     from pyk.kast import KInner
 
+P = ParamSpec('P')
+T = TypeVar('T')
+
 
 ###########
 # KLabels #
@@ -67,11 +74,56 @@ EXPORT = 'aExportDefn'
 DEFNS = '___WASM-COMMON-SYNTAX_Defns_Defn_Defns'
 INSTRS = '___WASM-COMMON-SYNTAX_Instrs_Instr_Instrs'
 
+#############
+# Interning #
+#############
+
+# Real modules repeat a few thousand distinct instructions many times.
+# The constructors decorated with `_interned` return one shared object for equal arguments,
+# which saves memory and makes equality checks between repeated terms cheap.
+# Float constants are not interned, as `0.0 == -0.0` would conflate distinct tokens.
+
+DEFAULT_MAX_INTERNED: Final = 1 << 16
+
+_INTERNED: dict[tuple[Callable, tuple], Any] = {}
+_max_interned: int = DEFAULT_MAX_INTERNED
+
+
+def clear_interned() -> None:
+    """Clear the table of interned terms, e.g. before converting a new module. Its maximum size is kept."""
+    _INTERNED.clear()
+
+
+def reset_interned(max_size: int = DEFAULT_MAX_INTERNED) -> None:
+    """Clear the table of interned terms, and set its maximum size. Interning is disabled if `max_size` is 0."""
+    global _max_interned
+    _INTERNED.clear()
+    _max_interned = max_size
+
+
+def _interned(f: Callable[P, T]) -> Callable[P, T]:
+    @wraps(f)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        if kwargs or not _max_interned:
+            return f(*args, **kwargs)
+        key = (f, args)
+        term = _INTERNED.get(key)
+        if term is None:
+            if len(_INTERNED) >= _max_interned:
+                _INTERNED.clear()
+            term = f(*args, **kwargs)
+            _INTERNED[key] = term
+        return term
+
+    return wrapper
+
+
 ###################
 # Basic Datatypes #
 ###################
 
 
+@_interned
 def KInt(value: int) -> KToken:
     return KToken(str(value), 'Int')
 
@@ -85,7 +137,11 @@ def KString(value: str | None) -> KToken:
 
 
 def KBytes(bs: bytes) -> KToken:
-    return bytesToken(bs)
+    """Return the same token as `pyk.prelude.bytes.bytesToken`, escaping all bytes at once with a translation table."""
+    return KToken('b"' + bs.decode('latin-1').translate(_BYTES_ENQUOTE_TABLE) + '"', BYTES)
+
+
+_BYTES_ENQUOTE_TABLE: Final = [enquote_bytes(chr(code)) for code in range(256)]
 
 
 ###########
@@ -102,29 +158,34 @@ def wasm_string(s: str) -> KToken:
 #########
 
 
-def KNamedList(klabel: str, empty_klabel: str, items: list[KInner]) -> KInner:
+def KNamedList(klabel: str, empty_klabel: str, items: Iterable[KInner]) -> KInner:
+    """Return the right-nested cons list of `items`.
+
+    `items` can be any iterable, e.g. a generator, and is consumed exactly once. A sequence is not copied or modified.
+    The list is built from its last item on, without recursion, so that it can be arbitrarily long.
+    """
+    if not isinstance(items, Sequence):
+        items = tuple(items)
     tail = KApply(empty_klabel, [])
-    while not items == []:
-        last = items.pop()
-        tail = KApply(klabel, [last, tail])
+    for item in reversed(items):
+        tail = KApply(klabel, [item, tail])
     return tail
 
 
-def defns(items: list[KInner]) -> KInner:
+def defns(items: Iterable[KInner]) -> KInner:
     return KNamedList(DEFNS, EMPTY_STMTS, items)
 
 
-def instrs(items: list[KInner]) -> KInner:
+def instrs(items: Iterable[KInner]) -> KInner:
     return KNamedList(INSTRS, EMPTY_STMTS, items)
 
 
-def val_types(items: list[KInner]) -> KInner:
+def val_types(items: Iterable[KInner]) -> KInner:
     return KNamedList(VAL_TYPES, VAL_TYPES_NIL, items)
 
 
 def ints(iis: Iterable[int]) -> KInner:
-    kis: list[KInner] = [KInt(x) for x in iis]
-    return KNamedList(INTS, INTS_NIL, kis)
+    return KNamedList(INTS, INTS_NIL, (KInt(x) for x in iis))
 
 
 def refs(values: Iterable[int | None]) -> KInner:
@@ -136,7 +197,7 @@ def refs(values: Iterable[int | None]) -> KInner:
             ref = KApply('RefVal', [funcref, KInt(idx)])
         return KApply('ListRefItem', [ref])
 
-    return KNamedList(REFS, REFS_NIL, [idx_to_ref(i) for i in values])
+    return KNamedList(REFS, REFS_NIL, (idx_to_ref(i) for i in values))
 
 
 ###########
@@ -212,22 +273,27 @@ def LOOP(vec_type: KInner, instrs: KInner, block_info: KInner) -> KInner:
 RETURN = KApply('aReturn', [])
 
 
+@_interned
 def BR(idx: int) -> KInner:
     return KApply('aBr', [KInt(idx)])
 
 
+@_interned
 def BR_IF(idx: int) -> KInner:
     return KApply('aBr_if', [KInt(idx)])
 
 
+@_interned
 def BR_TABLE(idxs: tuple[int, ...], default: int) -> KInner:
     return KApply('aBr_table', [ints(idxs + (default,))])
 
 
+@_interned
 def CALL(function_idx: int) -> KInner:
     return KApply('aCall', [KInt(function_idx)])
 
 
+@_interned
 def CALL_INDIRECT(type_idx: int) -> KInner:
     type_use = KApply('aTypeUseIndex', [KInt(type_idx)])
     return KApply('aCall_indirect', [KInt(0), type_use])
@@ -238,6 +304,7 @@ def CALL_INDIRECT(type_idx: int) -> KInner:
 ##########################
 
 
+@_interned
 def REF_FUNC(func_idx: int) -> KInner:
     return KApply('aRef.func', [KInt(func_idx)])
 
@@ -245,6 +312,7 @@ def REF_FUNC(func_idx: int) -> KInner:
 REF_IS_NULL: KInner = KApply('aRef.is_null', [])
 
 
+@_interned
 def REF_NULL(t: str) -> KInner:
     return KApply('aRef.null', [KApply(t, [])])
 
@@ -254,34 +322,42 @@ def REF_NULL(t: str) -> KInner:
 ##########################
 
 
+@_interned
 def TABLE_GET(table_idx: int) -> KInner:
     return KApply('aTable.get', [KInt(table_idx)])
 
 
+@_interned
 def TABLE_SET(table_idx: int) -> KInner:
     return KApply('aTable.set', [KInt(table_idx)])
 
 
+@_interned
 def TABLE_INIT(table_idx: int, elem_idx: int) -> KInner:
     return KApply('aTable.init', [KInt(table_idx), KInt(elem_idx)])
 
 
+@_interned
 def ELEM_DROP(elem_idx: int) -> KInner:
     return KApply('aElem.drop', [KInt(elem_idx)])
 
 
+@_interned
 def TABLE_COPY(table_idx1: int, table_idx2: int) -> KInner:
     return KApply('aTable.copy', [KInt(table_idx1), KInt(table_idx2)])
 
 
+@_interned
 def TABLE_GROW(table_idx: int) -> KInner:
     return KApply('aTable.grow', [KInt(table_idx)])
 
 
+@_interned
 def TABLE_SIZE(table_idx: int) -> KInner:
     return KApply('aTable.size', [KInt(table_idx)])
 
 
+@_interned
 def TABLE_FILL(table_idx: int) -> KInner:
     return KApply('aTable.fill', [KInt(table_idx)])
 
@@ -473,10 +549,12 @@ def F64_CONST(f: float) -> KInner:
     return KApply('aFConst', [f64, KFloat(f)])
 
 
+@_interned
 def I32_CONST(i: int) -> KInner:
     return KApply('aIConst', [i32, KInt(i)])
 
 
+@_interned
 def I64_CONST(i: int) -> KInner:
     return KApply('aIConst', [i64, KInt(i)])
 
@@ -486,94 +564,117 @@ def I64_CONST(i: int) -> KInner:
 #######################
 
 
+@_interned
 def F32_STORE(offset: int) -> KInner:
     return KApply('aStore', [f32, KApply('storeOpStore', []), KInt(offset)])
 
 
+@_interned
 def F64_STORE(offset: int) -> KInner:
     return KApply('aStore', [f64, KApply('storeOpStore', []), KInt(offset)])
 
 
+@_interned
 def I32_STORE(offset: int) -> KInner:
     return KApply('aStore', [i32, KApply('storeOpStore', []), KInt(offset)])
 
 
+@_interned
 def I64_STORE(offset: int) -> KInner:
     return KApply('aStore', [i64, KApply('storeOpStore', []), KInt(offset)])
 
 
+@_interned
 def I32_STORE8(offset: int) -> KInner:
     return KApply('aStore', [i32, KApply('storeOpStore8', []), KInt(offset)])
 
 
+@_interned
 def I64_STORE8(offset: int) -> KInner:
     return KApply('aStore', [i64, KApply('storeOpStore8', []), KInt(offset)])
 
 
+@_interned
 def I32_STORE16(offset: int) -> KInner:
     return KApply('aStore', [i32, KApply('storeOpStore16', []), KInt(offset)])
 
 
+@_interned
 def I64_STORE16(offset: int) -> KInner:
     return KApply('aStore', [i64, KApply('storeOpStore16', []), KInt(offset)])
 
 
+@_interned
 def I64_STORE32(offset: int) -> KInner:
     return KApply('aStore', [i64, KApply('storeOpStore32', []), KInt(offset)])
 
 
+@_interned
 def F32_LOAD(offset: int) -> KInner:
     return KApply('aLoad', [f32, KApply('loadOpLoad', []), KInt(offset)])
 
 
+@_interned
 def F64_LOAD(offset: int) -> KInner:
     return KApply('aLoad', [f64, KApply('loadOpLoad', []), KInt(offset)])
 
 
+@_interned
 def I32_LOAD(offset: int) -> KInner:
     return KApply('aLoad', [i32, KApply('loadOpLoad', []), KInt(offset)])
 
 
+@_interned
 def I64_LOAD(offset: int) -> KInner:
     return KApply('aLoad', [i64, KApply('loadOpLoad', []), KInt(offset)])
 
 
+@_interned
 def I32_LOAD16_S(offset: int) -> KInner:
     return KApply('aLoad', [i32, KApply('loadOpLoad16_s', []), KInt(offset)])
 
 
+@_interned
 def I32_LOAD16_U(offset: int) -> KInner:
     return KApply('aLoad', [i32, KApply('loadOpLoad16_u', []), KInt(offset)])
 
 
+@_interned
 def I64_LOAD16_S(offset: int) -> KInner:
     return KApply('aLoad', [i64, KApply('loadOpLoad16_s', []), KInt(offset)])
 
 
+@_interned
 def I64_LOAD16_U(offset: int) -> KInner:
     return KApply('aLoad', [i64, KApply('loadOpLoad16_u', []), KInt(offset)])
 
 
+@_interned
 def I32_LOAD8_S(offset: int) -> KInner:
     return KApply('aLoad', [i32, KApply('loadOpLoad8_s', []), KInt(offset)])
 
 
+@_interned
 def I32_LOAD8_U(offset: int) -> KInner:
     return KApply('aLoad', [i32, KApply('loadOpLoad8_u', []), KInt(offset)])
 
 
+@_interned
 def I64_LOAD8_S(offset: int) -> KInner:
     return KApply('aLoad', [i64, KApply('loadOpLoad8_s', []), KInt(offset)])
 
 
+@_interned
 def I64_LOAD8_U(offset: int) -> KInner:
     return KApply('aLoad', [i64, KApply('loadOpLoad8_u', []), KInt(offset)])
 
 
+@_interned
 def I64_LOAD32_U(offset: int) -> KInner:
     return KApply('aLoad', [i64, KApply('loadOpLoad32_u', []), KInt(offset)])
 
 
+@_interned
 def I64_LOAD32_S(offset: int) -> KInner:
     return KApply('aLoad', [i64, KApply('loadOpLoad32_s', []), KInt(offset)])
 
@@ -588,10 +689,12 @@ MEMORY_COPY = KApply('aCopy', [])
 #######################
 
 
+@_interned
 def GET_GLOBAL(idx: int) -> KInner:
     return KApply('aGlobal.get', [KInt(idx)])
 
 
+@_interned
 def SET_GLOBAL(idx: int) -> KInner:
     return KApply('aGlobal.set', [KInt(idx)])
 
@@ -601,14 +704,17 @@ def SET_GLOBAL(idx: int) -> KInner:
 ######################
 
 
+@_interned
 def GET_LOCAL(idx: int) -> KInner:
     return KApply('aLocal.get', [KInt(idx)])
 
 
+@_interned
 def SET_LOCAL(idx: int) -> KInner:
     return KApply('aLocal.set', [KInt(idx)])
 
 
+@_interned
 def TEE_LOCAL(idx: int) -> KInner:
     return KApply('aLocal.tee', [KInt(idx)])
 
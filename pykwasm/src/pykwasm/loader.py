@@ -0,0 +1,62 @@
+"""
+This library loads Wasm modules from files in the binary or the text format.
+
+The format is detected from the magic number that starts every binary module, so a text module is never parsed as
+binary first. Text modules are compiled to binary with `wat2wasm`. With a cache, the compiled binary is stored under
+the hash of the text, so each text module is compiled only once.
+"""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+from wasm.parsers import parse_module
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Final
+
+    from wasm.datatypes import Module
+
+    from .cache import ModuleCache
+
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+WASM_MAGIC: Final = b'\0asm'
+
+
+def is_binary_module(data: bytes) -> bool:
+    return data.startswith(WASM_MAGIC)
+
+
+def load_wasm(wasm_file: Path, cache: ModuleCache | None = None) -> Module:
+    """Parse a binary or text module."""
+    return parse_module(BytesIO(module_bytes(wasm_file, cache)))
+
+
+def module_bytes(wasm_file: Path, cache: ModuleCache | None = None) -> bytes:
+    """Return the binary of a binary or text module, compiling a text module if `cache` does not have it yet."""
+    data = wasm_file.read_bytes()
+    if is_binary_module(data):
+        return data
+
+    if cache is None:
+        return wat2wasm(wasm_file)
+
+    cache_key = cache.key(data, 'wasm')
+    wasm = cache.get('wasm', cache_key)
+    if wasm is None:
+        wasm = wat2wasm(wasm_file)
+        cache.put('wasm', cache_key, wasm)
+    return wasm
+
+
+def wat2wasm(wat_file: Path) -> bytes:
+    """Compile a text module with `wat2wasm`."""
+    _LOGGER.info(f'Compiling text module: {wat_file}')
+    proc_res = subprocess.run(['wat2wasm', str(wat_file), '--output=/dev/stdout'], check=True, capture_output=True)
+    return proc_res.stdout
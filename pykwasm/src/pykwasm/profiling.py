@@ -0,0 +1,147 @@
+"""
+This library records where the time and memory of a run of the pipeline go.
+
+A `Profile` collects, for each phase of a run, the wall-clock time, the CPU time of this process and of its children
+(the interpreter), the peak resident set size so far of both, and the change in the number of objects tracked by the
+garbage collector. It also holds metrics of the input, e.g. the size of the module. A profile is written as a single
+line of JSON, so that the profiles of many runs can be appended to one file and aggregated.
+
+    profile = Profile(module='erc20.wasm')
+    with profile.phase('load'):
+        wasm_ast = parse_wasm_file(wasm_file)
+    profile.metrics.update(module_metrics(wasm_ast))
+    profile.write(output)
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING, NamedTuple
+
+from wasm.opcodes import BinaryOpcode
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from contextlib import AbstractContextManager
+    from typing import IO, Any
+
+    from wasm.datatypes import Module
+    from wasm.instructions import BaseInstruction
+
+
+class PhaseProfile(NamedTuple):
+    wall: float
+    cpu: float
+    cpu_children: float
+    peak_rss: int
+    peak_rss_children: int
+    objects: int | None
+
+    def to_dict(self) -> dict[str, Any]:
+        return self._asdict()
+
+
+class Profile:
+    """Records the cost of the phases of a run.
+
+    Counting objects takes time proportional to the size of the heap. Without `count_objects`, it is skipped.
+    """
+
+    phases: dict[str, PhaseProfile]
+    metrics: dict[str, Any]
+    count_objects: bool
+
+    def __init__(self, *, count_objects: bool = True, **metrics: Any):
+        self.phases = {}
+        self.metrics = dict(metrics)
+        self.count_objects = count_objects
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record the cost of the body of the `with` statement as phase `name`."""
+        objects = len(gc.get_objects()) if self.count_objects else None
+        cpu, cpu_children = _cpu_times()
+        wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            end_cpu, end_cpu_children = _cpu_times()
+            if objects is not None:
+                objects = len(gc.get_objects()) - objects
+            self.phases[name] = PhaseProfile(
+                wall=wall,
+                cpu=end_cpu - cpu,
+                cpu_children=end_cpu_children - cpu_children,
+                peak_rss=_peak_rss(resource.RUSAGE_SELF),
+                peak_rss_children=_peak_rss(resource.RUSAGE_CHILDREN),
+                objects=objects,
+            )
+
+    def latency(self) -> dict[str, float]:
+        """Return the wall-clock time of each phase, and their sum as `total`."""
+        latency = {name: phase.wall for name, phase in self.phases.items()}
+        latency['total'] = sum(latency.values())
+        return latency
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'metrics': self.metrics,
+            'phases': {name: phase.to_dict() for name, phase in self.phases.items()},
+            'total': {'wall': sum(phase.wall for phase in self.phases.values())},
+        }
+
+    def write(self, output: IO[str]) -> None:
+        """Write the profile as a line of JSON."""
+        output.write(json.dumps(self.to_dict()) + '\n')
+        output.flush()
+
+
+def phase(profile: Profile | None, name: str) -> AbstractContextManager[None]:
+    """Record phase `name` in `profile`, if profiling."""
+    if profile is None:
+        return nullcontext()
+    return profile.phase(name)
+
+
+def module_metrics(wasm_ast: Module) -> dict[str, int]:
+    """Return the size of a module: its numbers of functions and instructions, and the size of its data segments."""
+    return {
+        'functions': len(wasm_ast.funcs),
+        'instructions': sum(count_instrs(f.body) for f in wasm_ast.funcs),
+        'data_bytes': sum(len(d.init) for d in wasm_ast.data),
+    }
+
+
+def count_instrs(iis: Iterable[BaseInstruction]) -> int:
+    """Return the number of instructions in `iis`, including those in nested blocks."""
+    res = 0
+    stack = [iis]
+    while stack:
+        for i in stack.pop():
+            res += 1
+            if i.opcode in (BinaryOpcode.BLOCK, BinaryOpcode.LOOP):
+                stack.append(i.instructions)
+            elif i.opcode == BinaryOpcode.IF:
+                stack.append(i.instructions)
+                stack.append(i.else_instructions)
+    return res
+
+
+def _cpu_times() -> tuple[float, float]:
+    """Return the CPU time of this process and of its terminated children."""
+    times = os.times()
+    return times.user + times.system, times.children_user + times.children_system
+
+
+def _peak_rss(who: int) -> int:
+    """Return the peak resident set size in bytes."""
+    max_rss = resource.getrusage(who).ru_maxrss
+    # Linux reports kibibytes, macOS bytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
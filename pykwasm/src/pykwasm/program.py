@@ -0,0 +1,139 @@
+"""
+This library parses text-format programs for the `llvm` definition, and runs them without `krun`.
+
+A program is parsed into Kore by the `parser_PGM` of the definition, and preprocessed on its way into the parser through
+a pipe, see `pykwasm.scripts.preprocessor`. A definition without `parser_PGM` is left to `kast`, on a temporary file.
+The Kore is stored in the module cache, keyed by the program, the source of the preprocessor and the build of the
+definition, so a program that is run again is not parsed again.
+
+The Kore of the program is spliced into the initial configuration as text and handed to the `interpreter` of the
+definition, as `krun` would do, and the final configuration is pretty-printed with `kore-print`.
+
+    proc_res = run_program_cached(Path('tests/simple/arithmetic.wast'), definition_dir, ModuleCache.from_env())
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import subprocess
+from contextlib import contextmanager, suppress
+from functools import lru_cache
+from pathlib import Path
+from subprocess import PIPE, CompletedProcess
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING
+
+from pyk.kore.prelude import SORT_K_ITEM, inj, top_cell_initializer
+from pyk.kore.syntax import EVar, SortApp
+from pyk.kore.tools import PrintOutput, kore_print
+from pyk.ktool.kprint import KAstInput, KAstOutput, _kast
+
+from .cache import definition_version
+from .interpreter import PipeReader, run_interpreter
+from .results import extract_cells
+from .scripts import preprocessor
+from .scripts.preprocessor import preprocess_stream
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from typing import Final
+
+    from .cache import ModuleCache
+
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# The sort of `$PGM` in the configuration of the `llvm` definition, see `test.md`
+PGM_SORT: Final = SortApp('SortStmts')
+
+
+def parse_program(program: Path, definition_dir: Path) -> CompletedProcess:
+    """Parse `program`, and return its Kore as `stdout`."""
+    pgm_parser = definition_dir / 'parser_PGM'
+    if not pgm_parser.exists():
+        with preprocessed(program) as input_file:
+            return _kast(
+                input_file, definition_dir=definition_dir, input=KAstInput.PROGRAM, output=KAstOutput.KORE, check=False
+            )
+
+    args = [str(pgm_parser), '/dev/stdin']
+    _LOGGER.info(f'Running: {" ".join(args)}')
+
+    with program.open() as input, subprocess.Popen(args, stdin=PIPE, stdout=PIPE, stderr=PIPE, text=True) as proc:
+        assert proc.stdin is not None and proc.stdout is not None and proc.stderr is not None
+        stdout = PipeReader(proc.stdout)
+        stderr = PipeReader(proc.stderr)
+
+        try:
+            preprocess_stream(input, proc.stdin)
+            proc.stdin.close()
+        except BrokenPipeError:
+            # The parser exited before reading all of its input, its return code and stderr tell why
+            _LOGGER.debug('Parser closed its input early')
+            with suppress(BrokenPipeError):
+                proc.stdin.close()
+
+        returncode = proc.wait()
+        return CompletedProcess(args, returncode, stdout.result(), stderr.result())
+
+
+@lru_cache(maxsize=None)
+def preprocessor_version() -> str:
+    """Return a hash of the source of the preprocessor, which changes the Kore of a program without a version bump."""
+    return hashlib.sha256(Path(preprocessor.__file__).read_bytes()).hexdigest()
+
+
+def program_kore(program: Path, definition_dir: Path, cache: ModuleCache | None = None) -> CompletedProcess:
+    """Return the Kore of `program` as `stdout`, from `cache` if it was parsed before."""
+    if cache is None:
+        return parse_program(program, definition_dir)
+
+    key = cache.key(program.read_bytes(), 'program', preprocessor_version(), definition_version(definition_dir))
+    kore = cache.get_kore(key)
+    if kore is not None:
+        return CompletedProcess([], 0, kore, '')
+
+    proc_res = parse_program(program, definition_dir)
+    if proc_res.returncode == 0:
+        cache.put_kore(key, proc_res.stdout)
+    return proc_res
+
+
+@contextmanager
+def preprocessed(program: Path) -> Iterator[Path]:
+    """Yield a temporary file with `program` preprocessed for the parser of the definition."""
+    with program.open() as input, NamedTemporaryFile('w') as f:
+        preprocess_stream(input, f)
+        f.flush()
+        yield Path(f.name)
+
+
+def program_config(kore: str) -> str:
+    """Return the initial configuration for the program `kore`, as Kore text."""
+    hole = EVar('VarPGM', PGM_SORT)
+    prefix, suffix = top_cell_initializer({'$PGM': inj(PGM_SORT, SORT_K_ITEM, hole)}).text.split(hole.text)
+    return prefix + kore.strip() + suffix
+
+
+def run_program_cached(
+    program: Path,
+    definition_dir: Path,
+    cache: ModuleCache | None,
+    cells: Iterable[str] | None = None,
+) -> CompletedProcess:
+    """Run `program` on the interpreter, and output the final configuration, or the given `cells` of it as JSON."""
+    proc_res = program_kore(program, definition_dir, cache)
+    if proc_res.returncode != 0:
+        return proc_res
+
+    proc_res = run_interpreter(definition_dir, program_config(proc_res.stdout))
+    if proc_res.returncode != 0:
+        return proc_res
+
+    if cells:
+        stdout = json.dumps(extract_cells(proc_res.stdout, cells)) + '\n'
+    else:
+        stdout = kore_print(proc_res.stdout, definition_dir=definition_dir, output=PrintOutput.PRETTY)
+    return CompletedProcess(proc_res.args, 0, stdout, proc_res.stderr)
@@ -0,0 +1,93 @@
+"""
+This library finds the functions of a Wasm module that can never be called.
+
+Compilers, e.g. of Rust, leave a lot of code in a module that is not reachable from its exports.
+The converters replace the bodies of such functions by `unreachable`, which keeps the indices of all functions as they
+are, but saves converting, serializing and instantiating the code.
+
+A function is reachable if it is exported, the start function, or referenced by an element segment or a `ref.func`
+in a global initializer, or if it is called or referenced by `ref.func` from a reachable function.
+Functions in a table can be called indirectly, so all functions of element segments are reachable.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from wasm import instructions
+from wasm.datatypes import FunctionIdx, TypeIdx
+from wasm.opcodes import BinaryOpcode
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from wasm.datatypes import Function, Module, ValType
+    from wasm.instructions import BaseInstruction
+
+
+class FuncStub(NamedTuple):
+    """Stands in for an unreachable function. It is converted to a function of the same type with body `unreachable`."""
+
+    type_idx: int
+    locals: tuple[ValType, ...] = ()
+    body: tuple[BaseInstruction, ...] = ()
+
+
+def prune_funcs(wasm_ast: Module) -> list[Function | FuncStub]:
+    """Return the functions of `wasm_ast`, with the unreachable ones replaced by stubs."""
+    reachable = reachable_funcs(wasm_ast)
+    first_idx = num_imported_funcs(wasm_ast)
+    return [f if first_idx + i in reachable else FuncStub(f.type_idx) for i, f in enumerate(wasm_ast.funcs)]
+
+
+def reachable_funcs(wasm_ast: Module) -> set[int]:
+    """Return the indices of the functions of `wasm_ast` that are reachable, imported functions included."""
+    first_idx = num_imported_funcs(wasm_ast)
+    bodies = {first_idx + i: f.body for i, f in enumerate(wasm_ast.funcs)}
+
+    roots = exported_funcs(wasm_ast)
+    if wasm_ast.start is not None:
+        roots.append(wasm_ast.start.function_idx)
+    for e in wasm_ast.elem:
+        for expr in e.init:
+            roots.extend(_referenced_funcs(expr))
+    for g in wasm_ast.globals:
+        roots.extend(_referenced_funcs(g.init))
+
+    reachable: set[int] = set()
+    stack = roots
+    while stack:
+        idx = stack.pop()
+        if idx in reachable:
+            continue
+        reachable.add(idx)
+        body = bodies.get(idx)
+        if body is not None:
+            stack.extend(_referenced_funcs(body))
+    return reachable
+
+
+def exported_funcs(wasm_ast: Module) -> list[int]:
+    """Return the indices of the exported functions. Exports of tables, memories and globals have indices of their own."""
+    return [int(e.desc) for e in wasm_ast.exports if type(e.desc) is FunctionIdx]
+
+
+def num_imported_funcs(wasm_ast: Module) -> int:
+    """Return the number of imported functions, which come first in the index space of functions."""
+    return sum(1 for i in wasm_ast.imports if type(i.desc) is TypeIdx)
+
+
+def _referenced_funcs(iis: Iterable[BaseInstruction]) -> Iterator[int]:
+    """Yield the indices of the functions called or referenced by `iis`, including from nested blocks."""
+    stack = [iis]
+    while stack:
+        for i in stack.pop():
+            if i.opcode == BinaryOpcode.CALL:
+                yield i.function_idx
+            elif isinstance(i, instructions.RefFunc):
+                yield i.funcidx
+            elif i.opcode in (BinaryOpcode.BLOCK, BinaryOpcode.LOOP):
+                stack.append(i.instructions)
+            elif i.opcode == BinaryOpcode.IF:
+                stack.append(i.instructions)
+                stack.append(i.else_instructions)
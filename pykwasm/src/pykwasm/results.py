@@ -0,0 +1,67 @@
+"""
+This library extracts selected cells of a final configuration from the Kore output of the interpreter, as JSON.
+
+The configuration is not parsed: the text is scanned for the requested cells, see `pykwasm.kore_scan`, and only their
+content is parsed. Domain values, e.g. the `<gas>` or `<output>` of a run, become JSON values: integers, booleans,
+strings, and hexadecimal strings for bytes. Other content, e.g. `<valstack>` or `<instrs>`, is given in the JSON format
+of Kore patterns. A cell that does not occur in the configuration is `null`.
+
+    extract_cells(proc_res.stdout, ['status', 'output', 'gas'])
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pyk.konvert import munge
+from pyk.kore.parser import KoreParser
+from pyk.kore.syntax import DV, App
+
+from .kore_scan import find_apps
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import Any
+
+    from pyk.kore.syntax import Pattern
+
+
+def cell_symbol(name: str) -> str:
+    """Return the Kore symbol of cell `name`, e.g. `Lbl'-LT-'gas'-GT-'` for `gas`."""
+    return 'Lbl' + munge(f'<{name}>')
+
+
+def extract_cells(kore: str, names: Iterable[str]) -> dict[str, Any]:
+    """Return the content of the first occurrence of each cell of `names` in the configuration `kore`, as JSON."""
+    symbols = {cell_symbol(name): name for name in names}
+    apps = find_apps(kore, symbols)
+    res = {}
+    for symbol, name in symbols.items():
+        app = apps.get(symbol)
+        res[name] = None if app is None else cell_json(KoreParser(app).pattern())
+    return res
+
+
+def cell_json(cell: Pattern) -> Any:
+    """Return the content of a cell as JSON, a list for a cell with more than one child."""
+    assert type(cell) is App
+    if len(cell.args) == 1:
+        return value_json(cell.args[0])
+    return [value_json(arg) for arg in cell.args]
+
+
+def value_json(pattern: Pattern) -> Any:
+    """Return a domain value, under any injections, as a JSON value, and any other pattern in the Kore JSON format."""
+    while type(pattern) is App and pattern.symbol == 'inj':
+        (pattern,) = pattern.args
+    if type(pattern) is DV:
+        sort = pattern.sort.name
+        value = pattern.value.value
+        if sort == 'SortInt':
+            return int(value)
+        if sort == 'SortBool':
+            return value == 'true'
+        if sort == 'SortBytes':
+            return value.encode('latin-1').hex()
+        return value
+    return pattern.dict
@@ -6,48 +6,148 @@ This library provides a translation from the Wasm binary format to Kast.
 
 from __future__ import annotations
 
+import json
 import os
-import subprocess
 import sys
-from io import BytesIO
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from pyk.kast.inner import KSequence, KSort, KToken, Subst
-from pyk.kast.manip import split_config_from
+from pyk.kast.inner import KToken
 from pyk.ktool.krun import KRun
 
-from .wasm2kore import PatternWriter, wasm2kast
+from .ast2kore import KoreEmitter
+from .cache import CACHE_DIR_ENV, ModuleCache
+from .config_template import MODULE_SORT, ConfigTemplate
+from .interpreter import run_interpreter
+from .profiling import Profile, module_metrics, phase
+from .results import extract_cells
+from .snapshot import Snapshot, check_definition, resume, snapshot_key, snapshot_subst, take_snapshot
+from .wasm2kast import ast2kast, parse_wasm_file
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
 
-def main():
+    from pyk.kast import KInner
+    from pyk.kore.syntax import Pattern
+
+
+def main() -> None:
     # read env vars
     debug = 'DEBUG' in os.environ
 
     # check arg count
-    if len(sys.argv) < 3:
-        print('usage: [DEBUG=1] run_wasm <llvm_dir> <wasm_file> [-cellname:sort=cellvalue...]')
-        sys.exit(1)
     args = sys.argv[1:]
+    direct = '--direct' in args
+    if direct:
+        args.remove('--direct')
+    prune = '--prune' in args
+    if prune:
+        args.remove('--prune')
+    binary = '--binary' in args
+    if binary:
+        args.remove('--binary')
+    snapshot = '--snapshot' in args
+    if snapshot:
+        args.remove('--snapshot')
+    profile_file: str | None = None
+    if '--profile' in args:
+        idx = args.index('--profile')
+        profile_file = args[idx + 1] if idx + 1 < len(args) else ''
+        del args[idx : idx + 2]
+    cells: list[str] | None = None
+    if '--cells' in args:
+        idx = args.index('--cells')
+        cells = args[idx + 1].split(',') if idx + 1 < len(args) else []
+        del args[idx : idx + 2]
+    if len(args) < 2 or profile_file == '' or cells == []:
+        print(
+            'usage: [DEBUG=1] run_wasm [--direct] [--prune] [--binary] [--snapshot] [--profile <profile_file>]'
+            ' [--cells <cellname,...>] <llvm_dir> <wasm_file> [-cellname:sort=cellvalue...]'
+        )
+        sys.exit(1)
 
     # parse fixed args
     llvm_dir = Path(args[0])
     wasm_file = Path(args[1])
-    infile = open(wasm_file, 'rb')
 
-    def build_subst_key(key_name):
+    # parse extra args
+    config_subst = parse_config_subst(args[2:])
+
+    # record the cost of each phase, if profiling
+    profile = Profile(module=str(wasm_file)) if profile_file is not None else None
+
+    # get runner, and the initial configuration in kore
+    with phase(profile, 'definition'):
+        runner = KRun(llvm_dir)
+        template = ConfigTemplate(runner)
+
+    # parse module and build the initial configuration
+    cache = ModuleCache.from_env()
+    config_kore: Pattern | str
+    if snapshot:
+        if cache is None:
+            raise ValueError(f'Snapshots are stored in the module cache, set {CACHE_DIR_ENV}')
+        if binary:
+            raise ValueError('Runs resumed from a snapshot are Kore text, they cannot be passed as binary Kore')
+        config_kore, snapshot_data = resume_config(
+            template, wasm_file, config_subst, cache, prune=prune, profile=profile, count_steps=profile is not None
+        )
+        if debug and snapshot_data.steps is not None:
+            print(f'Instantiation steps saved: {snapshot_data.steps}', file=sys.stderr)
+    elif direct:
+        with phase(profile, 'load'):
+            wasm_ast = parse_wasm_file(wasm_file, cache)
+        if profile is not None:
+            profile.metrics.update(module_metrics(wasm_ast))
+        with phase(profile, 'ast2kore'):
+            module_kore = KoreEmitter(runner.definition).module(wasm_ast, prune=prune)
+        with phase(profile, 'instantiate'):
+            config_kore = template.instantiate(module_kore, config_subst)
+    else:
+        module = load_module(wasm_file, cache, prune=prune, profile=profile)
+        config_kore = build_config(template, module, config_subst, profile=profile)
+
+    # run the config, streaming its kore into the interpreter (and into a log file for debugging)
+    with phase(profile, 'run'):
+        if debug:
+            with open(wasm_file.name + '.input.kore', 'w') as f:
+                proc_data = run_interpreter(llvm_dir, config_kore, tee=f, binary=binary)
+        else:
+            proc_data = run_interpreter(llvm_dir, config_kore, binary=binary)
+
+    # print the result, or only the requested cells of it as JSON
+    with phase(profile, 'output'):
+        if cells is not None:
+            print(json.dumps(extract_cells(proc_data.stdout, cells)))
+        else:
+            print(proc_data.stdout)
+
+    if profile is not None:
+        assert profile_file is not None
+        profile.metrics['returncode'] = proc_data.returncode
+        with open(profile_file, 'a') as f:
+            profile.write(f)
+
+    if proc_data.returncode != 0 or debug:
+        print(proc_data.stderr, file=sys.stderr)
+    proc_data.check_returncode()
+
+
+def parse_config_subst(args: Iterable[str]) -> dict[str, KInner]:
+    """Parse `-cellname:sort=cellvalue` arguments into a substitution for the cell variables of the configuration."""
+
+    def build_subst_key(key_name: str) -> str:
         return key_name.upper() + '_CELL'
 
-    # parse extra args
-    config_subst = {}
-    extra_args = args[2:]
-    for arg in extra_args:
+    config_subst: dict[str, KInner] = {}
+    for arg in args:
         if arg[0] != '-':
             raise ValueError(f'substitution argument was ill-formed: {arg!r}')
         prekey_sort, val = arg[1:].split('=')
         prekey, sort = prekey_sort.split(':')
         key = build_subst_key(prekey)
 
-        if key == 'k':
+        if key == 'K_CELL':
             raise ValueError("substitution may not contain a 'k' key")
         if key in config_subst:
             raise ValueError(f'redundant key found in substitution map: {prekey}')
@@ -55,55 +155,92 @@ def main():
         if sort == 'String':
             val = '"' + f'{val}' + '"'
         config_subst[key] = KToken(val, sort)
-
-    # parse module as binary (with fallback to textual parser)
-    try:
-        module = wasm2kast(infile)
-    except Exception:
-        proc_res = subprocess.run(['wat2wasm', wasm_file, '--output=/dev/stdout'], check=True, capture_output=True)
-        infile.close()
-        infile = BytesIO(proc_res.stdout)
-        module = wasm2kast(infile)
-        infile.close()
-
-    # get runner
-    runner = KRun(llvm_dir)
-
-    # embed parsed_module to <k>
-    top_sort = KSort('GeneratedTopCell')
-    config_kast = runner.definition.init_config(top_sort)
-    symbolic_config, init_subst = split_config_from(config_kast)
-    init_subst['K_CELL'] = KSequence(module)
-
-    # check substitution keys
-    ulm_keys = {'GAS_CELL', 'ENTRY_CELL', 'CREATE_CELL'}
-    if ulm_keys.issubset(init_subst.keys()) and not ulm_keys.issubset(config_subst.keys()):
-        raise ValueError(
-            f'ULM Wasm detected but required substition keys for these cells are missing: {ulm_keys - config_subst.keys()}'
-        )
-
-    # update config substitution
-    final_subst = init_subst | config_subst
-
-    # apply substitution to config
-    config_with_module = Subst(final_subst)(symbolic_config)
-
-    # convert the config to kore
-    config_kore = runner.kast_to_kore(config_with_module, top_sort)
-
-    # monkey patch kore
-    patched_config_kore = PatternWriter(config_kore)
-
-    # log input kore
-    if debug:
-        with open(wasm_file.name + '.input.kore', 'w') as f:
-            patched_config_kore.write(f)
-
-    # run the config
-    proc_data = runner.run_process(patched_config_kore, term=True, expand_macros=False)
-
-    # print the result
-    print(proc_data.stdout)
-    if proc_data.returncode != 0 or debug:
-        print(proc_data.stderr, file=sys.stderr)
-    proc_data.check_returncode()
+    return config_subst
+
+
+def load_module(
+    wasm_file: Path, cache: ModuleCache | None = None, prune: bool = False, profile: Profile | None = None
+) -> KInner:
+    """Convert a binary or textual module to Kast, reusing the result of an earlier conversion if `cache` has one.
+
+    With `prune`, functions unreachable from the exports are replaced by stubs, see `pykwasm.prune`.
+    With `profile`, loading the module and converting it are recorded as phases `load` and `ast2kast`, and the size of
+    the module as metrics. For a module found in the cache, `load` is the lookup, and metric `cached` is set.
+    """
+    with phase(profile, 'load'):
+        # reuse the result of a previous conversion of the same module, if any
+        module = None
+        if cache is not None:
+            cache_key = cache.key(wasm_file.read_bytes(), 'kast', *(['prune'] if prune else []))
+            module = cache.get_kast(cache_key)
+
+        # otherwise parse module as binary or text, compiling text with a cache
+        if module is None:
+            wasm_ast = parse_wasm_file(wasm_file, cache)
+
+    if module is not None:
+        if profile is not None:
+            profile.metrics['cached'] = True
+        return module
+
+    if profile is not None:
+        profile.metrics.update(module_metrics(wasm_ast))
+    with phase(profile, 'ast2kast'):
+        module = ast2kast(wasm_ast, prune=prune)
+
+    if cache is not None:
+        cache.put_kast(cache_key, module)
+    return module
+
+
+def build_config(
+    template: ConfigTemplate, module: KInner, config_subst: Mapping[str, KInner], profile: Profile | None = None
+) -> Pattern:
+    """Return the Kore of the initial configuration with `module` in `<k>`."""
+    # convert the module to kore
+    with phase(profile, 'kast_to_kore'):
+        module_kore = template.runner.kast_to_kore(module, MODULE_SORT)
+
+    # embed the module into the configuration
+    with phase(profile, 'instantiate'):
+        return template.instantiate(module_kore, config_subst)
+
+
+def resume_config(
+    template: ConfigTemplate,
+    wasm_file: Path,
+    config_subst: Mapping[str, KInner],
+    cache: ModuleCache,
+    prune: bool = False,
+    profile: Profile | None = None,
+    count_steps: bool = False,
+) -> tuple[str, Snapshot]:
+    """Return the Kore text of the configuration of a run resumed from the snapshot of `wasm_file`, and the snapshot.
+
+    The snapshot is taken from `cache`, or taken and stored there, see `pykwasm.snapshot`.
+    With `profile`, the lookup of the snapshot is recorded as phase `snapshot_lookup`, taking it as the phases of
+    `load_module` and `build_config` and phase `snapshot`, and resuming as phase `resume`. Metric `snapshot_cached` is
+    set if the snapshot was found, and metric `steps_saved` is the number of rewrite steps of the instantiation, which
+    the run does not take again. The steps are only counted with `count_steps`, when the snapshot is taken.
+    """
+    check_definition(template)
+    with phase(profile, 'snapshot_lookup'):
+        cache_key = snapshot_key(cache, wasm_file, template.runner.definition_dir, config_subst, prune=prune)
+        data = cache.get('snapshot', cache_key)
+
+    if data is not None:
+        snapshot = Snapshot.from_bytes(data)
+        if profile is not None:
+            profile.metrics['snapshot_cached'] = True
+    else:
+        module = load_module(wasm_file, cache, prune=prune, profile=profile)
+        snapshot_config = build_config(template, module, snapshot_subst(config_subst), profile=profile)
+        with phase(profile, 'snapshot'):
+            snapshot = take_snapshot(template, snapshot_config, count_steps=count_steps)
+        cache.put('snapshot', cache_key, snapshot.to_bytes())
+
+    with phase(profile, 'resume'):
+        config_kore = resume(template, snapshot, config_subst)
+    if profile is not None:
+        profile.metrics['steps_saved'] = snapshot.steps
+    return config_kore, snapshot
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import json
 import sys
+import time
 from argparse import ArgumentParser
-from contextlib import contextmanager
 from enum import Enum
 from pathlib import Path
 from tempfile import NamedTemporaryFile
@@ -12,13 +13,13 @@ from pyk.cli.utils import dir_path, file_path
 from pyk.kdist import kdist
 from pyk.ktool.kprint import KAstInput, KAstOutput, _kast
 from pyk.ktool.kprove import _kprove
-from pyk.ktool.krun import _krun
-from pyk.utils import run_process
 
-from .preprocessor import preprocess
+from ..batch import find_programs, run_many, run_program
+from ..cache import ModuleCache
+from ..program import preprocessed, program_kore
 
 if TYPE_CHECKING:
-    from collections.abc import Container, Iterable, Iterator
+    from collections.abc import Container, Iterable
     from subprocess import CompletedProcess
 
 
@@ -32,7 +33,15 @@ def main() -> None:
     args, rest = parser.parse_known_args()
 
     if args.command == 'run':
-        _exec_run(program=args.program)
+        _exec_run(program=args.program, cells=args.cells, target=args.target)
+    elif args.command == 'run-many':
+        _exec_run_many(
+            patterns=args.programs,
+            workers=args.workers,
+            cells=args.cells,
+            expected_file=args.expected_file,
+            target=args.target,
+        )
     elif args.command == 'kast':
         _exec_kast(program=args.program, output=args.output)
     elif args.command == 'prove':
@@ -41,36 +50,61 @@ def main() -> None:
     raise AssertionError()
 
 
-def _exec_run(program: Path) -> None:
-    definition_dir = kdist.get('wasm-semantics.llvm')
+def _exec_run(program: Path, cells: list[str] | None = None, target: str = 'llvm') -> None:
+    definition_dir = kdist.get(f'wasm-semantics.{target}')
+    proc_res = run_program(program, definition_dir, cells, ModuleCache.from_env())
+    _exit_with_output(proc_res)
 
-    with _preprocessed(program) as input_file:
-        proc_res = _krun(definition_dir=definition_dir, input_file=input_file, check=False)
 
-    _exit_with_output(proc_res)
+def _exec_run_many(
+    patterns: list[str],
+    workers: int | None = None,
+    cells: list[str] | None = None,
+    expected_file: Path | None = None,
+    target: str = 'llvm',
+) -> None:
+    definition_dir = kdist.get(f'wasm-semantics.{target}')
+    programs = find_programs(patterns)
+    expected = expected_file.read_text() if expected_file else None
+
+    failed = 0
+    start = time.perf_counter()
+    for res in run_many(
+        programs,
+        definition_dir=definition_dir,
+        workers=workers,
+        cells=cells,
+        expected=expected,
+        cache=ModuleCache.from_env(),
+    ):
+        failed += res.returncode != 0 or res.passed is False
+        print(json.dumps(res.to_dict()), flush=True)
+    seconds = time.perf_counter() - start
+
+    print(f'{len(programs)} programs, {failed} failed, {seconds:.2f}s', file=sys.stderr)
+    sys.exit(1 if failed else 0)
 
 
 def _exec_kast(program: Path, output: KAstOutput | None) -> None:
     definition_dir = kdist.get('wasm-semantics.llvm')
-    pgm_parser = definition_dir / 'parser_PGM'
-
-    with _preprocessed(program) as preprocessed_file:
-        input = KAstInput.PROGRAM
-        input_file = preprocessed_file
-
-        if pgm_parser.exists():
-            f = NamedTemporaryFile()
-            proc_res = run_process([str(pgm_parser), str(input_file)], check=False)
-            if proc_res.returncode != 0:
-                _exit_with_output(proc_res)
-            tmp_file = Path(f.name)
-            tmp_file.write_text(proc_res.stdout)
-
-            input = KAstInput.KORE
-            input_file = tmp_file
-
-        if (not pgm_parser.exists()) or output != KAstOutput.KORE:
-            proc_res = _kast(input_file, definition_dir=definition_dir, input=input, output=output, check=False)
+    cache = ModuleCache.from_env()
+
+    if cache is None and not (definition_dir / 'parser_PGM').exists():
+        with preprocessed(program) as input_file:
+            proc_res = _kast(
+                input_file, definition_dir=definition_dir, input=KAstInput.PROGRAM, output=output, check=False
+            )
+        _exit_with_output(proc_res)
+
+    # The program is parsed into Kore, or its Kore is taken from the cache, and then converted to the output format
+    proc_res = program_kore(program, definition_dir, cache)
+    if proc_res.returncode == 0 and output != KAstOutput.KORE:
+        with NamedTemporaryFile('w') as f:
+            f.write(proc_res.stdout)
+            f.flush()
+            proc_res = _kast(
+                Path(f.name), definition_dir=definition_dir, input=KAstInput.KORE, output=output, check=False
+            )
 
     _exit_with_output(proc_res)
 
@@ -92,15 +126,6 @@ def _exec_prove(
     _exit_with_output(proc_res, normal_status=(0, 1))
 
 
-@contextmanager
-def _preprocessed(program: Path) -> Iterator[Path]:
-    program_text = program.read_text()
-    with NamedTemporaryFile() as f:
-        tmp_file = Path(f.name)
-        tmp_file.write_text(preprocess(program_text))
-        yield tmp_file
-
-
 def _exit_with_output(cp: CompletedProcess, *, normal_status: Container[int] | None = None) -> None:
     status = cp.returncode
     normal_status = normal_status or (0,)
@@ -117,6 +142,37 @@ def _argument_parser() -> ArgumentParser:
 
     run_parser = command_parser.add_parser('run', help='run a WebAssembly program')
     run_parser.add_argument('program', metavar='PROGRAM', type=file_path, help='path to WebAssembly program')
+    run_parser.add_argument('--target', default='llvm', help='kdist target of the definition, e.g. llvm-paged')
+    run_parser.add_argument(
+        '--cells',
+        metavar='CELLS',
+        type=lambda s: s.split(','),
+        help='comma-separated cells of the final configuration to output as JSON, e.g. instrs,valstack',
+    )
+
+    run_many_parser = command_parser.add_parser(
+        'run-many', help='run WebAssembly programs over a pool of worker processes, one JSON result per line'
+    )
+    run_many_parser.add_argument(
+        'programs', metavar='PROGRAM', nargs='+', help='path to WebAssembly program, or a glob of them'
+    )
+    run_many_parser.add_argument('--target', default='llvm', help='kdist target of the definition, e.g. llvm-paged')
+    run_many_parser.add_argument(
+        '-j', '--workers', metavar='N', type=int, help='number of worker processes, one per CPU by default'
+    )
+    run_many_parser.add_argument(
+        '--cells',
+        metavar='CELLS',
+        type=lambda s: s.split(','),
+        help='comma-separated cells of the final configuration to output as JSON, e.g. instrs,valstack',
+    )
+    run_many_parser.add_argument(
+        '--expected',
+        dest='expected_file',
+        metavar='FILE',
+        type=file_path,
+        help='expected output of each program, ignoring whitespace, or as JSON with --cells',
+    )
 
     kast_parser = command_parser.add_parser(
         'kast', help='parse a WebAssembly program and output it in a supported format'
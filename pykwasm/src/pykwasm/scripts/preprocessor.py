@@ -1,26 +1,53 @@
 # Preprocessor that converts Wasm concrete syntax into a form parseable by K.
 # example usage: kwasm-preprocess f32.wast
 
+from __future__ import annotations
+
 import re
 import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import IO, Final
+
+
+CHUNK_SIZE: Final = 1 << 16
+
+# A constant ends at a closing parenthesis or at the end of its line, the newline included
+_FLOAT_CONST: Final = re.compile(r'(?:f32|f64)\.const (?:[^)\n]+\n?|\n)')
+_NAN: Final = re.compile('-?nan(:.*$)?')
 
 
 def preprocess(s: str) -> str:
-    def replace(m: re.Match) -> str:
-        return hex2float(m.group())
+    # Every line is terminated, the last one included
+    return _FLOAT_CONST.sub(_replace, s + '\n')
+
+
+def preprocess_stream(input: IO[str], output: IO[str], *, chunk_size: int = CHUNK_SIZE) -> None:
+    """Preprocess `input` into `output` a chunk of whole lines at a time, with the same result as `preprocess`."""
+    parts: list[str] = []
+    while chunk := input.read(chunk_size):
+        # No constant spans lines, so the text is cut after the last newline of the chunk
+        end = chunk.rfind('\n') + 1
+        if not end:
+            parts.append(chunk)
+            continue
+        parts.append(chunk[:end])
+        output.write(_FLOAT_CONST.sub(_replace, ''.join(parts)))
+        parts = [chunk[end:]]
+    parts.append('\n')
+    output.write(_FLOAT_CONST.sub(_replace, ''.join(parts)))
 
-    lines = []
-    for line in s.split('\n'):  # splitlines also splits on other characters, e.g \u2028
-        lines.append(re.sub(r'(?:(?:f32|f64)\.const )([^\)]+)', replace, line + '\n'))
 
-    return ''.join(lines)
+def _replace(m: re.Match) -> str:
+    return hex2float(m.group())
 
 
 def hex2float(h: str) -> str:
-    h = re.sub('_', '', h)
+    h = h.replace('_', '')
     if 'nan' in h:
         # TODO: Keep bit pattern of float, don't turn all of them into simple NaNs.
-        return re.sub('-?nan(:.*$)?', 'NaN', h)
+        return _NAN.sub('NaN', h)
     elif 'inf' in h:
         return h.replace('inf', 'Infinity')
     elif '0x' in h:
@@ -36,11 +63,11 @@ def hex2float(h: str) -> str:
 
 def main() -> None:
     if len(list(sys.argv)) == 1:
-        infile = sys.stdin
+        preprocess_stream(sys.stdin, sys.stdout)
     else:
-        infile = open(sys.argv[1])
-    print(preprocess(infile.read()))
-    infile.close()
+        with open(sys.argv[1]) as infile:
+            preprocess_stream(infile, sys.stdout)
+    print()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,189 @@
+"""
+This library snapshots the configuration of a module right after its instantiation, and resumes runs from it.
+
+For the ULM Wasm test definition, `ulm-wasm-test`, every run of a module first instantiates it: functions, globals,
+data segments and tables are allocated, and only then is the entry point resolved and called. Instantiation depends only
+on the module, not on the cells that differ from call to call, `<gas>`, `<create>` and `<entry>`, so it can be done once.
+
+A snapshot is taken by running the interpreter with an entry point that no module exports. The run gets stuck at the
+resolution of the entry point, after instantiation, and its final configuration is the snapshot. A run is resumed by
+replacing, in the Kore text of the snapshot, the `<gas>`, `<create>` and `<entry>` cells and the entry point being
+resolved in `<k>` by the values of the call. Call data is not part of the configuration, it is provided by the ULM
+through hooks.
+
+Only definitions that take the entry point from the `<entry>` cell can be snapshotted. The remote ULM Wasm definition,
+`ulm-wasm`, always calls `ulmDispatchCaller` and has no `<entry>` cell, so it is rejected, see `check_definition`.
+
+Snapshots are stored in the module cache, keyed by the module, whether it is pruned, the definition and the cells that
+are not replaced.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, NamedTuple
+
+from pyk.kast.inner import KToken
+from pyk.kore.parser import KoreParser
+from pyk.kore.syntax import DV, App, String
+
+from .cache import definition_version
+from .interpreter import count_steps as _count_steps
+from .interpreter import run_interpreter
+from .kore_scan import find_apps, replace_apps
+from .results import cell_symbol
+from .traversal import kore_text
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from pathlib import Path
+    from typing import Final
+
+    from pyk.kast import KInner
+    from pyk.kore.syntax import Pattern
+
+    from .cache import ModuleCache
+    from .config_template import ConfigTemplate
+
+
+ENTRY_KEY: Final = 'ENTRY_CELL'
+RESUME_KEYS: Final = frozenset({'GAS_CELL', 'CREATE_CELL'})
+
+# The entry point of the run that takes the snapshot. It must not be exported by the module.
+SNAPSHOT_ENTRY: Final = '"$kwasm-snapshot"'
+
+K_CELL: Final = cell_symbol('k')
+INSTRS_CELL: Final = cell_symbol('instrs')
+
+# The steps of the resolution of the entry point, at which a run of a module is stuck if the entry point is not exported
+RESOLVE_SYMBOLS: Final = frozenset({"Lbl'Hash'resolveCurModuleFuncExport", "Lbl'Hash'resolveModuleFuncExport"})
+
+
+class Snapshot(NamedTuple):
+    """The Kore text of the configuration after instantiation, and the number of rewrite steps it took, if counted."""
+
+    kore: str
+    steps: int | None
+
+    def to_bytes(self) -> bytes:
+        return json.dumps({'kore': self.kore, 'steps': self.steps}).encode()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Snapshot:
+        dct = json.loads(data)
+        return Snapshot(dct['kore'], dct['steps'])
+
+
+def snapshot_key(
+    cache: ModuleCache,
+    wasm_file: Path,
+    definition_dir: Path,
+    config_subst: Mapping[str, KInner],
+    prune: bool = False,
+) -> str:
+    """Return the cache key of the snapshot of a module, for the cells of `config_subst` that are not replaced.
+
+    With `prune`, the key is that of the snapshot of the pruned module, see `pykwasm.prune`.
+    """
+    cells = sorted(
+        f'{key}={value.token}:{value.sort.name}' if type(value) is KToken else f'{key}={value}'
+        for key, value in config_subst.items()
+        if key != ENTRY_KEY and key not in RESUME_KEYS
+    )
+    return cache.key(
+        wasm_file.read_bytes(), 'snapshot', definition_version(definition_dir), *(['prune'] if prune else []), *cells
+    )
+
+
+def snapshot_subst(config_subst: Mapping[str, KInner]) -> dict[str, KInner]:
+    """Return `config_subst` with `SNAPSHOT_ENTRY` as the entry point, to build the configuration of a snapshot."""
+    entry = config_subst.get(ENTRY_KEY)
+    if type(entry) is not KToken:
+        raise ValueError(f'Expected a token for the entry point, got: {entry}')
+    return dict(config_subst) | {ENTRY_KEY: KToken(SNAPSHOT_ENTRY, entry.sort)}
+
+
+def check_definition(template: ConfigTemplate) -> None:
+    """Raise a `ValueError` if the entry point of the definition of `template` is not taken from an `<entry>` cell."""
+    if ENTRY_KEY not in template.cell_vars:
+        raise ValueError(
+            'Snapshots need a definition with an <entry> cell, e.g. ulm-wasm-test, '
+            f'got: {template.runner.definition_dir}'
+        )
+
+
+def take_snapshot(template: ConfigTemplate, config: Pattern, *, count_steps: bool = False) -> Snapshot:
+    """Run `config` to the resolution of its entry point, which must be `SNAPSHOT_ENTRY`, and return the snapshot.
+
+    The run must be stuck with no instructions left, and `<k>` at the resolution of `SNAPSHOT_ENTRY`, otherwise the
+    instantiation failed, and a `ValueError` is raised.
+    With `count_steps`, the number of rewrite steps of the instantiation is found by bisection on the depth of the run,
+    which runs the interpreter a logarithmic number of times more. It is meant for profiling.
+    """
+    check_definition(template)
+    definition_dir = template.runner.definition_dir
+    proc_res = run_interpreter(definition_dir, config)
+    if proc_res.returncode != 0:
+        raise ValueError(f'Instantiation failed with return code {proc_res.returncode}: {proc_res.stderr}')
+    if not stuck_at_snapshot_entry(proc_res.stdout):
+        raise ValueError(f'Instantiation did not reach the entry point: {proc_res.stderr}')
+
+    steps = _count_steps(definition_dir, config, proc_res.stdout) if count_steps else None
+    return Snapshot(proc_res.stdout, steps)
+
+
+def stuck_at_snapshot_entry(kore: str) -> bool:
+    """Return whether the configuration `kore` has no instructions left, and `<k>` at the resolution of `SNAPSHOT_ENTRY`."""
+    cells = find_apps(kore, [K_CELL, INSTRS_CELL])
+    if K_CELL not in cells or INSTRS_CELL not in cells:
+        return False
+    if KoreParser(cells[INSTRS_CELL]).pattern() != App(INSTRS_CELL, (), (App('dotk'),)):
+        return False
+
+    k_cell = KoreParser(cells[K_CELL]).pattern()
+    assert type(k_cell) is App
+    step = _uninj(k_cell.args[0])
+    if type(step) is App and step.symbol == 'kseq':
+        step = _uninj(step.args[0])
+    if type(step) is not App or step.symbol not in RESOLVE_SYMBOLS or not step.args:
+        return False
+    entry = _uninj(step.args[-1])
+    return type(entry) is DV and entry.value.value == SNAPSHOT_ENTRY
+
+
+def _uninj(pattern: Pattern) -> Pattern:
+    while type(pattern) is App and pattern.symbol == 'inj':
+        pattern = pattern.args[0]
+    return pattern
+
+
+def resume(template: ConfigTemplate, snapshot: Snapshot, config_subst: Mapping[str, KInner]) -> str:
+    """Return the Kore text of the snapshot with the entry point and the cells of the call in `config_subst`."""
+    check_definition(template)
+    entry = config_subst.get(ENTRY_KEY)
+    if type(entry) is not KToken:
+        raise ValueError(f'Expected a token for the entry point, got: {entry}')
+    if not RESUME_KEYS.issubset(config_subst):
+        raise ValueError(f'Missing substitution keys to resume from a snapshot: {RESUME_KEYS - config_subst.keys()}')
+
+    apps = {}
+    for key in RESUME_KEYS | {ENTRY_KEY}:
+        cell = template.cell(key, config_subst[key])
+        apps[cell.symbol] = kore_text(cell)
+    for symbol, app in find_apps(snapshot.kore, RESOLVE_SYMBOLS).items():
+        apps[symbol] = kore_text(_with_entry(KoreParser(app).pattern(), entry.token))
+    return replace_apps(snapshot.kore, apps)
+
+
+def _with_entry(resolve: Pattern, entry: str) -> Pattern:
+    """Return the resolution of an entry point `resolve` with the entry point `entry`."""
+
+    def replace(pattern: Pattern) -> Pattern:
+        if type(pattern) is App and pattern.symbol == 'inj':
+            return pattern.let(args=(replace(pattern.args[0]),))
+        if type(pattern) is DV:
+            return pattern.let(value=String(entry))
+        raise ValueError(f'Expected an entry point, got: {pattern.text}')
+
+    assert type(resolve) is App
+    return resolve.let(args=resolve.args[:-1] + (replace(resolve.args[-1]),))
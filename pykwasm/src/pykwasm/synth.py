@@ -0,0 +1,313 @@
+"""
+This module generates synthetic Wasm modules of controlled size, and measures the pipeline on them.
+
+The modules are valid binary modules with a given number of functions, instructions per function, depth of block
+nesting, size of a data segment and number of targets of a `br_table`, which the hand-written tests do not reach.
+A sweep varies one of these parameters, converts and runs each module in a fresh process, and records the cost of each
+stage of the pipeline with `pykwasm.profiling`. The time and the peak RSS of each stage can be plotted on log-log axes,
+where a stage that scales super-linearly in the parameter shows as a line steeper than the others.
+
+usage: kwasm-synth gen [PARAMS] <output.wasm>
+       kwasm-synth sweep [PARAMS] [--definition DIR] [--output FILE] [--plot FILE] <param> <value>...
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from random import Random
+from typing import TYPE_CHECKING, NamedTuple
+from xml.etree.ElementTree import Element, SubElement, tostring
+
+from pyk.cli.utils import dir_path
+from pyk.ktool.krun import KRun
+from wasm.parsers import parse_module
+
+from .config_template import MODULE_SORT, ConfigTemplate
+from .interpreter import run_interpreter
+from .kore_writer import write_pattern
+from .profiling import Profile, module_metrics
+from .wasm2kast import ast2kast
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+    from typing import Any, Final
+
+
+class SynthParams(NamedTuple):
+    functions: int = 1
+    instrs: int = 100
+    depth: int = 0
+    data_bytes: int = 0
+    br_table: int = 0
+    seed: int = 0
+
+
+#############
+# Generator #
+#############
+
+
+def synth_module(params: SynthParams) -> bytes:
+    """Return a binary module with the shape given by `params`.
+
+    Each function has type `[i32] -> [i32]` and one local, and is exported as `f<index>`. Its body is `params.depth`
+    nested blocks, holding `params.instrs` instructions that add constants to the parameter, followed by a `br_table`
+    with `params.br_table` targets, if any. There is a memory and a data segment of `params.data_bytes` random bytes,
+    if any.
+    """
+    sections = [
+        _section(1, _vec([b'\x60' + _vec([_I32]) + _vec([_I32])])),
+        _section(3, _vec([_u32(0)] * params.functions)),
+    ]
+    if params.data_bytes:
+        pages = max(1, math.ceil(params.data_bytes / 0x10000))
+        sections.append(_section(5, _vec([b'\x00' + _u32(pages)])))
+    sections.append(_section(7, _vec([_name(f'f{i}') + b'\x00' + _u32(i) for i in range(params.functions)])))
+
+    body = _func_body(params)
+    code = _u32(len(body)) + body
+    sections.append(_section(10, _vec([code] * params.functions)))
+
+    if params.data_bytes:
+        data = Random(params.seed).randbytes(params.data_bytes)
+        offset = b'\x41' + _s32(0) + _END
+        sections.append(_section(11, _vec([b'\x00' + offset + _u32(len(data)) + data])))
+
+    return _MAGIC + b''.join(sections)
+
+
+_MAGIC: Final = b'\0asm\x01\0\0\0'
+_I32: Final = b'\x7f'
+_END: Final = b'\x0b'
+
+
+def _func_body(params: SynthParams) -> bytes:
+    # A br_table needs an enclosing block to branch to without a result
+    depth = max(params.depth, 1 if params.br_table else 0)
+
+    body = bytearray(_vec([_u32(1) + _I32]))
+    body += b'\x02\x40' * depth
+    units, rest = divmod(params.instrs, 4)
+    for k in range(units):
+        # local.get 0; i32.const k; i32.add; local.set 1
+        body += b'\x20\x00\x41' + _s32(k % 1024) + b'\x6a\x21\x01'
+    body += b'\x01' * rest
+    if params.br_table:
+        labels = b''.join(_u32(i % depth) for i in range(params.br_table))
+        body += b'\x20\x00\x0e' + _u32(params.br_table) + labels + _u32(0)
+    body += _END * depth
+    body += b'\x20\x01' + _END
+    return bytes(body)
+
+
+def _section(section_id: int, content: bytes) -> bytes:
+    return bytes([section_id]) + _u32(len(content)) + content
+
+
+def _vec(items: Sequence[bytes]) -> bytes:
+    return _u32(len(items)) + b''.join(items)
+
+
+def _name(name: str) -> bytes:
+    data = name.encode()
+    return _u32(len(data)) + data
+
+
+def _u32(n: int) -> bytes:
+    res = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            res.append(byte | 0x80)
+        else:
+            res.append(byte)
+            return bytes(res)
+
+
+def _s32(n: int) -> bytes:
+    res = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if (n == 0 and not byte & 0x40) or (n == -1 and byte & 0x40):
+            res.append(byte)
+            return bytes(res)
+        res.append(byte | 0x80)
+
+
+#########
+# Sweep #
+#########
+
+
+def profile_module(params: SynthParams, definition_dir: Path | None = None) -> dict[str, Any]:
+    """Generate a module and take it through the pipeline, and return the profile of each stage.
+
+    Without a definition, the module is only parsed and converted to Kast. With one, it is also converted to Kore,
+    embedded in the initial configuration, written, and run by the interpreter.
+    """
+    profile = Profile(count_objects=False, **params._asdict())
+    data = synth_module(params)
+    profile.metrics['module_bytes'] = len(data)
+
+    with profile.phase('parse'):
+        wasm_ast = parse_module(BytesIO(data))
+    profile.metrics.update(module_metrics(wasm_ast))
+    with profile.phase('wasm2kast'):
+        module = ast2kast(wasm_ast)
+
+    if definition_dir is not None:
+        with profile.phase('definition'):
+            runner = KRun(definition_dir)
+            template = ConfigTemplate(runner)
+        with profile.phase('kast_to_kore'):
+            module_kore = runner.kast_to_kore(module, MODULE_SORT)
+        with profile.phase('instantiate'):
+            config_kore = template.instantiate(module_kore, {})
+        with profile.phase('write'), open(os.devnull, 'w') as devnull:
+            write_pattern(config_kore, devnull)
+        with profile.phase('run'):
+            proc_res = run_interpreter(definition_dir, config_kore)
+        profile.metrics['returncode'] = proc_res.returncode
+
+    return profile.to_dict()
+
+
+def sweep(
+    param: str, values: Iterable[int], base: SynthParams | None = None, definition_dir: Path | None = None
+) -> list[dict[str, Any]]:
+    """Profile a module for each value of parameter `param`, with the other parameters as in `base`.
+
+    Each module is profiled in a fresh process, so that the peak memory of a point is not that of an earlier one.
+    """
+    if param not in SynthParams._fields:
+        raise ValueError(f'Unknown parameter: {param}')
+
+    if base is None:
+        base = SynthParams()
+
+    res = []
+    for value in values:
+        params = base._replace(**{param: value})
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            res.append(pool.submit(profile_module, params, definition_dir).result())
+    return res
+
+
+def plot_svg(param: str, profiles: Sequence[Mapping[str, Any]], metric: str = 'wall') -> str:
+    """Return an SVG plot of `metric` of each phase of `profiles` against `param`, on log-log axes."""
+    width, height, margin = 640, 400, 60
+    series: dict[str, list[tuple[float, float]]] = {}
+    for profile in profiles:
+        x = profile['metrics'][param]
+        for name, phase in profile['phases'].items():
+            if x > 0 and phase[metric] > 0:
+                series.setdefault(name, []).append((math.log10(x), math.log10(phase[metric])))
+
+    all_points = [point for line in series.values() for point in line]
+    if not all_points:
+        raise ValueError('Nothing to plot, the values must be positive')
+    x_min, x_max = min(x for x, _ in all_points), max(x for x, _ in all_points)
+    y_min, y_max = min(y for _, y in all_points), max(y for _, y in all_points)
+
+    def scale(x: float, y: float) -> str:
+        sx = margin + (x - x_min) / ((x_max - x_min) or 1) * (width - 2 * margin)
+        sy = height - margin - (y - y_min) / ((y_max - y_min) or 1) * (height - 2 * margin)
+        return f'{sx:.1f},{sy:.1f}'
+
+    svg = Element('svg', xmlns='http://www.w3.org/2000/svg', width=str(width), height=str(height))
+    svg.set('font-size', '12')
+    SubElement(svg, 'rect', width=str(width), height=str(height), fill='white')
+    SubElement(svg, 'path', d=f'M{margin},{margin} V{height - margin} H{width - margin}', stroke='black', fill='none')
+    x_label = SubElement(svg, 'text', x=str(width // 2), y=str(height - 20))
+    x_label.text = f'{param} (log, 10^{x_min:.1f} to 10^{x_max:.1f})'
+    y_label = SubElement(svg, 'text', x='15', y=str(height // 2), transform=f'rotate(-90 15,{height // 2})')
+    y_label.text = f'{metric} (log, 10^{y_min:.1f} to 10^{y_max:.1f})'
+    for label in (x_label, y_label):
+        label.set('text-anchor', 'middle')
+
+    for i, (name, line) in enumerate(series.items()):
+        color = _COLORS[i % len(_COLORS)]
+        points = ' '.join(scale(x, y) for x, y in line)
+        polyline = SubElement(svg, 'polyline', points=points, stroke=color, fill='none')
+        polyline.set('stroke-width', '2')
+        legend = SubElement(svg, 'text', x=str(width - margin + 5), y=str(margin + 15 * i), fill=color)
+        legend.text = name
+    return tostring(svg, encoding='unicode') + '\n'
+
+
+_COLORS: Final = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f')
+
+
+########
+# Main #
+########
+
+
+def main() -> None:
+    parser = _argument_parser()
+    args = parser.parse_args()
+    params = SynthParams(**{field: getattr(args, field) for field in SynthParams._fields})
+
+    if args.command == 'gen':
+        args.output_file.write_bytes(synth_module(params))
+        return
+
+    profiles = sweep(args.param, args.values, params, args.definition_dir)
+    if args.output_file is not None:
+        with open(args.output_file, 'w') as f:
+            for profile in profiles:
+                f.write(json.dumps(profile) + '\n')
+    if args.plot_file is not None:
+        args.plot_file.write_text(plot_svg(args.param, profiles))
+        args.plot_file.with_suffix('.rss.svg').write_text(plot_svg(args.param, profiles, metric='peak_rss'))
+
+    # Time per unit of the parameter, relative to the first point: growth means super-linear behaviour
+    first: dict[str, float] = {}
+    for profile in profiles:
+        value = profile['metrics'][args.param]
+        for name, phase in profile['phases'].items():
+            per_unit = phase['wall'] / max(value, 1)
+            relative = per_unit / (first.setdefault(name, per_unit) or per_unit or 1)
+            print(
+                f'{args.param}={value:<10} {name:<14} {phase["wall"]:10.4f}s {relative:6.2f}x/unit'
+                f' {phase["peak_rss"] / 2**20:10.1f} MiB'
+            )
+
+
+def _argument_parser() -> ArgumentParser:
+    params_parser = ArgumentParser(add_help=False)
+    defaults = SynthParams()
+    params_parser.add_argument('--functions', type=int, default=defaults.functions, help='number of functions')
+    params_parser.add_argument('--instrs', type=int, default=defaults.instrs, help='instructions per function')
+    params_parser.add_argument('--depth', type=int, default=defaults.depth, help='depth of block nesting')
+    params_parser.add_argument('--data-bytes', type=int, default=defaults.data_bytes, help='size of the data segment')
+    params_parser.add_argument('--br-table', type=int, default=defaults.br_table, help='targets of the br_table')
+    params_parser.add_argument('--seed', type=int, default=defaults.seed, help='seed of the data segment')
+
+    parser = ArgumentParser(prog='kwasm-synth', description='Generate synthetic Wasm modules and measure the pipeline')
+    command_parser = parser.add_subparsers(dest='command', required=True)
+
+    gen_parser = command_parser.add_parser('gen', parents=[params_parser], help='generate a module')
+    gen_parser.add_argument('output_file', metavar='OUTPUT', type=Path, help='path of the binary module')
+
+    sweep_parser = command_parser.add_parser('sweep', parents=[params_parser], help='profile a range of modules')
+    sweep_parser.add_argument('param', choices=SynthParams._fields, help='parameter to vary')
+    sweep_parser.add_argument('values', metavar='VALUE', type=int, nargs='+', help='values of the parameter')
+    sweep_parser.add_argument('--definition', dest='definition_dir', type=dir_path, help='kompiled LLVM definition')
+    sweep_parser.add_argument('--output', dest='output_file', type=Path, help='write the profiles as JSON lines')
+    sweep_parser.add_argument(
+        '--plot', dest='plot_file', type=Path, help='plot the time of each stage as SVG, and its peak RSS next to it'
+    )
+    return parser
+
+
+if __name__ == '__main__':
+    main()
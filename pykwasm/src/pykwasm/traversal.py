@@ -0,0 +1,210 @@
+"""
+This library provides iterative traversals of Kast and Kore terms.
+
+The terms produced for large modules are nested as deep as their longest instruction list, far beyond the recursion
+limit of Python. The equality, hashing and serialization of pyk recurse on the structure of the terms, the functions
+here do not: they keep their own stack, so they work at the default recursion limit whatever the size of the module.
+Shared subterms, e.g. interned instructions, are only visited once where the result does not depend on the context.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import fields
+from io import StringIO
+from json.encoder import encode_basestring_ascii as _encode_string
+from typing import TYPE_CHECKING, TypeVar
+
+from pyk.kast.inner import KInner, KVariable
+from pyk.kore.syntax import EVar
+
+from .kore_writer import write_pattern
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterator, Mapping
+    from typing import Any, Final
+
+    from pyk.kore.syntax import Pattern
+
+
+T = TypeVar('T', KInner, 'Pattern')
+
+
+def subterms(term: T) -> Iterator[T]:
+    """Yield `term` and all of its subterms in pre-order."""
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        yield term
+        stack.extend(reversed(_children(term)))
+
+
+def size(term: T) -> int:
+    """Return the number of nodes of `term`, counting shared subterms at each occurrence."""
+    return sum(1 for _ in subterms(term))
+
+
+def depth(term: KInner | Pattern) -> int:
+    """Return the number of nodes on the longest path from `term` to a leaf."""
+    res = 0
+    stack = [(term, 1)]
+    while stack:
+        term, d = stack.pop()
+        res = max(res, d)
+        stack.extend((child, d + 1) for child in _children(term))
+    return res
+
+
+def structural_hash(term: KInner | Pattern) -> int:
+    """Return a hash of `term` that is equal for equal terms, see `equal`."""
+    hashes: dict[int, int] = {}
+    stack: list[tuple[KInner | Pattern, bool]] = [(term, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if id(current) in hashes:
+            continue
+        children = _children(current)
+        if children and not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in children)
+            continue
+        hashes[id(current)] = hash((_node(current, children), tuple(hashes[id(child)] for child in children)))
+    return hashes[id(term)]
+
+
+def equal(term1: KInner | Pattern, term2: KInner | Pattern) -> bool:
+    """Return whether `term1` and `term2` are structurally equal, as with `==` on terms of pyk."""
+    stack = [(term1, term2)]
+    while stack:
+        term1, term2 = stack.pop()
+        if term1 is term2:
+            continue
+        children1 = _children(term1)
+        children2 = _children(term2)
+        if len(children1) != len(children2) or _node(term1, children1) != _node(term2, children2):
+            return False
+        stack.extend(zip(children1, children2, strict=True))
+    return True
+
+
+def bottom_up(f: Callable[[T], T], term: T) -> T:
+    """Apply `f` to each subterm of `term`, from the leaves up, and return the result for `term`.
+
+    `f` must not depend on the context of a subterm, as it is only called once for each distinct node object.
+    """
+    results: dict[int, T] = {}
+    stack: list[tuple[T, bool]] = [(term, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if id(current) in results:
+            continue
+        children = _children(current)
+        if children and not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in children)
+            continue
+        new_children = tuple(results[id(child)] for child in children)
+        if any(new is not old for new, old in zip(new_children, children, strict=True)):
+            results[id(current)] = f(_let_children(current, new_children))
+        else:
+            results[id(current)] = f(current)
+    return results[id(term)]
+
+
+def substitute(term: T, subst: Mapping[str, T]) -> T:
+    """Replace the variables of `term` by their value in `subst`, by name.
+
+    For Kast, variables are `KVariable`, for Kore, element variables `EVar`.
+    """
+
+    def replace(term: T) -> T:
+        if type(term) is KVariable or type(term) is EVar:
+            return subst.get(term.name, term)
+        return term
+
+    return bottom_up(replace, term)
+
+
+def kore_text(pattern: Pattern) -> str:
+    """Return the text of `pattern` in the compact format of `kore_writer`."""
+    output = StringIO()
+    write_pattern(pattern, output)
+    return output.getvalue()
+
+
+def kast_json(term: KInner) -> str:
+    """Return the same text as `term.to_json()`."""
+    chunks: list[str] = []
+    stack: list[Any] = [term.to_dict()]
+    keys: dict[str, _Text] = {}
+    while stack:
+        item = stack.pop()
+        cls = type(item)
+        if cls is _Text:
+            chunks.append(item)
+        elif cls is str:
+            chunks.append(_encode_string(item))
+        elif cls is dict:
+            chunks.append('{')
+            stack.append(_CLOSE_DICT)
+            separator = None
+            for key in sorted(item, reverse=True):
+                if separator:
+                    stack.append(separator)
+                stack.append(item[key])
+                text = keys.get(key)
+                if text is None:
+                    text = _Text(_encode_string(key) + ': ')
+                    keys[key] = text
+                stack.append(text)
+                separator = _SEPARATOR
+        elif cls is list:
+            chunks.append('[')
+            stack.append(_CLOSE_LIST)
+            separator = None
+            for value in reversed(item):
+                if separator:
+                    stack.append(separator)
+                stack.append(value)
+                separator = _SEPARATOR
+        else:
+            chunks.append(json.dumps(item))
+    return ''.join(chunks)
+
+
+class _Text(str):
+    """Text of the output, as opposed to a JSON string value."""
+
+
+_SEPARATOR: Final = _Text(', ')
+_CLOSE_DICT: Final = _Text('}')
+_CLOSE_LIST: Final = _Text(']')
+
+
+def _children(term: Any) -> tuple:
+    if isinstance(term, KInner):
+        return term.terms
+    return term.patterns
+
+
+def _let_children(term: Any, children: tuple) -> Any:
+    if isinstance(term, KInner):
+        return term.let_terms(children)
+    return term.let_patterns(children)
+
+
+_FIELDS: Final[dict[type, tuple[str, ...]]] = {}
+
+
+def _node(term: KInner | Pattern, children: tuple) -> Hashable:
+    """Return the data of `term` other than its children, e.g. the label and sorts of an application."""
+    cls: Any = type(term)
+    names = _FIELDS.get(cls)
+    if names is None:
+        names = tuple(field.name for field in fields(cls))
+        _FIELDS[cls] = names
+    values = [getattr(term, name) for name in names]
+    if children:
+        # Fields holding children are compared by the traversal itself
+        values = [value for value in values if value is not children and all(value is not c for c in children)]
+    return (cls, *values)
@@ -7,8 +7,11 @@ This library provides a translation from the Wasm binary format to Kast.
 from __future__ import annotations
 
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
 from typing import TYPE_CHECKING
 
+from pyk.kast import KInner
 from wasm import instructions
 from wasm.datatypes import GlobalType, MemoryType, Mutability, TableType, TypeIdx, ValType, addresses
 from wasm.datatypes.element_segment import ElemModeActive, ElemModeDeclarative, ElemModePassive
@@ -16,12 +19,15 @@ from wasm.opcodes import BinaryOpcode
 from wasm.parsers import parse_module
 
 from pykwasm import kwasm_ast as a
+from pykwasm.cache import kast_from_bytes, kast_to_bytes
+from pykwasm.loader import load_wasm
+from pykwasm.prune import FuncStub, prune_funcs
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
-    from typing import IO
+    from collections.abc import Callable, Iterable, Sequence
+    from pathlib import Path
+    from typing import IO, Final
 
-    from pyk.kast import KInner
     from wasm.datatypes import (
         DataSegment,
         ElementSegment,
@@ -40,6 +46,8 @@ if TYPE_CHECKING:
     from wasm.datatypes.element_segment import ElemMode
     from wasm.instructions import BaseInstruction
 
+    from pykwasm.cache import ModuleCache
+
 
 def main():
     if len(list(sys.argv)) == 1:
@@ -57,18 +65,33 @@ def wasm2kast(wasm_bytes: IO[bytes], filename=None) -> KInner:
     return ast2kast(ast, filename=filename)
 
 
-def ast2kast(wasm_ast: Module, filename=None) -> KInner:
-    """Returns a dictionary representing the Kast JSON."""
-    types = a.defns([typ(x) for x in wasm_ast.types])
-    funcs = a.defns([func(x) for x in wasm_ast.funcs])
-    tables = a.defns([table(x) for x in wasm_ast.tables])
-    mems = a.defns([memory(x) for x in wasm_ast.mems])
-    globs = a.defns([glob(x) for x in wasm_ast.globals])
-    elems = a.defns([elem(x) for x in wasm_ast.elem])
-    datas = a.defns([data(x) for x in wasm_ast.data])
+def parse_wasm_file(wasm_file: Path, cache: ModuleCache | None = None) -> Module:
+    """Parse a binary or textual module, see `pykwasm.loader`."""
+    return load_wasm(wasm_file, cache)
+
+
+def ast2kast(wasm_ast: Module, filename=None, workers: int | None = None, prune: bool = False) -> KInner:
+    """Returns a dictionary representing the Kast JSON.
+
+    With `workers` > 1, function bodies are converted in a pool of as many processes. The result does not depend on it.
+    With `prune`, the bodies of functions unreachable from the exports are replaced by `unreachable`, see `pykwasm.prune`.
+    """
+    a.clear_interned()
+    block_ids = BlockIds()
+    fs = prune_funcs(wasm_ast) if prune else wasm_ast.funcs
+    types = a.defns(typ(x) for x in wasm_ast.types)
+    if workers and workers > 1:
+        funcs = a.defns(parallel_funcs(fs, workers, block_ids))
+    else:
+        funcs = a.defns(func(x, block_ids) for x in fs)
+    tables = a.defns(table(x) for x in wasm_ast.tables)
+    mems = a.defns(memory(x) for x in wasm_ast.mems)
+    globs = a.defns(glob(x, block_ids) for x in wasm_ast.globals)
+    elems = a.defns(elem(x, block_ids) for x in wasm_ast.elem)
+    datas = a.defns(data(x, block_ids) for x in wasm_ast.data)
     starts = a.defns(start(wasm_ast.start))
-    imports = a.defns([imp(x) for x in wasm_ast.imports])
-    exports = a.defns([export(x) for x in wasm_ast.exports])
+    imports = a.defns(imp(x) for x in wasm_ast.imports)
+    exports = a.defns(export(x) for x in wasm_ast.exports)
     meta = a.module_metadata(filename=filename)
     return a.module(
         types=types,
@@ -94,14 +117,33 @@ def typ(t: FunctionType):
     return a.type(func_type(t.params, t.results))
 
 
-def func(f: Function):
+def func(f: Function | FuncStub, block_ids: BlockIds | None = None):
     type = a.KInt(f.type_idx)
-    ls_list = [val_type(x) for x in f.locals]
-    locals = a.vec_type(a.val_types(ls_list))
-    body = instrs(f.body)
+    locals = vec_type(f.locals)
+    body = a.instrs([a.UNREACHABLE]) if isinstance(f, FuncStub) else instrs(f.body, block_ids)
     return a.func(type, locals, body)
 
 
+def parallel_funcs(fs: Sequence[Function | FuncStub], workers: int, block_ids: BlockIds) -> list[KInner]:
+    """Convert functions in a pool of `workers` processes, with the same block ids as when converted in order."""
+    chunk_size = max(1, -(-len(fs) // (CHUNKS_PER_WORKER * workers)))
+    chunks = [fs[i : i + chunk_size] for i in range(0, len(fs), chunk_size)]
+    # Block ids are numbered in pre-order over the module, so each chunk starts after the blocks of the previous ones
+    block_counts = (sum(count_blocks(f.body) for f in chunk) for chunk in chunks)
+    first_block_ids = list(accumulate(block_counts, initial=block_ids.next_id))
+    block_ids.next_id = first_block_ids.pop()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_convert_funcs, first_block_ids, chunks)
+        return [kast_from_bytes(data) for datas in results for data in datas]
+
+
+def _convert_funcs(first_block_id: int, fs: Sequence[Function | FuncStub]) -> list[bytes]:
+    a.clear_interned()
+    block_ids = BlockIds(first_block_id)
+    # Deeply nested terms cannot be pickled, the compact encoding of the cache is not recursive
+    return [kast_to_bytes(func(f, block_ids)) for f in fs]
+
+
 def table(t: Table):
     ls = limits(t.type.limits)
     typ = ref_type(t.type.elem_type)
@@ -113,9 +155,9 @@ def memory(m: Memory):
     return a.memory(ls)
 
 
-def glob(g: Global):
+def glob(g: Global, block_ids: BlockIds | None = None):
     t = global_type(g.type)
-    init = instrs(g.init)
+    init = instrs(g.init, block_ids)
     return a.glob(t, init)
 
 
@@ -127,9 +169,9 @@ def ref_type(t: RefType):
     raise ValueError(f'Invalid RefType: {t}')
 
 
-def elem_mode(m: ElemMode) -> KInner:
+def elem_mode(m: ElemMode, block_ids: BlockIds | None = None) -> KInner:
     if isinstance(m, ElemModeActive):
-        offset = instrs(m.offset)
+        offset = instrs(m.offset, block_ids)
         return a.elem_active(m.table, offset)
     if isinstance(m, ElemModeDeclarative):
         return a.elem_declarative()
@@ -153,15 +195,15 @@ def elem_init(init: tuple[Iterable[BaseInstruction], ...]) -> Iterable[int | Non
     return [expr_to_int(e) for e in init]
 
 
-def elem(e: ElementSegment):
+def elem(e: ElementSegment, block_ids: BlockIds | None = None):
     typ = ref_type(e.type)
-    mode = elem_mode(e.mode)
+    mode = elem_mode(e.mode, block_ids)
     init = elem_init(e.init)
     return a.elem(typ, mode, init)
 
 
-def data(d: DataSegment):
-    offset = instrs(d.offset)
+def data(d: DataSegment, block_ids: BlockIds | None = None):
+    offset = instrs(d.offset, block_ids)
     return a.data(d.memory_idx, offset, d.init)
 
 
@@ -196,154 +238,188 @@ def export(e: Export):
 # Instrs #
 ##########
 
-block_id = 0
 
+class BlockIds:
+    """Numbers the blocks of a module in pre-order, one counter per conversion, so that conversions are reentrant."""
+
+    next_id: int
 
-def instrs(iis):
-    """Turn a list of instructions into KAST."""
+    def __init__(self, first_id: int = 0):
+        self.next_id = first_id
+
+    def new_id(self) -> int:
+        res = self.next_id
+        self.next_id += 1
+        return res
+
+
+# Chunks of functions per worker of `parallel_funcs`, more chunks balance the load better if function sizes vary.
+CHUNKS_PER_WORKER: Final = 4
+
+
+def count_blocks(iis: Iterable[BaseInstruction]) -> int:
+    """Return the number of blocks in `iis`, nested blocks included, i.e. the number of block ids `instrs` uses."""
+    res = 0
+    stack = [iis]
+    while stack:
+        for i in stack.pop():
+            if i.opcode in (BinaryOpcode.BLOCK, BinaryOpcode.LOOP):
+                res += 1
+                stack.append(i.instructions)
+            elif i.opcode == BinaryOpcode.IF:
+                res += 1
+                stack.append(i.instructions)
+                stack.append(i.else_instructions)
+    return res
+
+
+def instrs(iis, block_ids: BlockIds | None = None):
+    """Turn a list of instructions into KAST.
+
+    Blocks are numbered by `block_ids`, which is shared by all instructions of a module, or by a new counter.
+    """
+    if block_ids is None:
+        block_ids = BlockIds()
     # We ignore `END`.
     # The AST supplied by py-wasm has already parsed these and terminated the blocks.
     # We also ignore `ELSE`.
     # The AST supplied by py-wasm includes the statements in the else-branch as part of the `IF` instruction.
-    return a.instrs([instr(i) for i in iis if not i.opcode == BinaryOpcode.END and not i.opcode == BinaryOpcode.ELSE])
-
-
-def instr(i):
-    B = BinaryOpcode
-    global block_id
-    # TODO rewrite 'i.opcode == _' conditions as isinstance for better type-checking
-    if i.opcode == B.BLOCK:
-        cur_block_id = block_id
-        block_id += 1
-        iis = instrs(i.instructions)
-        res = vec_type(i.result_type)
-        return a.BLOCK(res, iis, a.KInt(cur_block_id))
-    if i.opcode == B.BR:
-        return a.BR(i.label_idx)
-    if i.opcode == B.BR_IF:
-        return a.BR_IF(i.label_idx)
-    if i.opcode == B.BR_TABLE:
-        return a.BR_TABLE(i.label_indices, i.default_idx)
-    if i.opcode == B.CALL:
-        return a.CALL(i.function_idx)
-    if i.opcode == B.CALL_INDIRECT:
-        return a.CALL_INDIRECT(i.type_idx)
-    if i.opcode == B.ELSE:
-        raise (ValueError('ELSE opcode: should have been filtered out.'))
-    if i.opcode == B.END:
-        raise (ValueError('End opcode: should have been filtered out.'))
-    if i.opcode == B.F32_CONST:
-        return a.F32_CONST(i.value)
-    if i.opcode == B.F64_CONST:
-        return a.F64_CONST(i.value)
-    if i.opcode == B.F32_REINTERPRET_I32:
-        raise (ValueError('Reinterpret instructions not implemented.'))
-    if i.opcode == B.F64_REINTERPRET_I64:
-        raise (ValueError('Reinterpret instructions not implemented.'))
-    if i.opcode == B.GET_GLOBAL:
-        return a.GET_GLOBAL(i.global_idx)
-    if i.opcode == B.GET_LOCAL:
-        return a.GET_LOCAL(i.local_idx)
-    if i.opcode == B.I32_CONST:
-        return a.I32_CONST(i.value)
-    if i.opcode == B.I64_CONST:
-        return a.I64_CONST(i.value)
-    if i.opcode == B.I32_REINTERPRET_F32:
-        raise (ValueError('Reinterpret instructions not implemented.'))
-    if i.opcode == B.I64_REINTERPRET_F64:
-        raise (ValueError('Reinterpret instructions not implemented.'))
-    if i.opcode == B.IF:
-        cur_block_id = block_id
-        block_id += 1
-        thens = instrs(i.instructions)
-        els = instrs(i.else_instructions)
-        res = vec_type(i.result_type)
-        return a.IF(res, thens, els, a.KInt(cur_block_id))
-    if i.opcode == B.F32_STORE:
-        return a.F32_STORE(i.memarg.offset)
-    if i.opcode == B.F64_STORE:
-        return a.F64_STORE(i.memarg.offset)
-    if i.opcode == B.I32_STORE:
-        return a.I32_STORE(i.memarg.offset)
-    if i.opcode == B.I64_STORE:
-        return a.I64_STORE(i.memarg.offset)
-    if i.opcode == B.I32_STORE16:
-        return a.I32_STORE16(i.memarg.offset)
-    if i.opcode == B.I64_STORE16:
-        return a.I64_STORE16(i.memarg.offset)
-    if i.opcode == B.I32_STORE8:
-        return a.I32_STORE8(i.memarg.offset)
-    if i.opcode == B.I64_STORE8:
-        return a.I64_STORE8(i.memarg.offset)
-    if i.opcode == B.I64_STORE32:
-        return a.I64_STORE32(i.memarg.offset)
-    if i.opcode == B.F32_LOAD:
-        return a.F32_LOAD(i.memarg.offset)
-    if i.opcode == B.F64_LOAD:
-        return a.F64_LOAD(i.memarg.offset)
-    if i.opcode == B.I32_LOAD:
-        return a.I32_LOAD(i.memarg.offset)
-    if i.opcode == B.I64_LOAD:
-        return a.I64_LOAD(i.memarg.offset)
-    if i.opcode == B.I32_LOAD16_S:
-        return a.I32_LOAD16_S(i.memarg.offset)
-    if i.opcode == B.I32_LOAD16_U:
-        return a.I32_LOAD16_U(i.memarg.offset)
-    if i.opcode == B.I64_LOAD16_S:
-        return a.I64_LOAD16_S(i.memarg.offset)
-    if i.opcode == B.I64_LOAD16_U:
-        return a.I64_LOAD16_U(i.memarg.offset)
-    if i.opcode == B.I32_LOAD8_S:
-        return a.I32_LOAD8_S(i.memarg.offset)
-    if i.opcode == B.I32_LOAD8_U:
-        return a.I32_LOAD8_U(i.memarg.offset)
-    if i.opcode == B.I64_LOAD8_S:
-        return a.I64_LOAD8_S(i.memarg.offset)
-    if i.opcode == B.I64_LOAD8_U:
-        return a.I64_LOAD8_U(i.memarg.offset)
-    if i.opcode == B.I64_LOAD32_S:
-        return a.I64_LOAD32_S(i.memarg.offset)
-    if i.opcode == B.I64_LOAD32_U:
-        return a.I64_LOAD32_U(i.memarg.offset)
-    if i.opcode == B.LOOP:
-        cur_block_id = block_id
-        block_id += 1
-        iis = instrs(i.instructions)
-        res = vec_type(i.result_type)
-        return a.LOOP(res, iis, a.KInt(cur_block_id))
-    if i.opcode == B.SET_GLOBAL:
-        return a.SET_GLOBAL(i.global_idx)
-    if i.opcode == B.SET_LOCAL:
-        return a.SET_LOCAL(i.local_idx)
-    if i.opcode == B.TEE_LOCAL:
-        return a.TEE_LOCAL(i.local_idx)
-    if isinstance(i, instructions.RefFunc):
-        return a.REF_FUNC(i.funcidx)
-    if isinstance(i, instructions.RefNull):
-        if i.reftype is addresses.FunctionAddress:
-            return a.REF_NULL('func')
-        if i.reftype is addresses.ExternAddress:
-            return a.REF_NULL('extern')
-        raise ValueError(f'Unknown heap type: {i}, {i.reftype}')
-    if isinstance(i, instructions.TableGet):
-        return a.TABLE_GET(i.tableidx)
-    if isinstance(i, instructions.TableSet):
-        return a.TABLE_SET(i.tableidx)
-    if isinstance(i, instructions.TableInit):
-        return a.TABLE_INIT(i.tableidx, i.elemidx)
-    if isinstance(i, instructions.ElemDrop):
-        return a.ELEM_DROP(i.elemidx)
-    if isinstance(i, instructions.TableCopy):
-        return a.TABLE_COPY(i.tableidx1, i.tableidx2)
-    if isinstance(i, instructions.TableGrow):
-        return a.TABLE_GROW(i.tableidx)
-    if isinstance(i, instructions.TableSize):
-        return a.TABLE_SIZE(i.tableidx)
-    if isinstance(i, instructions.TableFill):
-        return a.TABLE_FILL(i.tableidx)
-
-    # Catch all for operations without direct arguments.
-    return eval('a.' + i.opcode.name)
+    return a.instrs(
+        instr(i, block_ids) for i in iis if not i.opcode == BinaryOpcode.END and not i.opcode == BinaryOpcode.ELSE
+    )
+
+
+def instr(i, block_ids: BlockIds | None = None):
+    """Turn an instruction into KAST, dispatching on its opcode."""
+    opcode = i.opcode
+    term = _CONST_INSTRS.get(opcode)
+    if term is not None:
+        return term
+    block_handler = _BLOCK_HANDLERS.get(opcode)
+    if block_handler is not None:
+        return block_handler(i, BlockIds() if block_ids is None else block_ids)
+    handler = _INSTR_HANDLERS.get(opcode) or _INSTR_TYPE_HANDLERS.get(type(i))
+    if handler is not None:
+        return handler(i)
+    for cls, handler in _INSTR_TYPE_HANDLERS.items():
+        if isinstance(i, cls):
+            return handler(i)
+    raise ValueError(f'Unknown instruction: {i}')
+
+
+def _block(i, block_ids: BlockIds):
+    cur_block_id = block_ids.new_id()
+    iis = instrs(i.instructions, block_ids)
+    res = vec_type(i.result_type)
+    return a.BLOCK(res, iis, a.KInt(cur_block_id))
+
+
+def _if(i, block_ids: BlockIds):
+    cur_block_id = block_ids.new_id()
+    thens = instrs(i.instructions, block_ids)
+    els = instrs(i.else_instructions, block_ids)
+    res = vec_type(i.result_type)
+    return a.IF(res, thens, els, a.KInt(cur_block_id))
+
+
+def _loop(i, block_ids: BlockIds):
+    cur_block_id = block_ids.new_id()
+    iis = instrs(i.instructions, block_ids)
+    res = vec_type(i.result_type)
+    return a.LOOP(res, iis, a.KInt(cur_block_id))
+
+
+def _ref_null(i):
+    if i.reftype is addresses.FunctionAddress:
+        return a.REF_NULL('func')
+    if i.reftype is addresses.ExternAddress:
+        return a.REF_NULL('extern')
+    raise ValueError(f'Unknown heap type: {i}, {i.reftype}')
+
+
+def _unsupported(message: str) -> Callable[[BaseInstruction], KInner]:
+    def handler(i):
+        raise ValueError(message)
+
+    return handler
+
+
+# Instructions with nested instructions, by opcode. Their handlers number the blocks.
+_BLOCK_HANDLERS: Final[dict[BinaryOpcode, Callable[[BaseInstruction, BlockIds], KInner]]] = {
+    BinaryOpcode.BLOCK: _block,
+    BinaryOpcode.IF: _if,
+    BinaryOpcode.LOOP: _loop,
+}
+
+# Instructions with immediates, by opcode.
+_INSTR_HANDLERS: Final[dict[BinaryOpcode, Callable[[BaseInstruction], KInner]]] = {
+    BinaryOpcode.BR: lambda i: a.BR(i.label_idx),
+    BinaryOpcode.BR_IF: lambda i: a.BR_IF(i.label_idx),
+    BinaryOpcode.BR_TABLE: lambda i: a.BR_TABLE(i.label_indices, i.default_idx),
+    BinaryOpcode.CALL: lambda i: a.CALL(i.function_idx),
+    BinaryOpcode.CALL_INDIRECT: lambda i: a.CALL_INDIRECT(i.type_idx),
+    BinaryOpcode.ELSE: _unsupported('ELSE opcode: should have been filtered out.'),
+    BinaryOpcode.END: _unsupported('End opcode: should have been filtered out.'),
+    BinaryOpcode.F32_CONST: lambda i: a.F32_CONST(i.value),
+    BinaryOpcode.F64_CONST: lambda i: a.F64_CONST(i.value),
+    BinaryOpcode.F32_REINTERPRET_I32: _unsupported('Reinterpret instructions not implemented.'),
+    BinaryOpcode.F64_REINTERPRET_I64: _unsupported('Reinterpret instructions not implemented.'),
+    BinaryOpcode.GET_GLOBAL: lambda i: a.GET_GLOBAL(i.global_idx),
+    BinaryOpcode.GET_LOCAL: lambda i: a.GET_LOCAL(i.local_idx),
+    BinaryOpcode.I32_CONST: lambda i: a.I32_CONST(i.value),
+    BinaryOpcode.I64_CONST: lambda i: a.I64_CONST(i.value),
+    BinaryOpcode.I32_REINTERPRET_F32: _unsupported('Reinterpret instructions not implemented.'),
+    BinaryOpcode.I64_REINTERPRET_F64: _unsupported('Reinterpret instructions not implemented.'),
+    BinaryOpcode.F32_STORE: lambda i: a.F32_STORE(i.memarg.offset),
+    BinaryOpcode.F64_STORE: lambda i: a.F64_STORE(i.memarg.offset),
+    BinaryOpcode.I32_STORE: lambda i: a.I32_STORE(i.memarg.offset),
+    BinaryOpcode.I64_STORE: lambda i: a.I64_STORE(i.memarg.offset),
+    BinaryOpcode.I32_STORE16: lambda i: a.I32_STORE16(i.memarg.offset),
+    BinaryOpcode.I64_STORE16: lambda i: a.I64_STORE16(i.memarg.offset),
+    BinaryOpcode.I32_STORE8: lambda i: a.I32_STORE8(i.memarg.offset),
+    BinaryOpcode.I64_STORE8: lambda i: a.I64_STORE8(i.memarg.offset),
+    BinaryOpcode.I64_STORE32: lambda i: a.I64_STORE32(i.memarg.offset),
+    BinaryOpcode.F32_LOAD: lambda i: a.F32_LOAD(i.memarg.offset),
+    BinaryOpcode.F64_LOAD: lambda i: a.F64_LOAD(i.memarg.offset),
+    BinaryOpcode.I32_LOAD: lambda i: a.I32_LOAD(i.memarg.offset),
+    BinaryOpcode.I64_LOAD: lambda i: a.I64_LOAD(i.memarg.offset),
+    BinaryOpcode.I32_LOAD16_S: lambda i: a.I32_LOAD16_S(i.memarg.offset),
+    BinaryOpcode.I32_LOAD16_U: lambda i: a.I32_LOAD16_U(i.memarg.offset),
+    BinaryOpcode.I64_LOAD16_S: lambda i: a.I64_LOAD16_S(i.memarg.offset),
+    BinaryOpcode.I64_LOAD16_U: lambda i: a.I64_LOAD16_U(i.memarg.offset),
+    BinaryOpcode.I32_LOAD8_S: lambda i: a.I32_LOAD8_S(i.memarg.offset),
+    BinaryOpcode.I32_LOAD8_U: lambda i: a.I32_LOAD8_U(i.memarg.offset),
+    BinaryOpcode.I64_LOAD8_S: lambda i: a.I64_LOAD8_S(i.memarg.offset),
+    BinaryOpcode.I64_LOAD8_U: lambda i: a.I64_LOAD8_U(i.memarg.offset),
+    BinaryOpcode.I64_LOAD32_S: lambda i: a.I64_LOAD32_S(i.memarg.offset),
+    BinaryOpcode.I64_LOAD32_U: lambda i: a.I64_LOAD32_U(i.memarg.offset),
+    BinaryOpcode.SET_GLOBAL: lambda i: a.SET_GLOBAL(i.global_idx),
+    BinaryOpcode.SET_LOCAL: lambda i: a.SET_LOCAL(i.local_idx),
+    BinaryOpcode.TEE_LOCAL: lambda i: a.TEE_LOCAL(i.local_idx),
+}
+
+# Reference and table instructions, by instruction class.
+_INSTR_TYPE_HANDLERS: Final[dict[type, Callable[[BaseInstruction], KInner]]] = {
+    instructions.RefFunc: lambda i: a.REF_FUNC(i.funcidx),
+    instructions.RefNull: _ref_null,
+    instructions.TableGet: lambda i: a.TABLE_GET(i.tableidx),
+    instructions.TableSet: lambda i: a.TABLE_SET(i.tableidx),
+    instructions.TableInit: lambda i: a.TABLE_INIT(i.tableidx, i.elemidx),
+    instructions.ElemDrop: lambda i: a.ELEM_DROP(i.elemidx),
+    instructions.TableCopy: lambda i: a.TABLE_COPY(i.tableidx1, i.tableidx2),
+    instructions.TableGrow: lambda i: a.TABLE_GROW(i.tableidx),
+    instructions.TableSize: lambda i: a.TABLE_SIZE(i.tableidx),
+    instructions.TableFill: lambda i: a.TABLE_FILL(i.tableidx),
+}
+
+# Operations without direct arguments are constants of `kwasm_ast` with the name of their opcode.
+_CONST_INSTRS: Final[dict[BinaryOpcode, KInner]] = {
+    opcode: term
+    for opcode in BinaryOpcode
+    if opcode not in _INSTR_HANDLERS
+    and opcode not in _BLOCK_HANDLERS
+    and isinstance(term := getattr(a, opcode.name, None), KInner)
+}
 
 
 ########
@@ -368,8 +444,7 @@ def val_type(t: ValType):
 
 
 def vec_type(ts: Iterable[ValType]):
-    _ts = [val_type(x) for x in ts]
-    return a.vec_type(a.val_types(_ts))
+    return a.vec_type(a.val_types(val_type(x) for x in ts))
 
 
 def func_type(params, results):
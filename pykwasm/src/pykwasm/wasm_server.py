@@ -0,0 +1,183 @@
+"""
+This library provides a long-lived execution service for Wasm modules.
+
+The Kast of the kompiled definition is loaded and the initial configuration is converted to Kore once,
+then any number of (module, configuration substitution) jobs are served over a JSON lines protocol.
+
+Request:  {"id": 1, "wasm": "path/to/module.wasm", "args": ["-gas:Int=100000", ...]}
+Response: {"id": 1, "returncode": 0, "stdout": "...", "stderr": "...", "latency": {"load": ..., ...}, "engine": "..."}
+
+The latency is reported for each phase of the job: `load`, `ast2kast`, `kast_to_kore`, `instantiate` and `run`.
+For a module found in the cache, `load` is the lookup and there is no `ast2kast`.
+
+Jobs are run in the server process by the Python extension of the definition, see `pykwasm.in_process`, which is
+loaded once. It is taken from `--runtime <dir>`, or else from the kdist runtime target of the definition, e.g.
+`wasm-semantics.llvm-runtime` for `wasm-semantics.llvm`, if it is built. Without a runtime, or with `--subprocess`, each
+job is run by a new process of the `interpreter` binary of the definition, which loads the definition again: the startup
+cost of the interpreter is paid on every job. The response reports the engine that ran the job, `in-process` or
+`subprocess`.
+
+With `--snapshot`, each module is instantiated once, and jobs resume from a snapshot of its configuration, see
+`pykwasm.snapshot`. The response then also reports `steps_saved`, the rewrite steps of the instantiation, if they were
+counted when the snapshot was taken, i.e. by `wasm --snapshot --profile`.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from pyk.kdist import kdist
+from pyk.ktool.krun import KRun
+
+from .cache import CACHE_DIR_ENV, ModuleCache
+from .config_template import ConfigTemplate
+from .engine import SubprocessEngine
+from .profiling import Profile
+from .run_wasm import build_config, load_module, parse_config_subst, resume_config
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import IO, Any, Final
+
+    from pyk.kore.syntax import Pattern
+
+    from .in_process import InProcessEngine
+
+
+# The kdist runtime target of each definition that has one
+RUNTIME_TARGETS: Final = {
+    'wasm-semantics.llvm': 'wasm-semantics.llvm-runtime',
+    'wasm-semantics.ulm-wasm-test': 'wasm-semantics.ulm-wasm-test-runtime',
+}
+
+
+def default_runtime_dir(llvm_dir: Path) -> Path | None:
+    """Return the directory of the built runtime target of the kdist definition in `llvm_dir`, if there is one."""
+    for definition, runtime in RUNTIME_TARGETS.items():
+        if kdist.which(definition).resolve() == llvm_dir.resolve():
+            runtime_dir = kdist.which(runtime)
+            return runtime_dir if runtime_dir.is_dir() else None
+    return None
+
+
+class JobResult(NamedTuple):
+    returncode: int
+    stdout: str
+    stderr: str
+    latency: dict[str, float]
+    steps_saved: int | None = None
+    engine: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        res = {'returncode': self.returncode, 'stdout': self.stdout, 'stderr': self.stderr, 'latency': self.latency}
+        if self.steps_saved is not None:
+            res['steps_saved'] = self.steps_saved
+        if self.engine is not None:
+            res['engine'] = self.engine
+        return res
+
+
+class WasmServer:
+    runner: KRun
+    template: ConfigTemplate
+    engine: SubprocessEngine | InProcessEngine
+    cache: ModuleCache | None
+    snapshot: bool
+
+    def __init__(
+        self,
+        llvm_dir: Path,
+        cache: ModuleCache | None = None,
+        *,
+        snapshot: bool = False,
+        runtime_dir: Path | None = None,
+        subprocess: bool = False,
+    ):
+        """Create a server for the definition in `llvm_dir`.
+
+        Jobs run in process on `runtime_dir`, or on the runtime of the definition found by `default_runtime_dir`.
+        With `subprocess`, or if there is no runtime, they run in a new interpreter process each.
+        """
+        if snapshot and cache is None:
+            raise ValueError(f'Snapshots are stored in the module cache, set {CACHE_DIR_ENV}')
+        self.runner = KRun(llvm_dir)
+        self.template = ConfigTemplate(self.runner)
+        if runtime_dir is None and not subprocess:
+            runtime_dir = default_runtime_dir(llvm_dir)
+        if runtime_dir is None or subprocess:
+            self.engine = SubprocessEngine(llvm_dir)
+        else:
+            # Imported only here, as it loads the LLVM backend
+            from .in_process import InProcessEngine
+
+            self.engine = InProcessEngine(runtime_dir)
+        self.cache = cache
+        self.snapshot = snapshot
+
+    def run(self, wasm_file: Path, args: Iterable[str] = ()) -> JobResult:
+        """Run a single module, `args` are substitutions of the form `-cellname:sort=cellvalue`."""
+        profile = Profile(count_objects=False)
+        config_subst = parse_config_subst(list(args))
+        config_kore: Pattern | str
+        if self.snapshot:
+            assert self.cache is not None
+            config_kore, _ = resume_config(self.template, wasm_file, config_subst, self.cache, profile=profile)
+        else:
+            module = load_module(wasm_file, self.cache, profile=profile)
+            config_kore = build_config(self.template, module, config_subst, profile=profile)
+        with profile.phase('run'):
+            proc_data = self.engine.run(config_kore)
+        latency = profile.latency()
+        steps_saved = profile.metrics.get('steps_saved')
+        return JobResult(
+            proc_data.returncode, proc_data.stdout, proc_data.stderr, latency, steps_saved, self.engine.NAME
+        )
+
+    def serve(self, input: IO[str], output: IO[str]) -> None:
+        """Serve requests from `input` until it is closed, one JSON object per line."""
+        for line in input:
+            if not line.strip():
+                continue
+            response: dict[str, Any]
+            job_id = None
+            try:
+                request = json.loads(line)
+                job_id = request.get('id')
+                result = self.run(Path(request['wasm']), request.get('args', ()))
+                response = {'id': job_id} | result.to_dict()
+            except Exception as err:
+                response = {'id': job_id, 'error': f'{type(err).__name__}: {err}'}
+            output.write(json.dumps(response) + '\n')
+            output.flush()
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    snapshot = '--snapshot' in args
+    if snapshot:
+        args.remove('--snapshot')
+    subprocess = '--subprocess' in args
+    if subprocess:
+        args.remove('--subprocess')
+    runtime_dir = None
+    if '--runtime' in args:
+        idx = args.index('--runtime')
+        runtime_dir = Path(args[idx + 1]) if idx + 1 < len(args) else None
+        del args[idx : idx + 2]
+        if runtime_dir is None:
+            args = []
+    if len(args) != 1 or (subprocess and runtime_dir is not None):
+        print('usage: wasm-server [--snapshot] [--runtime <runtime_dir> | --subprocess] <llvm_dir>', file=sys.stderr)
+        sys.exit(1)
+
+    server = WasmServer(
+        Path(args[0]), ModuleCache.from_env(), snapshot=snapshot, runtime_dir=runtime_dir, subprocess=subprocess
+    )
+    server.serve(sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
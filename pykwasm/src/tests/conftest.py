@@ -20,6 +20,12 @@ def pytest_addoption(parser: Parser) -> None:
         type=dir_path,
         help='Existing LLVM kompiled directory.',
     )
+    parser.addoption(
+        '--ulm-dir',
+        dest='ulm_dir',
+        type=dir_path,
+        help='Existing ULM Wasm test kompiled directory.',
+    )
 
 
 @pytest.fixture(scope='session')
@@ -37,3 +43,20 @@ def krun_llvm(llvm_dir: Path | None) -> KRun:
         raise ValueError('LLVM definition not found. Run make from the repository root, or pass --llvm-dir')
 
     return KRun(llvm_dir)
+
+
+@pytest.fixture(scope='session')
+def ulm_dir(pytestconfig: Config) -> Path | None:
+    return pytestconfig.getoption('ulm_dir')
+
+
+@pytest.fixture(scope='session')
+def krun_ulm(ulm_dir: Path | None) -> KRun:
+    if ulm_dir is not None:
+        return KRun(ulm_dir)
+
+    ulm_dir = kdist.which('wasm-semantics.ulm-wasm-test')
+    if not ulm_dir.is_dir():
+        raise ValueError('ULM Wasm test definition not found. Run make from the repository root, or pass --ulm-dir')
+
+    return KRun(ulm_dir)
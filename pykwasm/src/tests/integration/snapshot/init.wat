@@ -0,0 +1,12 @@
+(module
+  (memory 1)
+  (data (i32.const 0) "kwasm")
+  (global $count (mut i32) (i32.const 0))
+  (table 1 funcref)
+  (elem (i32.const 0) $incr)
+  (func $incr
+    (global.set $count (i32.add (global.get $count) (i32.const 1))))
+  (func (export "init")
+    (call $incr)
+    (call_indirect (i32.const 0))
+    (i32.store (i32.const 8) (global.get $count))))
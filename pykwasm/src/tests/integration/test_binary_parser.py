@@ -1,16 +1,26 @@
 from __future__ import annotations
 
-import sys
-from io import BytesIO
+from io import BytesIO, StringIO
 from pathlib import Path
 from subprocess import run
 from typing import TYPE_CHECKING
 
 import pytest
-from pyk.kast.inner import KSequence, KSort, Subst
+from pyk.kast.inner import KSequence, Subst
 from pyk.kast.manip import split_config_from
-
-from pykwasm.wasm2kast import wasm2kast
+from pyk.kore.parser import KoreParser
+from pyk.kore.syntax import App
+
+from pykwasm import wasm2kast as w
+from pykwasm.ast2kore import KoreEmitter
+from pykwasm.config_template import MODULE_SORT, TOP_SORT, ConfigTemplate
+from pykwasm.interpreter import run_interpreter
+from pykwasm.kore_binary import binary_to_pattern, pattern_to_binary
+from pykwasm.kore_scan import find_apps
+from pykwasm.kore_writer import write_pattern
+from pykwasm.prune import exported_funcs, reachable_funcs
+from pykwasm.results import cell_symbol
+from pykwasm.traversal import equal, kore_text
 
 if TYPE_CHECKING:
     from pyk.kast import KInner
@@ -18,42 +28,131 @@ if TYPE_CHECKING:
 
 
 BINARY_DIR = Path(__file__).parent / 'binary'
-BINARY_WAT_FILES = BINARY_DIR.glob('*.wat')
+BINARY_WAT_FILES = sorted(BINARY_DIR.glob('*.wat'))
 
-sys.setrecursionlimit(1500000000)
+INSTRS_CELL = cell_symbol('instrs')
 
 
-@pytest.mark.parametrize('wat_path', BINARY_WAT_FILES, ids=str)
-def test_wasm2kast(krun_llvm: KRun, wat_path: Path) -> None:
-    # Given
+@pytest.fixture(scope='module')
+def config_template(krun_llvm: KRun) -> ConfigTemplate:
+    return ConfigTemplate(krun_llvm)
+
+
+def parse_wat(wat_path: Path) -> KInner:
     wat2wasm_cmd = ['wat2wasm', str(wat_path), '--output=/dev/stdout']
     proc_res = run(wat2wasm_cmd, check=True, capture_output=True)
-    wasm_file = BytesIO(proc_res.stdout)
-
     assert not proc_res.returncode
+    return w.wasm2kast(BytesIO(proc_res.stdout))
+
+
+@pytest.mark.parametrize('wat_path', BINARY_WAT_FILES, ids=str)
+def test_wasm2kast(krun_llvm: KRun, config_template: ConfigTemplate, wat_path: Path) -> None:
+    # Given
+    module = parse_wat(wat_path)
+
+    # Then
+    run_module(krun_llvm, config_template, module)
+
+
+def test_config_template(krun_llvm: KRun, config_template: ConfigTemplate) -> None:
+    # Given
+    module = parse_wat(next(BINARY_DIR.glob('*.wat')))
+    config_kast = krun_llvm.definition.init_config(TOP_SORT)
+    symbolic_config, init_subst = split_config_from(config_kast)
+    init_subst['K_CELL'] = KSequence(module)
+    expected = krun_llvm.kast_to_kore(Subst(init_subst)(symbolic_config), TOP_SORT)
 
     # When
-    module = wasm2kast(wasm_file)
+    actual = config_template.instantiate(krun_llvm.kast_to_kore(module, MODULE_SORT), {})
 
     # Then
-    run_module(krun_llvm, module)
+    assert equal(actual, expected)
 
 
-def run_module(krun: KRun, parsed_module: KInner) -> None:
-    try:
-        # Create an initial config
-        config_kast = krun.definition.init_config(KSort('GeneratedTopCell'))
+@pytest.mark.parametrize('wat_path', BINARY_WAT_FILES, ids=str)
+def test_ast2kore(krun_llvm: KRun, wat_path: Path) -> None:
+    # Given
+    wasm_ast = w.parse_wasm_file(wat_path)
+    expected = krun_llvm.kast_to_kore(w.ast2kast(wasm_ast), MODULE_SORT)
+
+    # When
+    actual = KoreEmitter(krun_llvm.definition).module(wasm_ast)
+
+    # Then
+    assert equal(actual, expected)
+
+
+@pytest.mark.parametrize('wat_path', BINARY_WAT_FILES, ids=str)
+def test_ast2kast_parallel(wat_path: Path) -> None:
+    # Given
+    wasm_ast = w.parse_wasm_file(wat_path)
+    expected = w.ast2kast(wasm_ast)
+
+    # When
+    actual = w.ast2kast(wasm_ast, workers=2)
+
+    # Then
+    assert equal(actual, expected)
+
+
+@pytest.mark.parametrize('wat_path', BINARY_WAT_FILES, ids=str)
+def test_prune(krun_llvm: KRun, config_template: ConfigTemplate, wat_path: Path) -> None:
+    # Given
+    wasm_ast = w.parse_wasm_file(wat_path)
 
-        # Embed parsed_module to <k>
-        symbolic_config, init_subst = split_config_from(config_kast)
-        init_subst['K_CELL'] = KSequence(parsed_module)
-        config_with_module = Subst(init_subst)(symbolic_config)
+    # When
+    reachable = reachable_funcs(wasm_ast)
+    module = w.ast2kast(wasm_ast, prune=True)
+
+    # Then
+    assert set(exported_funcs(wasm_ast)) <= reachable
+    run_module(krun_llvm, config_template, module)
+
+
+@pytest.mark.parametrize('wat_path', BINARY_WAT_FILES, ids=str)
+def test_binary_kore(krun_llvm: KRun, config_template: ConfigTemplate, wat_path: Path) -> None:
+    # Given
+    module = w.ast2kast(w.parse_wasm_file(wat_path))
+    config_kore = config_template.instantiate(krun_llvm.kast_to_kore(module, MODULE_SORT), {})
+
+    for depth in (0, None):
+        # When
+        expected = run_interpreter(krun_llvm.definition_dir, config_kore, depth=depth)
+        actual = run_interpreter(krun_llvm.definition_dir, config_kore, depth=depth, binary=True)
+
+        # Then
+        assert expected.returncode == 0, expected.stderr
+        assert actual.returncode == 0, actual.stderr
+        assert actual.stdout == expected.stdout
+
+
+@pytest.mark.parametrize('wat_path', BINARY_WAT_FILES, ids=str)
+def test_binary_kore_round_trip(krun_llvm: KRun, config_template: ConfigTemplate, wat_path: Path) -> None:
+    # Given
+    module = w.ast2kast(w.parse_wasm_file(wat_path))
+    config_kore = config_template.instantiate(krun_llvm.kast_to_kore(module, MODULE_SORT), {})
+    expected = StringIO()
+    write_pattern(config_kore, expected)
+
+    # When
+    actual = kore_text(binary_to_pattern(pattern_to_binary(config_kore)))
+
+    # Then
+    assert actual == expected.getvalue()
+
+
+def run_module(krun: KRun, config_template: ConfigTemplate, parsed_module: KInner) -> None:
+    try:
+        # Embed parsed_module to <k> of the initial config
+        config_kore = config_template.instantiate(krun.kast_to_kore(parsed_module, MODULE_SORT), {})
 
-        # Convert the config to kore
-        config_kore = krun.kast_to_kore(config_with_module, KSort('GeneratedTopCell'))
+        # Run the config, the output is not parsed back as a whole, as it contains the module
+        proc_res = run_interpreter(krun.definition_dir, config_kore)
+        assert proc_res.returncode == 0, proc_res.stderr
 
-        # Run the config
-        krun.run_pattern(config_kore)
+        # The run is not stuck: all instructions were executed
+        instrs = find_apps(proc_res.stdout, [INSTRS_CELL])[INSTRS_CELL]
+        assert KoreParser(instrs).pattern() == App(INSTRS_CELL, (), (App('dotk'),))
 
     except Exception as e:
         raise Exception('Received error while running') from e
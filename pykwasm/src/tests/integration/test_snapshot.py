@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pykwasm.cache import ModuleCache
+from pykwasm.config_template import ConfigTemplate
+from pykwasm.interpreter import run_interpreter
+from pykwasm.run_wasm import build_config, load_module, parse_config_subst, resume_config
+
+if TYPE_CHECKING:
+    from typing import Final
+
+    from pyk.ktool.krun import KRun
+
+
+SNAPSHOT_WAT: Final = Path(__file__).parent / 'snapshot' / 'init.wat'
+ARGS: Final = ('-gas:Int=100000', '-entry:WasmString="init"', '-create:Bool=true')
+
+
+def test_resume(krun_ulm: KRun, tmp_path: Path) -> None:
+    # Given
+    template = ConfigTemplate(krun_ulm)
+    cache = ModuleCache(tmp_path / 'cache')
+    config_subst = parse_config_subst(ARGS)
+    cold_config = build_config(template, load_module(SNAPSHOT_WAT), config_subst)
+    expected = run_interpreter(krun_ulm.definition_dir, cold_config)
+
+    # When
+    resumed_config, snapshot = resume_config(template, SNAPSHOT_WAT, config_subst, cache)
+    cached_config, cached_snapshot = resume_config(template, SNAPSHOT_WAT, config_subst, cache)
+    actual = run_interpreter(krun_ulm.definition_dir, resumed_config)
+
+    # Then
+    assert expected.returncode == 0, expected.stderr
+    assert actual.returncode == 0, actual.stderr
+    assert cached_snapshot == snapshot
+    assert cached_config == resumed_config
+    assert actual.stdout == expected.stdout
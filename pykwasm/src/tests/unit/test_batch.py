@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pykwasm.batch import find_programs, run_many
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture
+def fake_krun(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # A `krun` that outputs its preprocessed input, or fails on a program that contains `fail`
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    krun = bin_dir / 'krun'
+    krun.write_text('#!/bin/sh\nif grep -q fail "$1"; then echo failed >&2; exit 2; fi\ncat "$1"\n')
+    krun.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}:/usr/bin:/bin')
+    return tmp_path
+
+
+def test_find_programs(tmp_path: Path) -> None:
+    # Given
+    for name in ['b.wast', 'a.wast', 'c.wat']:
+        (tmp_path / name).write_text('')
+
+    # When
+    actual = find_programs([str(tmp_path / 'c.wat'), str(tmp_path / '*.wast'), str(tmp_path / 'a.wast')])
+
+    # Then
+    assert actual == [tmp_path / 'c.wat', tmp_path / 'a.wast', tmp_path / 'b.wast']
+
+
+def test_find_programs_no_match(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        find_programs([str(tmp_path / '*.wast')])
+
+
+def test_run_many(fake_krun: Path) -> None:
+    # Given
+    programs = []
+    for i in range(6):
+        program = fake_krun / f'{i}.wast'
+        program.write_text('(f32.const 0x1p1)' if i != 3 else 'fail')
+        programs.append(program)
+
+    # When
+    results = list(run_many(programs, definition_dir=fake_krun, workers=2, expected='  (f32.const 2.000000e+00)\n'))
+
+    # Then
+    assert sorted(res.program for res in results) == sorted(programs)
+    by_program = {res.program.name: res for res in results}
+    assert by_program['3.wast'].returncode == 2
+    assert by_program['3.wast'].stderr == 'failed\n'
+    assert by_program['3.wast'].passed is False
+    assert all(res.returncode == 0 and res.passed for name, res in by_program.items() if name != '3.wast')
+    assert all(res.seconds >= 0 for res in results)
+    assert json.loads(json.dumps(by_program['0.wast'].to_dict()))['passed'] is True
+
+
+def test_run_many_unreadable_program(fake_krun: Path) -> None:
+    # Given
+    program = fake_krun / 'binary.wast'
+    program.write_bytes(b'\xff\xfe')
+
+    # When
+    (res,) = run_many([program], definition_dir=fake_krun, workers=1)
+
+    # Then
+    assert res.program == program
+    assert res.returncode == 1
+    assert res.stderr.startswith('UnicodeDecodeError')
+    assert res.passed is None
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pykwasm.benchmark import Measurement, append_history, read_history, regressions
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_regressions(tmp_path: Path) -> None:
+    # Given
+    history_file = tmp_path / 'history.jsonl'
+    append_history(history_file, [Measurement('writer', 'a', 10, 1.0), Measurement('writer', 'b', 10, 1.0)], 'c1')
+    append_history(history_file, [Measurement('writer', 'a', 10, 2.0)], 'c2')
+    measurements = [
+        Measurement('writer', 'a', 10, 2.1),
+        Measurement('writer', 'b', 10, 1.2),
+        Measurement('writer', 'b', 20, 5.0),
+    ]
+
+    # When
+    from_c2 = regressions(read_history(history_file), measurements, 'c3', 0.1)
+    from_c1 = regressions(read_history(history_file), measurements, 'c2', 0.1)
+
+    # Then
+    assert from_c2 == [(measurements[1], 1.0)]
+    assert from_c1 == [(measurements[0], 1.0), (measurements[1], 1.0)]
+
+
+def test_read_missing_history(tmp_path: Path) -> None:
+    assert read_history(tmp_path / 'history.jsonl') == []
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+from pyk.kast.inner import KApply, KLabel, KSequence, KToken, KVariable
+
+from pykwasm import kwasm_ast as a
+from pykwasm.cache import ModuleCache, kast_from_bytes, kast_to_bytes
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pyk.kast import KInner
+
+
+KAST_TEST_DATA: tuple[KInner, ...] = (
+    a.KInt(42),
+    a.EMPTY_DEFNS,
+    a.I32_ADD,
+    KSequence([a.I32_CONST(1), KVariable('REST', 'K')]),
+    KSequence([]),
+    a.module(
+        funcs=a.defns([a.func(a.KInt(0), a.vec_type(a.val_types([a.i32])), a.instrs([a.I32_CONST(3), a.DROP]))]),
+        data=a.defns([a.data(0, a.instrs([a.I32_CONST(0)]), b'\x00foo"\xff')]),
+        exports=a.defns([a.export(a.wasm_string('main'), 0)]),
+    ),
+)
+
+
+@pytest.mark.parametrize('term', KAST_TEST_DATA, ids=str)
+def test_kast_roundtrip(term: KInner) -> None:
+    # When
+    actual = kast_from_bytes(kast_to_bytes(term))
+
+    # Then
+    assert actual == term
+
+
+def test_kast_roundtrip_deep() -> None:
+    # Given
+    n = 100_000
+    term = a.instrs([a.I32_CONST(i) for i in range(n)])
+
+    # When
+    actual = kast_from_bytes(kast_to_bytes(term))
+
+    # Then
+    depth = 0
+    while isinstance(actual, KApply) and actual.arity == 2:
+        assert actual.args[0] == a.I32_CONST(depth)
+        actual = actual.args[1]
+        depth += 1
+    assert depth == n
+    assert actual == a.EMPTY_DEFNS
+
+
+def test_kast_parametric_label() -> None:
+    with pytest.raises(ValueError):
+        kast_to_bytes(KApply(KLabel('inj', ['Int', 'K']), [KToken('0', 'Int')]))
+
+
+def test_cache_hit_miss(tmp_path: Path) -> None:
+    # Given
+    cache = ModuleCache(tmp_path)
+    key = cache.key(b'\0asm', 'kast')
+
+    # When
+    miss = cache.get_kast(key)
+    cache.put_kast(key, a.I32_ADD)
+    hit = cache.get_kast(key)
+
+    # Then
+    assert miss is None
+    assert hit == a.I32_ADD
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.stats()['entries'] == 1
+
+
+def test_cache_key() -> None:
+    assert ModuleCache.key(b'foo', 'kast') == ModuleCache.key(b'foo', 'kast')
+    assert ModuleCache.key(b'foo', 'kast') != ModuleCache.key(b'bar', 'kast')
+    assert ModuleCache.key(b'foo', 'kast') != ModuleCache.key(b'foo', 'kore')
+
+
+def test_cache_lru_eviction(tmp_path: Path) -> None:
+    # Given
+    cache = ModuleCache(tmp_path, max_size=2500)
+    data = {key: os.urandom(1000) for key in ('a', 'b', 'c')}
+
+    # When
+    cache.put('kore', 'a', data['a'])
+    cache.put('kore', 'b', data['b'])
+    os.utime(cache.cache_dir / 'kore' / 'a' / 'a', (0, 0))
+    os.utime(cache.cache_dir / 'kore' / 'b' / 'b', (1, 1))
+    assert cache.get('kore', 'a') == data['a']  # refreshes 'a'
+    cache.put('kore', 'c', data['c'])
+
+    # Then
+    assert cache.size() <= cache.max_size
+    assert cache.get('kore', 'a') == data['a']
+    assert cache.get('kore', 'b') is None
+    assert cache.get('kore', 'c') == data['c']
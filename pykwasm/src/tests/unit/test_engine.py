@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pyk.kore.syntax import App
+
+from pykwasm.engine import SubprocessEngine
+from pykwasm.traversal import kore_text
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_subprocess_engine(tmp_path: Path) -> None:
+    # Given
+    interpreter = tmp_path / 'interpreter'
+    interpreter.write_text('#!/bin/sh\ncat "$1" > "$3"\necho "depth $2" >&2\n')
+    interpreter.chmod(0o755)
+    engine = SubprocessEngine(tmp_path)
+    pattern = App('LblinitGeneratedTopCell')
+
+    # When
+    from_pattern = engine.run(pattern, depth=3)
+    from_text = engine.run(kore_text(pattern))
+
+    # Then
+    assert (from_pattern.returncode, from_pattern.stdout, from_pattern.stderr) == (0, kore_text(pattern), 'depth 3\n')
+    assert (from_text.returncode, from_text.stdout, from_text.stderr) == (0, kore_text(pattern), 'depth -1\n')
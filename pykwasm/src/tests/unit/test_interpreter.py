@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from io import StringIO
+from typing import TYPE_CHECKING
+
+from pyk.kore.syntax import DV, App, SortApp, String
+
+from pykwasm.interpreter import count_steps, run_interpreter
+from pykwasm.kore_binary import pattern_to_binary
+from pykwasm.kore_writer import write_pattern
+from pykwasm.traversal import kore_text
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pyk.kore.syntax import Pattern
+
+
+def fake_definition(tmp_path: Path, script: str) -> Path:
+    interpreter = tmp_path / 'interpreter'
+    interpreter.write_text('#!/bin/sh\n' + script)
+    interpreter.chmod(0o755)
+    return tmp_path
+
+
+def instrs(n: int) -> Pattern:
+    tail: Pattern = App("Lbl'Stop'List")
+    for i in range(n):
+        tail = App(
+            'LblInstrs', (), [App('LblaIConst', (), [App('Lbli32'), DV(SortApp('SortInt'), String(str(i)))]), tail]
+        )
+    return tail
+
+
+def test_run_interpreter(tmp_path: Path) -> None:
+    # Given
+    definition_dir = fake_definition(tmp_path, 'cat "$1" > "$3"\necho "depth $2" >&2\n')
+    pattern = instrs(50_000)
+    expected = StringIO()
+    write_pattern(pattern, expected)
+    tee = StringIO()
+
+    # When
+    proc_res = run_interpreter(definition_dir, pattern, tee=tee)
+
+    # Then
+    assert proc_res.returncode == 0
+    assert proc_res.stdout == expected.getvalue()
+    assert proc_res.stderr == 'depth -1\n'
+    assert tee.getvalue() == expected.getvalue()
+
+
+def test_run_interpreter_early_exit(tmp_path: Path) -> None:
+    # Given
+    definition_dir = fake_definition(tmp_path, 'echo "parse error" >&2\nexit 113\n')
+
+    # When
+    proc_res = run_interpreter(definition_dir, instrs(50_000), depth=10)
+
+    # Then
+    assert proc_res.returncode == 113
+    assert proc_res.stderr == 'parse error\n'
+
+
+def test_run_interpreter_binary(tmp_path: Path) -> None:
+    # Given
+    definition_dir = fake_definition(tmp_path, 'head -c 5 "$1" | tail -c 4 > "$3"\nwc -c < "$1" >&2\n')
+    pattern = instrs(50_000)
+    tee = StringIO()
+
+    # When
+    proc_res = run_interpreter(definition_dir, pattern, tee=tee, binary=True)
+
+    # Then
+    assert proc_res.returncode == 0
+    assert proc_res.stdout == 'KORE'
+    assert int(proc_res.stderr) == len(pattern_to_binary(pattern))
+    assert tee.getvalue() == kore_text(pattern)
+
+
+def test_run_interpreter_text(tmp_path: Path) -> None:
+    # Given
+    definition_dir = fake_definition(tmp_path, 'cat "$1" > "$3"\n')
+    kore = kore_text(instrs(1_000))
+
+    # When
+    proc_res = run_interpreter(definition_dir, kore)
+
+    # Then
+    assert proc_res.returncode == 0
+    assert proc_res.stdout == kore
+
+
+def test_count_steps(tmp_path: Path) -> None:
+    # Given
+    # An interpreter whose runs are stuck after 37 steps
+    definition_dir = fake_definition(
+        tmp_path,
+        'cat "$1" > /dev/null\nif [ "$2" -lt 0 ] || [ "$2" -ge 37 ]; then echo stuck; else echo "$2"; fi > "$3"\n',
+    )
+    final = run_interpreter(definition_dir, 'config').stdout
+
+    # When
+    actual = count_steps(definition_dir, 'config', final)
+
+    # Then
+    assert final == 'stuck\n'
+    assert actual == 37
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import struct
+from io import StringIO
+from typing import TYPE_CHECKING
+
+import pytest
+from pyk.kore.syntax import DV, App, EVar, SortApp, SortVar, String
+
+from pykwasm.kore_binary import MAGIC, BinaryKoreWriter, binary_to_pattern, pattern_to_binary
+from pykwasm.kore_writer import write_pattern
+from pykwasm.traversal import kore_text
+
+if TYPE_CHECKING:
+    from pyk.kore.syntax import Pattern
+
+
+INT = SortApp('SortInt')
+I32 = App("Lbli32'Unds'WASM-DATA-COMMON-SYNTAX'Unds'IValType")
+
+
+def instrs(items: list[Pattern]) -> Pattern:
+    tail: Pattern = App('inj', [SortApp('SortEmptyStmts'), SortApp('SortInstrs')], [App("Lbl'Stop'List")])
+    for item in reversed(items):
+        tail = App('LblInstrs', (), [item, tail])
+    return tail
+
+
+KORE_BINARY_TEST_DATA: tuple[Pattern, ...] = (
+    I32,
+    DV(INT, String('42')),
+    DV(SortApp('SortBytes'), String('\x00foo"\\\n\xff')),
+    DV(SortApp('SortBytes'), String(bytes(range(256)).decode('latin-1'))),
+    String('foo'),
+    App('LblaIConst', (), [I32, DV(INT, String('1'))]),
+    App('inj', [SortApp('SortList', [INT]), SortApp('SortKItem')], [App("Lbl'Stop'List")]),
+    App('Lblfoo', [SortVar('S')], [DV(INT, String('0'))]),
+    instrs([App('LblaIConst', (), [I32, DV(INT, String(str(i % 3)))]) for i in range(10)]),
+    instrs([App('LblaIConst', (), [I32, DV(INT, String(str(i)))]) for i in range(20_000)]),
+)
+
+
+@pytest.mark.parametrize('pattern', KORE_BINARY_TEST_DATA, ids=lambda pattern: kore_text(pattern)[:80])
+def test_round_trip(pattern: Pattern) -> None:
+    # When
+    actual = binary_to_pattern(pattern_to_binary(pattern))
+
+    # Then
+    assert kore_text(actual) == kore_text(pattern)
+
+
+@pytest.mark.parametrize('pattern', KORE_BINARY_TEST_DATA, ids=lambda pattern: kore_text(pattern)[:80])
+def test_round_trip_text(pattern: Pattern) -> None:
+    # Given
+    expected = StringIO()
+    write_pattern(pattern, expected)
+
+    # When
+    actual = kore_text(binary_to_pattern(pattern_to_binary(pattern)))
+
+    # Then
+    assert actual == expected.getvalue()
+
+
+def test_header() -> None:
+    # When
+    data = pattern_to_binary(I32)
+
+    # Then
+    assert data.startswith(MAGIC)
+    assert struct.unpack_from('<3h', data, len(MAGIC)) == (1, 2, 0)
+    (size,) = struct.unpack_from('<Q', data, len(MAGIC) + 6)
+    assert size == len(data) - len(MAGIC) - 6 - 8
+
+
+def test_strings_are_interned() -> None:
+    # Given
+    symbol = 'Lbl' + 'x' * 1000
+    pattern = App('Lblpair', (), [App(symbol), App(symbol)])
+
+    # When
+    data = pattern_to_binary(pattern)
+
+    # Then
+    assert data.count(symbol.encode()) == 1
+
+
+def test_writer_reuse() -> None:
+    # Given
+    pattern = instrs([I32, I32])
+    writer = BinaryKoreWriter()
+
+    # When
+    first = writer.body(pattern)
+    second = writer.body(pattern)
+
+    # Then
+    assert first == second
+
+
+def test_unsupported_pattern() -> None:
+    with pytest.raises(ValueError, match='Unsupported pattern'):
+        pattern_to_binary(App('Lblfoo', (), [EVar('VarX', INT)]))
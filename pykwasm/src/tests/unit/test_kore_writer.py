@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from io import StringIO
+from typing import TYPE_CHECKING
+
+import pytest
+from pyk.kore.syntax import DV, App, EVar, LeftAssoc, SortApp, String, Top
+
+from pykwasm.kore_writer import KoreWriter, pattern_write, write_pattern
+
+if TYPE_CHECKING:
+    from pyk.kore.syntax import Pattern
+
+
+INT = SortApp('SortInt')
+I32 = App("Lbli32'Unds'WASM-DATA-COMMON-SYNTAX'Unds'IValType")
+
+
+def instrs(items: list[Pattern]) -> Pattern:
+    tail: Pattern = App('inj', [SortApp('SortEmptyStmts'), SortApp('SortInstrs')], [App("Lbl'Stop'List")])
+    for item in reversed(items):
+        tail = App('LblInstrs', (), [item, tail])
+    return tail
+
+
+KORE_WRITER_TEST_DATA: tuple[Pattern, ...] = (
+    I32,
+    DV(INT, String('42')),
+    DV(SortApp('SortBytes'), String('\x00foo"\\\n\xff')),
+    DV(SortApp('SortString'), String('λ \U0001f600')),
+    App('LblaIConst', (), [I32, DV(INT, String('1'))]),
+    App('inj', [SortApp('SortList', [INT]), SortApp('SortKItem')], [App("Lbl'Stop'List")]),
+    EVar('VarX', INT),
+    Top(INT),
+    instrs([App('LblaIConst', (), [I32, DV(INT, String(str(i)))]) for i in range(10)]),
+)
+
+
+@pytest.mark.parametrize('pattern', KORE_WRITER_TEST_DATA, ids=str)
+def test_write_pattern(pattern: Pattern) -> None:
+    # Given
+    expected = StringIO()
+    pattern_write(pattern, expected, pretty=False)
+
+    # When
+    actual = StringIO()
+    write_pattern(pattern, actual)
+
+    # Then
+    assert actual.getvalue() == expected.getvalue()
+
+
+def test_write_assoc() -> None:
+    # Given
+    pattern = LeftAssoc("Lbl'Unds'Map'Unds'", (), [App("Lbl'Stop'Map"), App("Lbl'Stop'Map")])
+
+    # When
+    output = StringIO()
+    write_pattern(pattern, output)
+
+    # Then
+    assert output.getvalue() == "\\left-assoc{}(Lbl'Unds'Map'Unds'{}(Lbl'Stop'Map{}(),Lbl'Stop'Map{}()))"
+
+
+def test_write_pattern_deep() -> None:
+    # Given
+    n = 100_000
+    pattern = instrs([App('LblaIConst', (), [I32, DV(INT, String(str(i % 100)))]) for i in range(n)])
+
+    # When
+    output = StringIO()
+    write_pattern(pattern, output)
+
+    # Then
+    text = output.getvalue()
+    assert text.count('LblaIConst{}(') == n
+    assert text.count('(') == text.count(')')
+
+
+def test_write_large_value() -> None:
+    # Given
+    data = bytes(range(256)) * 1000
+    offset = instrs([App('LblaIConst', (), [I32, DV(INT, String('0'))])])
+    pattern = App('LblaDataDefn', (), [offset, DV(SortApp('SortBytes'), String(data.decode('latin-1')))])
+
+    # When
+    output = StringIO()
+    write_pattern(pattern, output, chunk_size=1)
+
+    # Then
+    assert output.getvalue() == write_text(pattern)
+
+
+def test_write_chunked() -> None:
+    # Given
+    pattern = KORE_WRITER_TEST_DATA[-1]
+    output = StringIO()
+    writer = KoreWriter(output, chunk_size=1)
+
+    # When
+    writer.write(pattern)
+    writer.write(pattern)
+    writer.flush()
+
+    # Then
+    assert output.getvalue() == 2 * write_text(pattern)
+
+
+def write_text(pattern: Pattern) -> str:
+    output = StringIO()
+    pattern_write(pattern, output, pretty=False)
+    return output.getvalue()
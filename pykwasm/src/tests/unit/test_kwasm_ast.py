@@ -1,5 +1,8 @@
 import pytest
+from pyk.kast.inner import KApply
+from pyk.prelude.bytes import bytesToken, pretty_bytes
 
+from pykwasm import kwasm_ast as a
 from pykwasm.kwasm_ast import KBytes
 
 KBYTES_TEST_DATA = (
@@ -26,3 +29,93 @@ def test_kbytes(input: bytes, expected: str) -> None:
     # Then
     assert t_dict['token'] == expected
     assert t_dict['sort']['name'] == 'Bytes'
+
+
+@pytest.mark.parametrize(
+    'input',
+    [input for input, _ in KBYTES_TEST_DATA] + [bytes(range(256)), bytes(range(256)) * 1000],
+    ids=lambda input: repr(input[:16]),
+)
+def test_kbytes_parity(input: bytes) -> None:
+    # When
+    t = KBytes(input)
+
+    # Then
+    assert t == bytesToken(input)
+    assert pretty_bytes(t) == input
+
+
+def test_interned() -> None:
+    # Given
+    a.reset_interned()
+
+    # When
+    t1 = a.I32_CONST(42)
+    t2 = a.I32_CONST(42)
+    t3 = a.I32_CONST(43)
+
+    # Then
+    assert t1 is t2
+    assert t1 is not t3
+    assert t1 == KApply('aIConst', [a.i32, a.KInt(42)])
+
+
+def test_interned_disabled() -> None:
+    # Given
+    a.reset_interned(0)
+
+    try:
+        # When
+        t1 = a.GET_LOCAL(1)
+        t2 = a.GET_LOCAL(1)
+    finally:
+        a.reset_interned()
+
+    # Then
+    assert t1 == t2
+    assert t1 is not t2
+
+
+def test_clear_interned_keeps_disabled() -> None:
+    # Given
+    a.reset_interned(0)
+
+    try:
+        # When
+        a.clear_interned()
+        t1 = a.GET_LOCAL(1)
+        t2 = a.GET_LOCAL(1)
+    finally:
+        a.reset_interned()
+
+    # Then
+    assert t1 == t2
+    assert t1 is not t2
+
+
+def test_named_list_does_not_mutate() -> None:
+    # Given
+    items = [a.I32_CONST(1), a.I32_CONST(2)]
+
+    # When
+    actual = a.instrs(items)
+
+    # Then
+    assert items == [a.I32_CONST(1), a.I32_CONST(2)]
+    assert actual == a.instrs(iter(items))
+    assert actual == KApply(a.INSTRS, [items[0], KApply(a.INSTRS, [items[1], KApply(a.EMPTY_STMTS)])])
+
+
+def test_named_list_long() -> None:
+    # Given
+    n = 200_000
+
+    # When
+    actual = a.instrs(a.I32_CONST(i % 100) for i in range(n))
+
+    # Then
+    length = 0
+    while isinstance(actual, KApply) and actual.label.name == a.INSTRS:
+        length += 1
+        actual = actual.args[1]
+    assert length == n
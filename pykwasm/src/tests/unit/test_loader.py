@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pykwasm.cache import ModuleCache
+from pykwasm.loader import WASM_MAGIC, module_bytes
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+WASM = WASM_MAGIC + b'\x01\x00\x00\x00'
+
+
+@pytest.fixture
+def compilations(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Put a fake `wat2wasm` on the path, which records each call in the returned file."""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    log = tmp_path / 'compilations'
+    log.write_text('')
+    wat2wasm = bin_dir / 'wat2wasm'
+    wat2wasm.write_text(f'#!/bin/sh\necho "$1" >> {log}\nprintf "\\000asm\\001\\000\\000\\000"\n')
+    wat2wasm.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    return log
+
+
+def test_binary_module(tmp_path: Path, compilations: Path) -> None:
+    # Given
+    wasm_file = tmp_path / 'module.wasm'
+    wasm_file.write_bytes(WASM)
+
+    # When
+    actual = module_bytes(wasm_file)
+
+    # Then
+    assert actual == WASM
+    assert compilations.read_text() == ''
+
+
+def test_text_module(tmp_path: Path, compilations: Path) -> None:
+    # Given
+    wat_file = tmp_path / 'module.wat'
+    wat_file.write_text('(module)')
+
+    # When
+    actual = [module_bytes(wat_file), module_bytes(wat_file)]
+
+    # Then
+    assert actual == [WASM, WASM]
+    assert compilations.read_text().splitlines() == [str(wat_file)] * 2
+
+
+def test_text_module_cached(tmp_path: Path, compilations: Path) -> None:
+    # Given
+    wat_file = tmp_path / 'module.wat'
+    wat_file.write_text('(module)')
+    cache = ModuleCache(tmp_path / 'cache')
+
+    # When
+    actual = [module_bytes(wat_file, cache), module_bytes(wat_file, cache)]
+    wat_file.write_text('(module (func))')
+    module_bytes(wat_file, cache)
+
+    # Then
+    assert actual == [WASM, WASM]
+    assert compilations.read_text().splitlines() == [str(wat_file)] * 2
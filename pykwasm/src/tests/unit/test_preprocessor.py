@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import re
+from io import StringIO
+
+import pytest
+
+from pykwasm.scripts.preprocessor import hex2float, preprocess, preprocess_stream
+
+
+def line_preprocess(s: str) -> str:
+    # The preprocessor as it was, a line at a time, which the single pass must match exactly
+    lines = []
+    for line in s.split('\n'):
+        lines.append(re.sub(r'(?:(?:f32|f64)\.const )([^\)]+)', lambda m: hex2float(m.group()), line + '\n'))
+    return ''.join(lines)
+
+
+PREPROCESS_TEST_DATA = (
+    '',
+    '\n',
+    '(module)',
+    '(assert_return (invoke "f" (f32.const 0x1.8p+3)) (f64.const 0x1p-1074))\n',
+    '(f32.const -nan:0x200000) (f64.const nan) (f32.const -inf) (f64.const inf)',
+    '(f32.const 1_000.5)\n(f64.const 0x1_0p1)',
+    '(f64.const 0x1p99999)\n(f32.const 0xzz)',
+    'f32.const 0x1p1\nf64.const nan:0x1\n',
+    'f32.const \nf64.const )\nf32.const',
+    ';; f32.const 0x1p1 in a comment\n\n\n(f32.const 0x1p1',
+)
+
+
+@pytest.mark.parametrize('text', PREPROCESS_TEST_DATA, ids=repr)
+@pytest.mark.parametrize('chunk_size', (1, 5, 1 << 16))
+def test_preprocess(text: str, chunk_size: int) -> None:
+    # Given
+    expected = line_preprocess(text)
+    output = StringIO()
+
+    # When
+    actual = preprocess(text)
+    preprocess_stream(StringIO(text), output, chunk_size=chunk_size)
+
+    # Then
+    assert actual == expected
+    assert output.getvalue() == expected
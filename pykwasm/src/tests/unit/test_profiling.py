@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from wasm.opcodes import BinaryOpcode
+
+from pykwasm.profiling import Profile, count_instrs, phase
+
+
+def test_profile() -> None:
+    # Given
+    profile = Profile(module='a.wasm')
+
+    # When
+    with profile.phase('load'):
+        objects = [[i] for i in range(10_000)]
+    with profile.phase('run'):
+        pass
+    profile.metrics['returncode'] = 0
+    output = StringIO()
+    profile.write(output)
+
+    # Then
+    assert list(profile.phases) == ['load', 'run']
+    load = profile.phases['load']
+    assert load.wall >= 0 and load.cpu >= 0 and load.cpu_children >= 0
+    assert load.peak_rss > 0
+    assert len(objects) == 10_000
+    assert load.objects is not None and load.objects > 0
+    assert profile.latency() == {
+        'load': load.wall,
+        'run': profile.phases['run'].wall,
+        'total': load.wall + profile.phases['run'].wall,
+    }
+    (line,) = output.getvalue().splitlines()
+    record = json.loads(line)
+    assert record['metrics'] == {'module': 'a.wasm', 'returncode': 0}
+    assert list(record['phases']) == ['load', 'run']
+    assert record['phases']['load']['objects'] == load.objects
+
+
+def test_profile_failing_phase() -> None:
+    # Given
+    profile = Profile(count_objects=False)
+
+    # When
+    with pytest.raises(ValueError), profile.phase('load'):
+        raise ValueError()
+
+    # Then
+    assert profile.phases['load'].objects is None
+
+
+def test_no_profile() -> None:
+    with phase(None, 'load'):
+        pass
+
+
+def test_count_instrs() -> None:
+    # Given
+    def instr(opcode: BinaryOpcode, *, instructions: tuple = (), else_instructions: tuple = ()) -> SimpleNamespace:
+        return SimpleNamespace(opcode=opcode, instructions=instructions, else_instructions=else_instructions)
+
+    nop = instr(BinaryOpcode.NOP)
+    iis = [
+        nop,
+        instr(BinaryOpcode.BLOCK, instructions=(nop, instr(BinaryOpcode.LOOP, instructions=(nop,)))),
+        instr(BinaryOpcode.IF, instructions=(nop,), else_instructions=(nop, nop)),
+    ]
+
+    # When
+    actual = count_instrs(iis)
+
+    # Then
+    assert actual == 9
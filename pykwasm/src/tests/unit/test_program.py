@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pykwasm import program as program_module
+from pykwasm.cache import ModuleCache
+from pykwasm.program import parse_program, program_config, program_kore, run_program_cached
+from pykwasm.scripts.preprocessor import preprocess
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def fake_definition(tmp_path: Path) -> Path:
+    # A parser that logs its runs, and an interpreter that logs its input and ends in an empty `<instrs>`
+    definition_dir = tmp_path / 'llvm'
+    definition_dir.mkdir()
+    parser = definition_dir / 'parser_PGM'
+    parser.write_text(f'#!/bin/sh\necho "$1" >> {tmp_path / "parses"}\necho "Lblpgm{{}}()"\n')
+    parser.chmod(0o755)
+    interpreter = definition_dir / 'interpreter'
+    interpreter.write_text(
+        f'#!/bin/sh\ncat "$1" > {tmp_path / "input.kore"}\n' 'echo "Lbl\'-LT-\'instrs\'-GT-\'{}(dotk{}())" > "$3"\n'
+    )
+    interpreter.chmod(0o755)
+    (definition_dir / 'timestamp').write_text('')
+    return definition_dir
+
+
+def test_program_config() -> None:
+    # When
+    actual = program_config('Lblpgm{}()\n')
+
+    # Then
+    assert actual.startswith('LblinitGeneratedTopCell{}(')
+    assert '\\dv{SortKConfigVar{}}("$PGM")' in actual
+    assert 'inj{SortStmts{}, SortKItem{}}(Lblpgm{}())' in actual
+
+
+def test_parse_program(tmp_path: Path) -> None:
+    # Given: a parser that outputs its input
+    definition_dir = tmp_path / 'llvm'
+    definition_dir.mkdir()
+    parser = definition_dir / 'parser_PGM'
+    parser.write_text('#!/bin/sh\ncat "$1"\n')
+    parser.chmod(0o755)
+    program = tmp_path / 'program.wast'
+    program.write_text('(f32.const 0x1p1)\n' * 100_000)
+
+    # When
+    proc_res = parse_program(program, definition_dir)
+
+    # Then
+    assert proc_res.returncode == 0
+    assert proc_res.stdout == preprocess(program.read_text())
+
+
+def test_program_kore_cached(tmp_path: Path) -> None:
+    # Given
+    definition_dir = fake_definition(tmp_path)
+    cache = ModuleCache(tmp_path / 'cache')
+    program = tmp_path / 'program.wast'
+    program.write_text('(f32.const 0x1p1)')
+
+    # When
+    first = program_kore(program, definition_dir, cache)
+    second = program_kore(program, definition_dir, cache)
+    program.write_text('(f32.const 0x1p2)')
+    third = program_kore(program, definition_dir, cache)
+
+    # Then
+    assert first.stdout == second.stdout == third.stdout == 'Lblpgm{}()\n'
+    assert len((tmp_path / 'parses').read_text().splitlines()) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_program_kore_preprocessor_changed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Given
+    definition_dir = fake_definition(tmp_path)
+    cache = ModuleCache(tmp_path / 'cache')
+    program = tmp_path / 'program.wast'
+    program.write_text('(f32.const 0x1p1)')
+
+    # When
+    program_kore(program, definition_dir, cache)
+    monkeypatch.setattr(program_module, 'preprocessor_version', lambda: 'changed')
+    program_kore(program, definition_dir, cache)
+
+    # Then
+    assert len((tmp_path / 'parses').read_text().splitlines()) == 2
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_run_program_cached(tmp_path: Path) -> None:
+    # Given
+    definition_dir = fake_definition(tmp_path)
+    cache = ModuleCache(tmp_path / 'cache')
+    program = tmp_path / 'program.wast'
+    program.write_text('(module)')
+
+    # When
+    results = [run_program_cached(program, definition_dir, cache, ['instrs']) for _ in range(2)]
+
+    # Then
+    for proc_res in results:
+        assert proc_res.returncode == 0
+        assert proc_res.stdout == '{"instrs": {"tag": "App", "name": "dotk", "sorts": [], "args": []}}\n'
+    assert (tmp_path / 'input.kore').read_text() == program_config('Lblpgm{}()')
+    assert len((tmp_path / 'parses').read_text().splitlines()) == 1
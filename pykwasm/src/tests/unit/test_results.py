@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+
+from pykwasm.kore_scan import find_apps, replace_apps
+from pykwasm.results import cell_symbol, extract_cells
+
+CONFIG = (
+    "Lbl'-LT-'generatedTop'-GT-'{}("
+    "Lbl'-LT-'data'-GT-'{}(\\dv{SortBytes{}}(\"Lbl'-LT-'gas'-GT-'{}(\\\"(\")),"
+    "Lbl'-LT-'gas'-GT-'{}(\\dv{SortInt{}}(\"99\")),"
+    "Lbl'-LT-'output'-GT-'{}(inj{SortBytes{}, SortOutputData{}}(\\dv{SortBytes{}}(\"\\x00\\xff\"))),"
+    "Lbl'-LT-'valstack'-GT-'{}(Lbl'Stop'ValStack{}()),"
+    "Lbl'-LT-'pair'-GT-'{}(\\dv{SortBool{}}(\"true\"),\\dv{SortString{}}(\"a(\")))"
+)
+
+
+def test_extract_cells() -> None:
+    # When
+    actual = extract_cells(CONFIG, ['gas', 'output', 'valstack', 'pair', 'status'])
+
+    # Then
+    assert actual == {
+        'gas': 99,
+        'output': '00ff',
+        'valstack': {'tag': 'App', 'name': "Lbl'Stop'ValStack", 'sorts': [], 'args': []},
+        'pair': [True, 'a('],
+        'status': None,
+    }
+
+
+def test_find_apps() -> None:
+    # Given
+    gas = cell_symbol('gas')
+
+    # When
+    actual = find_apps(CONFIG + CONFIG, [gas, 'LblnotThere'])
+
+    # Then
+    assert actual == {gas: "Lbl'-LT-'gas'-GT-'{}(\\dv{SortInt{}}(\"99\"))"}
+
+
+def test_replace_apps() -> None:
+    # When
+    actual = replace_apps(CONFIG, {cell_symbol('gas'): 'X', cell_symbol('pair'): 'Y'})
+
+    # Then
+    assert actual.count('X') == 1 and actual.endswith(',Y)')
+    assert "Lbl'-LT-'gas'-GT-'{}(\\\"(\"" in actual
+
+
+def test_unbalanced() -> None:
+    with pytest.raises(ValueError):
+        find_apps("Lbl'-LT-'gas'-GT-'{}(\\dv{SortInt{}}(\"99\")", [cell_symbol('gas')])
+
+
+def test_nothing_requested() -> None:
+    # When
+    apps = find_apps(CONFIG, [])
+    replaced = replace_apps(CONFIG, {})
+    cells = extract_cells(CONFIG, [])
+
+    # Then
+    assert apps == {}
+    assert replaced == CONFIG
+    assert cells == {}
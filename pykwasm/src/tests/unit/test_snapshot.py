@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import pytest
+from pyk.kast.inner import KToken
+from pyk.kore.syntax import DV, App, SortApp, String
+
+from pykwasm.cache import ModuleCache
+from pykwasm.snapshot import (
+    SNAPSHOT_ENTRY,
+    Snapshot,
+    resume,
+    snapshot_key,
+    snapshot_subst,
+    stuck_at_snapshot_entry,
+    take_snapshot,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+    from typing import Any, Final
+
+    from pyk.kast import KInner
+    from pyk.kore.syntax import Pattern
+
+
+CELL_SYMBOLS = {
+    'GAS_CELL': "Lbl'-LT-'gas'-GT-'",
+    'CREATE_CELL': "Lbl'-LT-'create'-GT-'",
+    'ENTRY_CELL': "Lbl'-LT-'entry'-GT-'",
+}
+
+
+def fake_template(definition_dir: Path | None = None, cell_vars: Iterable[str] = CELL_SYMBOLS) -> Any:
+    def cell(key: str, value: KInner) -> App:
+        assert type(value) is KToken
+        return App(CELL_SYMBOLS[key], (), [DV(SortApp('Sort' + value.sort.name), String(value.token))])
+
+    return SimpleNamespace(
+        cell=cell, cell_vars=frozenset(cell_vars), runner=SimpleNamespace(definition_dir=definition_dir)
+    )
+
+
+def snapshot_kore(entry: str, gas: str, create: str) -> str:
+    return (
+        "Lbl'-LT-'generatedTop'-GT-'{}("
+        f"Lbl'-LT-'k'-GT-'{{}}(Lbl'Hash'resolveModuleFuncExport{{}}(\\dv{{SortInt{{}}}}(\"0\"),{entry})),"
+        f"Lbl'-LT-'entry'-GT-'{{}}({entry}),"
+        f"Lbl'-LT-'gas'-GT-'{{}}({gas}),"
+        f"Lbl'-LT-'create'-GT-'{{}}({create}),"
+        "Lbl'-LT-'data'-GT-'{}(\\dv{SortBytes{}}(\"Lbl'-LT-'gas'-GT-'{}(\\\")\")),"
+        f"Lbl'-LT-'memory'-GT-'{{}}({DV(SortApp('SortBytes'), String(SNAPSHOT_ENTRY)).text}))"
+    )
+
+
+def stuck_kore(symbol: str, entry: str, instrs: Pattern | None = None) -> str:
+    wasm_string = App(
+        'inj', [SortApp('SortWasmStringToken'), SortApp('SortWasmString')], [dv('SortWasmStringToken', entry)]
+    )
+    args = [dv('SortInt', '0'), wasm_string] if symbol == "Lbl'Hash'resolveModuleFuncExport" else [wasm_string]
+    k_cell = App("Lbl'-LT-'k'-GT-'", (), [App('kseq', (), [App(symbol, (), args), App('dotk')])])
+    instrs_cell = App("Lbl'-LT-'instrs'-GT-'", (), [App('kseq', (), [instrs, App('dotk')]) if instrs else App('dotk')])
+    return App("Lbl'-LT-'generatedTop'-GT-'", (), [k_cell, instrs_cell]).text
+
+
+def dv(sort: str, value: str) -> DV:
+    return DV(SortApp(sort), String(value))
+
+
+STUCK_TEST_DATA: Final = (
+    (stuck_kore("Lbl'Hash'resolveCurModuleFuncExport", SNAPSHOT_ENTRY), True),
+    (stuck_kore("Lbl'Hash'resolveModuleFuncExport", SNAPSHOT_ENTRY), True),
+    (stuck_kore("Lbl'Hash'resolveModuleFuncExport", '"init"'), False),
+    (stuck_kore("Lbl'Hash'resolveFunc", SNAPSHOT_ENTRY), False),
+    (stuck_kore("Lbl'Hash'resolveModuleFuncExport", SNAPSHOT_ENTRY, App('Lbltrap')), False),
+    (String(SNAPSHOT_ENTRY).text, False),
+)
+
+
+@pytest.mark.parametrize(('kore', 'expected'), STUCK_TEST_DATA)
+def test_stuck_at_snapshot_entry(kore: str, expected: bool) -> None:
+    # When
+    actual = stuck_at_snapshot_entry(kore)
+
+    # Then
+    assert actual == expected
+
+
+def test_snapshot_key(tmp_path: Path) -> None:
+    # Given
+    cache = ModuleCache(tmp_path / 'cache')
+    wasm_file = tmp_path / 'module.wasm'
+    wasm_file.write_bytes(b'\0asm')
+    config_subst = {'ENTRY_CELL': KToken('"init"', 'WasmString'), 'GAS_CELL': KToken('0', 'Int')}
+
+    # When
+    key = snapshot_key(cache, wasm_file, tmp_path, config_subst)
+    pruned_key = snapshot_key(cache, wasm_file, tmp_path, config_subst, prune=True)
+    other_call_key = snapshot_key(cache, wasm_file, tmp_path, config_subst | {'GAS_CELL': KToken('1', 'Int')})
+
+    # Then
+    assert pruned_key != key
+    assert other_call_key == key
+
+
+def test_resume() -> None:
+    # Given
+    def dv(sort: str, value: str) -> str:
+        return DV(SortApp(sort), String(value)).text
+
+    snapshot = Snapshot(
+        snapshot_kore(dv('SortWasmString', SNAPSHOT_ENTRY), dv('SortInt', '0'), dv('SortBool', 'false')), 42
+    )
+    config_subst = {
+        'ENTRY_CELL': KToken('"init"', 'WasmString'),
+        'GAS_CELL': KToken('100000', 'Int'),
+        'CREATE_CELL': KToken('true', 'Bool'),
+    }
+
+    # When
+    actual = resume(fake_template(), snapshot, config_subst)
+
+    # Then
+    assert actual == snapshot_kore(dv('SortWasmString', '"init"'), dv('SortInt', '100000'), dv('SortBool', 'true'))
+
+
+def test_resume_other_definition() -> None:
+    # Given
+    template = fake_template(cell_vars=['GAS_CELL', 'CREATE_CELL'])
+    config_subst = {
+        'ENTRY_CELL': KToken('"init"', 'WasmString'),
+        'GAS_CELL': KToken('100000', 'Int'),
+        'CREATE_CELL': KToken('true', 'Bool'),
+    }
+
+    # When
+    with pytest.raises(ValueError, match='<entry>'):
+        resume(template, Snapshot('', None), config_subst)
+
+
+def test_resume_missing_cell() -> None:
+    with pytest.raises(ValueError):
+        resume(fake_template(), Snapshot('', None), {'ENTRY_CELL': KToken('"init"', 'WasmString')})
+
+
+def test_snapshot_subst() -> None:
+    # Given
+    config_subst = {'ENTRY_CELL': KToken('"init"', 'WasmString'), 'GAS_CELL': KToken('0', 'Int')}
+
+    # When
+    actual = snapshot_subst(config_subst)
+
+    # Then
+    assert actual == {'ENTRY_CELL': KToken(SNAPSHOT_ENTRY, 'WasmString'), 'GAS_CELL': KToken('0', 'Int')}
+    assert config_subst['ENTRY_CELL'] == KToken('"init"', 'WasmString')
+
+
+def test_take_snapshot(tmp_path: Path) -> None:
+    # Given: an interpreter that gets stuck after 7 steps, and logs the depth of each run
+    stuck = stuck_kore("Lbl'Hash'resolveModuleFuncExport", SNAPSHOT_ENTRY)
+    (tmp_path / 'stuck.kore').write_text(stuck + '\n')
+    interpreter = tmp_path / 'interpreter'
+    interpreter.write_text(
+        '#!/bin/sh\n'
+        f'echo "$2" >> {tmp_path / "depths"}\n'
+        'if [ "$2" -lt 0 ] || [ "$2" -ge 7 ]; then\n'
+        f'  cat {tmp_path / "stuck.kore"} > "$3"\n'
+        'else\n'
+        '  echo "step $2" > "$3"\n'
+        'fi\n'
+    )
+    interpreter.chmod(0o755)
+    config = App('LblinitGeneratedTopCell')
+
+    # When
+    uncounted = take_snapshot(fake_template(tmp_path), config)
+    uncounted_runs = len((tmp_path / 'depths').read_text().splitlines())
+    snapshot = take_snapshot(fake_template(tmp_path), config, count_steps=True)
+
+    # Then
+    assert uncounted == Snapshot(stuck + '\n', None)
+    assert uncounted_runs == 1
+    assert snapshot == Snapshot(stuck + '\n', 7)
+    assert Snapshot.from_bytes(snapshot.to_bytes()) == snapshot
+    assert len((tmp_path / 'depths').read_text().splitlines()) < 12
+
+
+def test_take_snapshot_not_stuck(tmp_path: Path) -> None:
+    # Given
+    interpreter = tmp_path / 'interpreter'
+    interpreter.write_text('#!/bin/sh\necho done > "$3"\n')
+    interpreter.chmod(0o755)
+
+    # When
+    with pytest.raises(ValueError):
+        take_snapshot(fake_template(tmp_path), App('LblinitGeneratedTopCell'))
+
+
+def test_take_snapshot_failed(tmp_path: Path) -> None:
+    # Given: an interpreter that fails, with the output of a snapshot
+    stuck = stuck_kore("Lbl'Hash'resolveModuleFuncExport", SNAPSHOT_ENTRY)
+    (tmp_path / 'stuck.kore').write_text(stuck + '\n')
+    interpreter = tmp_path / 'interpreter'
+    interpreter.write_text(f'#!/bin/sh\ncat {tmp_path / "stuck.kore"} > "$3"\nexit 1\n')
+    interpreter.chmod(0o755)
+
+    # When
+    with pytest.raises(ValueError):
+        take_snapshot(fake_template(tmp_path), App('LblinitGeneratedTopCell'))
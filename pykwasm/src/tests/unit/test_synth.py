@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from io import BytesIO
+
+import pytest
+from wasm.parsers import parse_module
+
+from pykwasm.profiling import module_metrics
+from pykwasm.synth import SynthParams, _s32, _u32, plot_svg, synth_module
+
+LEB_TEST_DATA = (
+    (0, b'\x00', b'\x00'),
+    (63, b'\x3f', b'\x3f'),
+    (64, b'\x40', b'\xc0\x00'),
+    (127, b'\x7f', b'\xff\x00'),
+    (128, b'\x80\x01', b'\x80\x01'),
+    (624485, b'\xe5\x8e\x26', b'\xe5\x8e\x26'),
+)
+
+
+@pytest.mark.parametrize('n,u32,s32', LEB_TEST_DATA, ids=[str(n) for n, *_ in LEB_TEST_DATA])
+def test_leb128(n: int, u32: bytes, s32: bytes) -> None:
+    assert _u32(n) == u32
+    assert _s32(n) == s32
+
+
+def test_s32_negative() -> None:
+    assert _s32(-1) == b'\x7f'
+    assert _s32(-64) == b'\x40'
+    assert _s32(-65) == b'\xbf\x7f'
+
+
+SYNTH_TEST_DATA = (
+    SynthParams(),
+    SynthParams(functions=3, instrs=10),
+    SynthParams(instrs=0),
+    SynthParams(depth=20, br_table=100),
+    SynthParams(br_table=5),
+    SynthParams(data_bytes=100_000, seed=1),
+)
+
+
+@pytest.mark.parametrize('params', SYNTH_TEST_DATA, ids=[str(params) for params in SYNTH_TEST_DATA])
+def test_synth_module(params: SynthParams) -> None:
+    # When
+    data = synth_module(params)
+    wasm_ast = parse_module(BytesIO(data))
+
+    # Then
+    metrics = module_metrics(wasm_ast)
+    assert metrics['functions'] == params.functions
+    assert metrics['instructions'] >= params.functions * (params.instrs + params.depth)
+    assert metrics['data_bytes'] == params.data_bytes
+    assert [export.name for export in wasm_ast.exports] == [f'f{i}' for i in range(params.functions)]
+
+
+def test_synth_module_deterministic() -> None:
+    params = SynthParams(data_bytes=100)
+    assert synth_module(params) == synth_module(params)
+    assert synth_module(params) != synth_module(params._replace(seed=1))
+
+
+def test_plot_svg() -> None:
+    # Given
+    profiles = [
+        {'metrics': {'instrs': n}, 'phases': {'parse': {'wall': n * 1e-4}, 'wasm2kast': {'wall': n * n * 1e-6}}}
+        for n in (10, 100, 1000)
+    ]
+
+    # When
+    svg = plot_svg('instrs', profiles)
+
+    # Then
+    assert svg.startswith('<svg')
+    assert svg.count('<polyline') == 2
+    assert 'parse' in svg and 'wasm2kast' in svg
+
+
+def test_plot_svg_peak_rss() -> None:
+    # Given
+    profiles = [
+        {'metrics': {'instrs': n}, 'phases': {'parse': {'wall': 1e-3, 'peak_rss': n * 1024}}} for n in (10, 100, 1000)
+    ]
+
+    # When
+    svg = plot_svg('instrs', profiles, metric='peak_rss')
+
+    # Then
+    assert svg.count('<polyline') == 1
+    assert 'peak_rss (log' in svg
+
+
+def test_plot_svg_empty() -> None:
+    with pytest.raises(ValueError):
+        plot_svg('instrs', [])
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from io import StringIO
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from pyk.kast.inner import KApply, KSequence, KToken, KVariable
+from pyk.kore.syntax import DV, App, EVar, Exists, SortApp, String
+
+from pykwasm import kwasm_ast as a
+from pykwasm.kore_writer import pattern_write
+from pykwasm.traversal import bottom_up, depth, equal, kast_json, kore_text, size, structural_hash, substitute
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from pyk.kast import KInner
+    from pyk.kore.syntax import Pattern
+
+
+INT = SortApp('SortInt')
+N = 20_000  # far beyond the default recursion limit
+
+
+def deep_kast(n: int) -> KInner:
+    return a.instrs(a.I32_CONST(i % 100) for i in range(n))
+
+
+def deep_kore(n: int) -> Pattern:
+    pattern: Pattern = App('dotk')
+    for i in range(n):
+        pattern = App('kseq', (), (DV(INT, String(str(i % 100))), pattern))
+    return pattern
+
+
+TERM_TEST_DATA: tuple[KInner | Pattern, ...] = (
+    a.I32_CONST(1),
+    KSequence([KVariable('X'), a.i32]),
+    KToken('foo', 'Id'),
+    deep_kast(10),
+    App('Lblfoo', (INT,), (DV(INT, String('1')), EVar('VarX', INT))),
+    Exists(INT, EVar('VarX', INT), EVar('VarX', INT)),
+    deep_kore(10),
+)
+
+
+@pytest.mark.parametrize('term', TERM_TEST_DATA, ids=str)
+def test_equal(term: KInner | Pattern) -> None:
+    # Given
+    copy = bottom_up(lambda t: t.let(), cast('Any', term))
+
+    # Then
+    assert copy is not term
+    assert equal(copy, term)
+    assert structural_hash(copy) == structural_hash(term)
+
+
+def test_not_equal() -> None:
+    assert not equal(deep_kast(10), deep_kast(11))
+    assert not equal(a.I32_CONST(1), a.I64_CONST(1))
+    assert not equal(App('Lblfoo', (INT,), ()), App('Lblfoo', (), ()))
+    assert not equal(
+        Exists(INT, EVar('VarX', INT), DV(INT, String('1'))), Exists(INT, EVar('VarY', INT), DV(INT, String('1')))
+    )
+
+
+def test_size_and_depth() -> None:
+    # Given
+    term = deep_kast(3)
+
+    # Then
+    assert size(term) == 3 * 4 + 1
+    assert depth(term) == 3 + 2
+
+
+def test_substitute() -> None:
+    # Given
+    kast = KApply('foo', [KVariable('X'), KApply('bar', [KVariable('X'), KVariable('Y')])])
+    kore = App('Lblfoo', (), (EVar('VarX', INT), EVar('VarY', INT)))
+
+    # When
+    kast_actual = substitute(kast, {'X': a.i32})
+    kore_actual = substitute(kore, {'VarX': DV(INT, String('1'))})
+
+    # Then
+    assert kast_actual == KApply('foo', [a.i32, KApply('bar', [a.i32, KVariable('Y')])])
+    assert kore_actual == App('Lblfoo', (), (DV(INT, String('1')), EVar('VarY', INT)))
+
+
+@pytest.mark.parametrize('term', [term for term in TERM_TEST_DATA if not hasattr(term, 'patterns')], ids=str)
+def test_kast_json(term: KInner) -> None:
+    assert kast_json(term) == term.to_json()
+
+
+def test_deep() -> None:
+    # Given
+    kast = deep_kast(N)
+    kore = deep_kore(N)
+
+    # Then
+    assert size(kast) == 4 * N + 1
+    assert depth(kore) == N + 1
+    assert equal(kast, deep_kast(N))
+    assert equal(kore, bottom_up(lambda p: p, deep_kore(N)))
+    assert structural_hash(kore) == structural_hash(deep_kore(N))
+    assert kast_json(kast).count('aIConst') == N
+    assert kore_text(substitute(kore, {})) == kore_text(kore)
+
+
+def test_kore_text() -> None:
+    # Given
+    pattern = deep_kore(10)
+    expected = StringIO()
+    pattern_write(pattern, expected, pretty=False)
+
+    # Then
+    assert kore_text(pattern) == expected.getvalue()
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from types import SimpleNamespace
 from typing import TYPE_CHECKING
 
 import pytest
 from pyk.kast.inner import KApply
 from wasm.datatypes import ExternAddress, FunctionAddress, Limits, Table, TableType
+from wasm.opcodes import BinaryOpcode
 
+from pykwasm import kwasm_ast as a
 from pykwasm import wasm2kast
 from pykwasm.kwasm_ast import KInt, externref, funcref
 
@@ -27,3 +30,30 @@ def test_table(input: Table, limits: KInner, typ: KInner) -> None:
     # Then
     assert limits == t.args[0]
     assert typ == t.args[1]
+
+
+def test_block_ids() -> None:
+    # Given
+    nop = SimpleNamespace(opcode=BinaryOpcode.NOP)
+
+    def block(*iis: SimpleNamespace) -> SimpleNamespace:
+        return SimpleNamespace(opcode=BinaryOpcode.BLOCK, instructions=iis, result_type=())
+
+    body = [block(nop, block(nop)), block()]
+    res = wasm2kast.vec_type(())
+    first, second = wasm2kast.BlockIds(), wasm2kast.BlockIds(10)
+
+    # When
+    actual_first = wasm2kast.instrs(body, first)
+    actual_second = wasm2kast.instrs(body, second)
+
+    # Then
+    def expected(first_id: int) -> KInner:
+        inner = a.BLOCK(res, a.instrs([a.NOP]), KInt(first_id + 1))
+        return a.instrs(
+            [a.BLOCK(res, a.instrs([a.NOP, inner]), KInt(first_id)), a.BLOCK(res, a.instrs([]), KInt(first_id + 2))]
+        )
+
+    assert actual_first == expected(0)
+    assert actual_second == expected(10)
+    assert (first.next_id, second.next_id) == (3, 13)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+from io import StringIO
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from pykwasm import wasm_server
+from pykwasm.wasm_server import JobResult, WasmServer, default_runtime_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    import pytest
+
+
+class EchoServer(WasmServer):
+    def __init__(self) -> None:
+        self.cache = None
+
+    def run(self, wasm_file: Path, args: Iterable[str] = ()) -> JobResult:
+        if not wasm_file.name.endswith('.wasm'):
+            raise ValueError(f'Not a module: {wasm_file}')
+        return JobResult(0, ' '.join([wasm_file.name, *args]), '', {'total': 0.0})
+
+
+def test_serve() -> None:
+    # Given
+    requests = [
+        {'id': 1, 'wasm': 'a.wasm'},
+        {'id': 'b', 'wasm': 'b.wasm', 'args': ['-gas:Int=0']},
+        {'id': 3, 'wasm': 'c.wat'},
+    ]
+    input = StringIO('\n'.join(json.dumps(request) for request in requests) + '\n\n')
+    output = StringIO()
+
+    # When
+    EchoServer().serve(input, output)
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    # Then
+    assert [response['id'] for response in responses] == [1, 'b', 3]
+    assert responses[0]['stdout'] == 'a.wasm'
+    assert responses[1]['stdout'] == 'b.wasm -gas:Int=0'
+    assert responses[1]['latency'] == {'total': 0.0}
+    assert responses[2]['error'] == 'ValueError: Not a module: c.wat'
+
+
+def test_job_result_engine() -> None:
+    # When
+    actual = JobResult(0, '', '', {}, engine='in-process').to_dict()
+
+    # Then
+    assert actual['engine'] == 'in-process'
+
+
+def test_default_runtime_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Given: the llvm definition and its runtime are built, the ulm-wasm-test runtime is not
+    targets = {
+        'wasm-semantics.llvm': tmp_path / 'llvm',
+        'wasm-semantics.llvm-runtime': tmp_path / 'llvm-runtime',
+        'wasm-semantics.ulm-wasm-test': tmp_path / 'ulm-wasm-test',
+        'wasm-semantics.ulm-wasm-test-runtime': tmp_path / 'ulm-wasm-test-runtime',
+    }
+    for target in ('wasm-semantics.llvm', 'wasm-semantics.llvm-runtime', 'wasm-semantics.ulm-wasm-test'):
+        targets[target].mkdir()
+    monkeypatch.setattr(wasm_server, 'kdist', SimpleNamespace(which=targets.__getitem__))
+
+    # Then
+    assert default_runtime_dir(tmp_path / 'llvm') == tmp_path / 'llvm-runtime'
+    assert default_runtime_dir(tmp_path / 'ulm-wasm-test') is None
+    assert default_runtime_dir(tmp_path / 'other') is None
@@ -0,0 +1,28 @@
+;; Load/store-heavy program for `kwasm-bench memory`: words stored to and loaded from addresses scattered over 16 pages
+
+(module
+  (memory 16)
+
+  (func $addr (param $i i32) (result i32)
+    (i32.and (i32.mul (local.get $i) (i32.const 40503)) (i32.const 1048572)))
+
+  (func (export "scatter") (param $n i32) (result i32) (local $i i32) (local $sum i32)
+    (block
+      (loop
+        (br_if 1 (i32.ge_u (local.get $i) (local.get $n)))
+        (i32.store (call $addr (local.get $i)) (local.get $i))
+        (local.set $i (i32.add (local.get $i) (i32.const 1)))
+        (br 0)))
+    (local.set $i (i32.const 0))
+    (block
+      (loop
+        (br_if 1 (i32.ge_u (local.get $i) (local.get $n)))
+        (local.set $sum (i32.add (local.get $sum) (i32.load (call $addr (local.get $i)))))
+        (local.set $i (i32.add (local.get $i) (i32.const 1)))
+        (br 0)))
+    (local.get $sum))
+)
+
+(assert_return (invoke "scatter" (i32.const 1000)) (i32.const 499500))
+
+#clearConfig
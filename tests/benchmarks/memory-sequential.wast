@@ -0,0 +1,27 @@
+;; Load/store-heavy program for `kwasm-bench memory`: words stored in a row, copied to the next page, and loaded back
+
+(module
+  (memory 2)
+
+  (func (export "sequential") (param $n i32) (result i32) (local $i i32) (local $sum i32)
+    (block
+      (loop
+        (br_if 1 (i32.ge_u (local.get $i) (local.get $n)))
+        (i32.store (i32.mul (local.get $i) (i32.const 4)) (i32.mul (local.get $i) (local.get $i)))
+        (local.set $i (i32.add (local.get $i) (i32.const 1)))
+        (br 0)))
+    (memory.copy (i32.const 65536) (i32.const 0) (i32.mul (local.get $n) (i32.const 4)))
+    (local.set $i (i32.const 0))
+    (block
+      (loop
+        (br_if 1 (i32.ge_u (local.get $i) (local.get $n)))
+        (local.set $sum
+          (i32.add (local.get $sum) (i32.load offset=65536 (i32.mul (local.get $i) (i32.const 4)))))
+        (local.set $i (i32.add (local.get $i) (i32.const 1)))
+        (br 0)))
+    (local.get $sum))
+)
+
+(assert_return (invoke "sequential" (i32.const 1000)) (i32.const 332833500))
+
+#clearConfig